@@ -0,0 +1,98 @@
+"""
+Fixtures for the pipeline benchmark suite.
+
+Each stage is timed on the real panel (scale 1) and on generated panels with
+10x, 100x and 1000x as many countries as Primary_Dataset_For_Panel_FINAL.csv.
+Use --bench-scales to restrict the scales, e.g. --bench-scales=1,10.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tourism import pipeline  # noqa: E402
+
+DEFAULT_SCALES = '1,10,100,1000'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-scales', default=DEFAULT_SCALES,
+                     help='Comma-separated panel scale factors to benchmark '
+                          f'(default: {DEFAULT_SCALES})')
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption('--bench-scales').split(',')]
+        metafunc.parametrize('scale', scales, ids=[f'{s}x' for s in scales], scope='session')
+
+
+def replica_name(country, k):
+    """Replica 0 keeps the real name so Thailand-specific terms still apply."""
+    return country if k == 0 else f'{country} #{k:04d}'
+
+
+def scale_panel(df, factor, seed=0):
+    """
+    Tile the real panel `factor` times along the country dimension. Every
+    replica keeps the real missingness pattern; numeric columns are jittered
+    by a small multiplicative shock so replicas are not collinear.
+    """
+    if factor == 1:
+        return df.copy()
+
+    rng = np.random.default_rng(seed)
+    numeric = ['arrivals_from_china', 'peace_index', 'CPI_destination',
+               'exchange_rate', 'RER']
+    frames = []
+    for k in range(factor):
+        rep = df.copy()
+        rep['Country'] = [replica_name(c, k) for c in rep['Country']]
+        if k > 0:
+            noise = np.exp(rng.normal(0, 0.05, size=(len(rep), len(numeric))))
+            rep[numeric] = rep[numeric].values * noise
+        frames.append(rep)
+    return pd.concat(frames, ignore_index=True)
+
+
+def replica_countries(countries, factor):
+    return [replica_name(c, k) for k in range(factor) for c in countries]
+
+
+@pytest.fixture(scope='session')
+def raw_panel():
+    return pipeline.load_panel()
+
+
+@pytest.fixture(scope='session')
+def csv_path(raw_panel, scale, tmp_path_factory):
+    """The scaled panel written to CSV so the load stage reads from disk."""
+    if scale == 1:
+        return pipeline.DATA_PATH
+    path = tmp_path_factory.mktemp('panels') / f'panel_{scale}x.csv'
+    scale_panel(raw_panel, scale).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def scaled_raw(raw_panel, scale):
+    return scale_panel(raw_panel, scale)
+
+
+@pytest.fixture(scope='session')
+def model_panel(scaled_raw, scale):
+    """Model 1 sample, feature engineered and indexed by (Country, Year)."""
+    countries = replica_countries(pipeline.MODEL1_COUNTRIES, scale)
+    return pipeline.prepare_panel(scaled_raw, countries=countries)
+
+
+@pytest.fixture(scope='session')
+def placebo_panel(scaled_raw, scale):
+    """Placebo / diagnostics sample (nine countries) at the requested scale."""
+    countries = replica_countries(pipeline.PLACEBO_COUNTRIES, scale)
+    return pipeline.prepare_panel(scaled_raw, countries=countries)
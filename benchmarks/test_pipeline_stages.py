@@ -0,0 +1,87 @@
+"""
+Throughput benchmarks for every stage of the panel pipeline.
+
+Run from the repository root:
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Saved runs live in .benchmarks/ and can be listed with
+`pytest-benchmark list` or compared with `pytest-benchmark compare`.
+"""
+
+import pytest
+
+from conftest import replica_countries
+from tourism import pipeline
+
+
+def _rounds(scale):
+    # Large panels take seconds per call; keep the total run time bounded
+    return 3 if scale >= 100 else 10
+
+
+# ==========================================
+# LOAD AND FEATURE ENGINEERING
+# ==========================================
+def test_load_csv(benchmark, csv_path, scale):
+    df = benchmark.pedantic(pipeline.load_panel, args=(csv_path,), rounds=_rounds(scale))
+    assert len(df) == 390 * scale
+
+
+def test_filter(benchmark, scaled_raw, scale):
+    countries = replica_countries(pipeline.MODEL1_COUNTRIES, scale)
+    df = benchmark.pedantic(pipeline.filter_panel, args=(scaled_raw, countries),
+                            rounds=_rounds(scale))
+    assert df['Country'].nunique() <= len(countries)
+
+
+def test_feature_engineering(benchmark, scaled_raw, scale):
+    countries = replica_countries(pipeline.MODEL1_COUNTRIES, scale)
+    filtered = pipeline.filter_panel(scaled_raw, countries)
+    df = benchmark.pedantic(pipeline.engineer_features, args=(filtered,),
+                            rounds=_rounds(scale))
+    assert 'ln_rer' in df.columns
+
+
+# ==========================================
+# PANELOLS SPECIFICATIONS
+# ==========================================
+@pytest.mark.parametrize('model', list(pipeline.MODEL_SPECS))
+def test_panelols(benchmark, model_panel, scale, model):
+    res = benchmark.pedantic(pipeline.fit_model, args=(model_panel, model),
+                             rounds=_rounds(scale))
+    assert res.nobs == len(model_panel)
+
+
+# ==========================================
+# PLACEBO LOOP
+# ==========================================
+def test_placebo_loop(benchmark, placebo_panel, scale):
+    out = benchmark.pedantic(pipeline.run_placebo, args=(placebo_panel,),
+                             rounds=1 if scale >= 100 else 3)
+    assert len(out) == len(pipeline.PLACEBO_COUNTRIES)
+
+
+# ==========================================
+# DIAGNOSTICS
+# ==========================================
+def test_heteroskedasticity_wooldridge(benchmark, placebo_panel, scale):
+    out = benchmark.pedantic(pipeline.heteroskedasticity_tests, args=(placebo_panel,),
+                             rounds=_rounds(scale))
+    assert len(out) == len(pipeline.DIAGNOSTIC_MODELS)
+
+
+@pytest.mark.parametrize('model', pipeline.DIAGNOSTIC_MODELS)
+def test_vif(benchmark, placebo_panel, scale, model):
+    variables = pipeline.MODEL_SPECS[model]['exog']
+    out = benchmark.pedantic(pipeline.compute_vif, args=(placebo_panel, variables),
+                             rounds=_rounds(scale))
+    assert len(out) == len(variables)
+
+
+def test_recovery_rates(benchmark, scaled_raw, scale):
+    countries = replica_countries(pipeline.RECOVERY_COUNTRIES, scale)
+    out = benchmark.pedantic(pipeline.recovery_rates, args=(scaled_raw, countries),
+                             rounds=_rounds(scale))
+    assert len(out) == len(countries)
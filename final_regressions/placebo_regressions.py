@@ -26,13 +26,16 @@ Date: December 2024
 
 import pandas as pd
 import numpy as np
-from linearmodels.panel import PanelOLS
-import statsmodels.api as sm
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tourism.instrument import start_run, begin, end, end_run, stage
+from tourism.pipeline import placebo_fits
+
 # Set style for better visualizations
 sns.set_style("whitegrid")
 plt.rcParams['figure.dpi'] = 300
@@ -53,8 +56,12 @@ print("-" * 85)
 script_dir = os.path.dirname(os.path.abspath(__file__))
 data_path = os.path.join(script_dir, 'Primary_Dataset_For_Panel_FINAL.csv')
 
+# Stage timings are written to traces/ at the end of the run
+start_run('placebo_regressions', out_dir=os.path.join(script_dir, 'traces'))
+
 try:
-    df = pd.read_csv(data_path)
+    with stage('load', 'io'):
+        df = pd.read_csv(data_path)
     print(f"✓ Successfully loaded data from: {data_path}")
 except FileNotFoundError:
     print(f"✗ ERROR: Could not find data file at {data_path}")
@@ -64,6 +71,7 @@ except FileNotFoundError:
 countries_to_include = ['Australia', 'Cambodia', 'Indonesia', 'Japan', 
                         'Malaysia', 'Maldives', 'Singapore', 'Thailand', 'Viet Nam']
 
+begin('filter')
 df = df[(df['Country'].isin(countries_to_include)) & 
         (df['Year'] >= 2008) & 
         (df['Year'] <= 2024)]
@@ -75,6 +83,7 @@ print(f"✓ Total observations before cleaning: {len(df)}")
 # Drop missing values
 df = df.dropna(subset=['arrivals_from_china', 'peace_index', 'CPI_destination', 
                        'gdp_china', 'exchange_rate'])
+end()
 
 print(f"✓ Total observations after cleaning: {len(df)}")
 print(f"✓ Observations per country:")
@@ -89,6 +98,8 @@ print("\n" + "=" * 85)
 print("STEP 2: Feature engineering...")
 print("-" * 85)
 
+begin('feature engineering')
+
 # Log transformations
 df['ln_arrivals'] = np.log(df['arrivals_from_china'])
 df['ln_cpi'] = np.log(df['CPI_destination'])
@@ -108,6 +119,7 @@ print(f"✓ Created post-COVID dummy: {n_post_covid} observations in post-COVID
 
 # Set panel structure
 df = df.set_index(['Country', 'Year'])
+end()
 print("✓ Set panel structure with Country and Year as indices")
 
 # ==========================================
@@ -121,33 +133,23 @@ print("\nThis will take a moment. Running 8 separate panel regressions...\n")
 placebo_results = []
 detailed_results = {}
 
-for i, country in enumerate(countries_to_include, 1):
+begin('placebo loop', 'model')
+# One shared design array for every country (tourism.pipeline.placebo_fits):
+# Model C regressors plus a placebo interaction column filled in per country
+for i, (country, term, fit) in enumerate(placebo_fits(df, countries_to_include), 1):
     print(f"\n[{i}/{len(countries_to_include)}] Testing: {country}")
     print("-" * 85)
     
-    # Create interaction term for this country
-    df_test = df.copy()
-    df_test = df_test.reset_index()
-    df_test[f'is_{country}'] = (df_test['Country'] == country).astype(int)
-    df_test[f'{country}_post_covid'] = df_test[f'is_{country}'] * df_test['post_covid']
-    df_test = df_test.set_index(['Country', 'Year'])
-    
-    # Model C specification with this country's interaction
-    exog_vars = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 
-                 'covid_dummy', 'post_covid', f'{country}_post_covid']
-    
-    exog = sm.add_constant(df_test[exog_vars])
-    
     try:
         # Estimate model
-        mod = PanelOLS(df_test['ln_arrivals'], exog, entity_effects=True, time_effects=False)
-        res = mod.fit(cov_type='clustered', cluster_entity=True)
+        with stage(f'placebo {country}', 'model'):
+            res = fit()
         
         # Extract results for the interaction term
-        interaction_coef = res.params[f'{country}_post_covid']
-        interaction_se = res.std_errors[f'{country}_post_covid']
-        interaction_tstat = res.tstats[f'{country}_post_covid']
-        interaction_pval = res.pvalues[f'{country}_post_covid']
+        interaction_coef = res.params[term]
+        interaction_se = res.std_errors[term]
+        interaction_tstat = res.tstats[term]
+        interaction_pval = res.pvalues[term]
         
         # Calculate confidence intervals
         ci_lower = interaction_coef - 1.96 * interaction_se
@@ -235,6 +237,7 @@ for i, country in enumerate(countries_to_include, 1):
             'r_squared_within': np.nan,
             'n_obs': np.nan
         })
+end()
 
 # ==========================================
 # 4. SUMMARY ANALYSIS
@@ -336,6 +339,18 @@ thailand_coef = results_df[results_df['is_thailand']]['coefficient'].iloc[0]
 print(f"\n  Thailand coefficient: {thailand_coef:8.4f}")
 print(f"  Thailand rank:        {(results_df['coefficient'] > thailand_coef).sum() + 1} / {len(countries_to_include)}")
 
+# Every country x post interaction in one regression (ideas.md step 2):
+# Thailand against each country directly, instead of across separate fits
+from tourism.heterogeneous import fit_heterogeneous
+
+hetero = fit_heterogeneous(df, bootstrap=9999)
+print("\n" + "=" * 85)
+print(" SINGLE-FIT COMPARISON (all country x post effects at once, Driscoll-Kraay SEs):")
+print("-" * 85)
+print(hetero['effects'][['country', 'coef', 'std_error', 'pvalue']].round(4).to_string(index=False))
+print()
+print(hetero['tests'].round(4).to_string(index=False))
+
 # ==========================================
 # 5. SAVE DETAILED RESULTS
 # ==========================================
@@ -343,6 +358,8 @@ print("\n" + "=" * 85)
 print("STEP 5: Saving results...")
 print("=" * 85)
 
+begin('save results', 'io')
+
 # Save summary table
 output_csv = os.path.join(script_dir, 'spatial_placebo_results.csv')
 results_df_sorted.to_csv(output_csv, index=False)
@@ -365,6 +382,7 @@ with open(output_txt, 'w') as f:
             f.write("\n\n")
 
 print(f"✓ Saved detailed regression output: {output_txt}")
+end()
 
 # ==========================================
 # 6. VISUALIZATIONS
@@ -373,6 +391,7 @@ print("\n" + "=" * 85)
 print("STEP 6: Creating visualizations...")
 print("=" * 85)
 
+begin('figure coefficient plot', 'figure')
 # Visualization 1: Coefficient plot with confidence intervals
 print("\n  Creating coefficient plot with confidence intervals...")
 
@@ -437,7 +456,9 @@ output_plot1 = os.path.join(script_dir, 'spatial_placebo_tests.png')
 plt.savefig(output_plot1, dpi=300, bbox_inches='tight', facecolor='white')
 plt.close()
 print(f"  ✓ Saved: spatial_placebo_tests.png")
+end()
 
+begin('figure p-values', 'figure')
 # Visualization 2: P-value comparison
 print("  Creating p-value comparison plot...")
 
@@ -488,7 +509,9 @@ output_plot2 = os.path.join(script_dir, 'spatial_placebo_pvalues.png')
 plt.savefig(output_plot2, dpi=300, bbox_inches='tight', facecolor='white')
 plt.close()
 print(f"  ✓ Saved: spatial_placebo_pvalues.png")
+end()
 
+begin('figure distribution', 'figure')
 # Visualization 3: Coefficient distribution
 print("  Creating coefficient distribution plot...")
 
@@ -532,6 +555,7 @@ output_plot3 = os.path.join(script_dir, 'spatial_placebo_distribution.png')
 plt.savefig(output_plot3, dpi=300, bbox_inches='tight', facecolor='white')
 plt.close()
 print(f"  ✓ Saved: spatial_placebo_distribution.png")
+end()
 
 # ==========================================
 # 7. FINAL SUMMARY
@@ -567,3 +591,5 @@ print("  4. Interpret findings in context of your research question")
 print("\n" + "=" * 85)
 print(f"Analysis completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 print("=" * 85)
+
+end_run()
@@ -3,6 +3,12 @@ import numpy as np
 import statsmodels.api as sm
 import matplotlib.pyplot as plt
 import seaborn as sns
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tourism.permutation import exact_inference
+from tourism.recovery import recovery_metrics
 
 # ==========================================
 # RECOVERY RATE REGRESSION ANALYSIS
@@ -26,46 +32,27 @@ df = df[df['Country'].isin(countries)]
 # 1. CALCULATE RECOVERY RATE FOR EACH COUNTRY
 # ==========================================
 
-recovery_data = []
+# Recovery window: percentage points of the 2019 level gained 2022 -> 2024
+BASELINE_YEAR, START_YEAR, END_YEAR = 2019, 2022, 2024
 
-for country in countries:
-    country_df = df[df['Country'] == country].sort_values('Year')
-    
-    # Get baseline (2019)
-    baseline_2019 = country_df[country_df['Year'] == 2019]['arrivals_from_china'].values[0]
-    
-    # Get 2022 (start of recovery period)
-    arrivals_2022 = country_df[country_df['Year'] == 2022]['arrivals_from_china'].values[0]
-    
-    # Get 2024 (end of recovery period)
-    arrivals_2024 = country_df[country_df['Year'] == 2024]['arrivals_from_china'].values[0]
-    
-    # Calculate recovery rate (percentage points gained from 2022 to 2024)
-    recovery_rate = ((arrivals_2024 - arrivals_2022) / baseline_2019) * 100
-    
-    # Get 2024 values for independent variables
-    row_2024 = country_df[country_df['Year'] == 2024].iloc[0]
-    
-    recovery_data.append({
-        'Country': country,
-        'recovery_rate': recovery_rate,
-        'baseline_2019': baseline_2019,
-        'arrivals_2022': arrivals_2022,
-        'arrivals_2024': arrivals_2024,
-        'pct_2024_vs_2019': (arrivals_2024 / baseline_2019) * 100,
-        'peace_index': row_2024['peace_index'],
-        'cpi_index': row_2024['cpi_index'],
-        'gdp_china': row_2024['gdp_china'],
-        'exchange_rate': row_2024['exchange_rate'],
-        'is_thailand': 1 if country == 'Thailand' else 0
-    })
-
-recovery_df = pd.DataFrame(recovery_data)
+recovery_df = recovery_metrics(df, BASELINE_YEAR, [START_YEAR, END_YEAR], START_YEAR, END_YEAR,
+                               countries=countries, missing='drop')
+recovery_df = recovery_df.rename(columns={'baseline': f'baseline_{BASELINE_YEAR}'})
+dropped = sorted(set(countries) - set(recovery_df['Country']))
+if dropped:
+    print(f"⚠️  Skipping {', '.join(dropped)}: missing {BASELINE_YEAR}, {START_YEAR} or {END_YEAR}")
+
+# End-year values for the independent variables (cpi_index is CPI_destination
+# in the current dataset)
+controls = df[df['Year'] == END_YEAR].set_index('Country').rename(columns={'CPI_destination': 'cpi_index'})
+recovery_df = recovery_df.join(
+    controls[['peace_index', 'cpi_index', 'gdp_china', 'exchange_rate']], on='Country')
+recovery_df['is_thailand'] = (recovery_df['Country'] == 'Thailand').astype(int)
 
 print("\n" + "-"*80)
-print("RECOVERY RATE DATA (2022 → 2024)")
+print(f"RECOVERY RATE DATA ({START_YEAR} → {END_YEAR})")
 print("-"*80)
-print(recovery_df[['Country', 'recovery_rate', 'pct_2024_vs_2019']].sort_values('recovery_rate', ascending=False))
+print(recovery_df[['Country', 'recovery_rate', f'pct_{END_YEAR}_vs_{BASELINE_YEAR}']].sort_values('recovery_rate', ascending=False))
 
 # ==========================================
 # 2. REGRESSION MODEL 1: Simple Thailand Dummy
@@ -136,7 +123,7 @@ print("MODEL 3: Thailand Dummy + Baseline Size Control")
 print("="*80)
 
 # Add log of baseline size
-recovery_df['ln_baseline'] = np.log(recovery_df['baseline_2019'])
+recovery_df['ln_baseline'] = np.log(recovery_df[f'baseline_{BASELINE_YEAR}'])
 
 # Independent variables
 X3 = recovery_df[['is_thailand', 'ln_baseline', 'peace_index', 'ln_cpi']]
@@ -165,6 +152,15 @@ comparison = pd.DataFrame({
 }, index=['R-squared', 'Adj. R-squared', 'F-statistic', 'N'])
 print(comparison)
 
+# With 8 countries the t-distribution p-values rest on normality. Exact
+# p-values: every placement of the dummy (randomization) and every
+# permutation of the controls-only residuals (Freedman-Lane)
+exact = exact_inference(recovery_df)
+exact_cols = ['model', 'coef', 'p_asymptotic', 'p_randomization', 'n_assignments',
+              'p_permutation', 'n_permutations']
+print("\nEXACT P-VALUES FOR is_thailand")
+print(exact[exact_cols].to_string(index=False))
+
 # ==========================================
 # 6. VISUALIZATIONS
 # ==========================================
@@ -263,7 +259,10 @@ with open('recovery_rate_regression_results.txt', 'w') as f:
     f.write(str(model2.summary()) + "\n\n")
     f.write("MODEL 3: Thailand Dummy + Baseline Size\n")
     f.write("-"*80 + "\n")
-    f.write(str(model3.summary()) + "\n")
+    f.write(str(model3.summary()) + "\n\n")
+    f.write("EXACT P-VALUES FOR is_thailand (randomization and Freedman-Lane permutation)\n")
+    f.write("-"*80 + "\n")
+    f.write(exact[exact_cols].to_string(index=False) + "\n")
 
 print("✓ Saved: recovery_rate_regression_results.txt")
 
@@ -275,7 +274,7 @@ print("\n" + "="*80)
 print("FINAL SUMMARY")
 print("="*80)
 
-thailand_recovery = recovery_df[recovery_df['Country'] == 'Thailand']['recovery_rate'].values[0]
+thailand_recovery = recovery_df.set_index('Country').loc['Thailand', 'recovery_rate']
 avg_recovery = recovery_df[recovery_df['Country'] != 'Thailand']['recovery_rate'].mean()
 
 print(f"\nThailand's recovery rate: {thailand_recovery:.2f} percentage points")
@@ -5,6 +5,12 @@ import statsmodels.api as sm
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tourism.instrument import start_run, begin, end, end_run
+from tourism.unitroot import panel_stationarity
+from tourism.validation import validate_panel
 
 # ==========================================
 # 1. LOAD YOUR DATA
@@ -12,7 +18,13 @@ import os
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 data_path = os.path.join(script_dir, 'Primary_Dataset_For_Panel_FINAL.csv')
+
+# Stage timings are written to traces/ at the end of the run
+start_run('running_panel_data_regression', out_dir=os.path.join(script_dir, 'traces'))
+
+begin('load', 'io')
 df = pd.read_csv(data_path)
+end()
 
 # ==========================================
 # 2. FILTER DATA FOR MODEL 1 SPECIFICATION
@@ -23,6 +35,7 @@ countries_to_include = ['Australia', 'Japan',
                         'Malaysia', 'Maldives', 'Singapore', 'Thailand', 'Viet Nam']
 
 # Years: 2008-2024 (when peace_index becomes available)
+begin('filter')
 df = df[(df['Country'].isin(countries_to_include)) & 
         (df['Year'] >= 2008) & 
         (df['Year'] <= 2024)]
@@ -31,6 +44,7 @@ print('oof')
 # Drop rows with missing values in key variables
 df = df.dropna(subset=['arrivals_from_china', 'peace_index', 'CPI_destination', 
                        'gdp_china', 'exchange_rate', 'RER'])
+end()
 
 print("=" * 80)
 print("MODEL 1: GRAVITY PANEL ANALYSIS (2008-2024)")
@@ -45,6 +59,7 @@ print(df.groupby('Country').size().sort_values(ascending=False))
 # ==========================================
 # 3. FEATURE ENGINEERING (Crucial Step)
 # ==========================================
+begin('feature engineering')
 
 # A. Log Transformations (for Gravity Model interpretation as elasticities)
 # Log both dependent and independent variables for elasticity interpretation
@@ -98,6 +113,16 @@ df['thailand_post_covid'] = df['is_thailand'] * df['post_covid']
 
 # E. Time trend variable (for robustness checks)
 df['time_trend'] = df['Year'] - df['Year'].min()
+end()
+
+# F. Validate the engineered panel (schema ranges, RER identity, infinities after logs)
+violations = validate_panel(df)
+errors = violations[violations['severity'] == 'error']
+if len(errors):
+    print(f"\n⚠️  WARNING: {len(errors)} panel validation errors")
+    print(errors.groupby(['check', 'column']).size().to_string())
+else:
+    print("\n✓ Panel passed validation (no infinite values after log transforms)")
 
 print("\n" + "=" * 80)
 print("VARIABLE SUMMARY STATISTICS")
@@ -105,6 +130,16 @@ print("=" * 80)
 print(df[['ln_arrivals', 'peace_index', 'ln_cpi', 'ln_gdp_china', 
           'ln_exchange_rate', 'ln_rer', 'covid_dummy', 'post_covid']].describe())
 
+# The models below are in levels: check the trending series for unit roots
+# and ln_arrivals for cointegration with its regressors first
+print("\n" + "=" * 80)
+print("PANEL UNIT-ROOT AND COINTEGRATION TESTS")
+print("=" * 80)
+stationarity = panel_stationarity(df)
+print(stationarity['unit_root'].round(4).to_string(index=False))
+print()
+print(stationarity['cointegration'].round(4).to_string(index=False))
+
 # ==========================================
 # 4. SET UP PANEL DATA STRUCTURE
 # ==========================================
@@ -123,10 +158,12 @@ print("=" * 80)
 print("\n" + "-" * 80)
 print("MODEL A: Entity Fixed Effects + COVID Dummy")
 print("-" * 80)
+begin('fit Model A', 'model')
 exog_vars_a = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 'covid_dummy']
 exog_a = sm.add_constant(df[exog_vars_a])
 mod_a = PanelOLS(df['ln_arrivals'], exog_a, entity_effects=True, time_effects=False)
 res_a = mod_a.fit(cov_type='clustered', cluster_entity=True)
+end()
 print(res_a)
 
 # MODEL B: Entity FE + Time FE (absorbs COVID and all time-varying shocks)
@@ -135,27 +172,32 @@ print("\n" + "-" * 80)
 print("MODEL B: Entity Fixed Effects + Time Fixed Effects")
 print("(Note: gdp_china excluded - absorbed by time FE)")
 print("-" * 80)
+begin('fit Model B', 'model')
 exog_vars_b = ['peace_index', 'ln_cpi', 'ln_exchange_rate']
 exog_b = df[exog_vars_b]  # No constant needed with both FE
 mod_b = PanelOLS(df['ln_arrivals'], exog_b, entity_effects=True, time_effects=True)
 res_b = mod_b.fit(cov_type='clustered', cluster_entity=True)
+end()
 print(res_b)
 
 # MODEL C: Thailand Asymmetry Model (Entity FE + COVID + Thailand Post-COVID Interaction)
 print("\n" + "-" * 80)
 print("MODEL C: Thailand Asymmetry Analysis (Entity FE + COVID + Thailand Interaction)")
 print("-" * 80)
+begin('fit Model C', 'model')
 exog_vars_c = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 
                'covid_dummy', 'post_covid', 'thailand_post_covid']
 exog_c = sm.add_constant(df[exog_vars_c])
 mod_c = PanelOLS(df['ln_arrivals'], exog_c, entity_effects=True, time_effects=False)
 res_c = mod_c.fit(cov_type='clustered', cluster_entity=True)
+end()
 print(res_c)
 
 # MODEL D: RER Instead of Nominal Exchange Rate (Entity FE + COVID)
 print("\n" + "-" * 80)
 print("MODEL D: Real Exchange Rate (RER) - Entity FE + COVID Dummy")
 print("-" * 80)
+begin('fit Model D', 'model')
 try:
     exog_vars_d = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_rer', 'covid_dummy']
     exog_d = sm.add_constant(df[exog_vars_d])
@@ -167,12 +209,14 @@ except Exception as e:
     print(f"MODEL D FAILED: {str(e)}")
     res_d = None
     model_d_success = False
+end()
 
 # MODEL E: RER with Time FE
 print("\n" + "-" * 80)
 print("MODEL E: Real Exchange Rate (RER) - Entity FE + Time FE")
 print("(Note: gdp_china excluded - absorbed by time FE)")
 print("-" * 80)
+begin('fit Model E', 'model')
 try:
     exog_vars_e = ['peace_index', 'ln_cpi', 'ln_rer']
     exog_e = df[exog_vars_e]
@@ -184,11 +228,13 @@ except Exception as e:
     print(f"MODEL E FAILED: {str(e)}")
     res_e = None
     model_e_success = False
+end()
 
 # MODEL F: RER with Thailand Asymmetry
 print("\n" + "-" * 80)
 print("MODEL F: RER + Thailand Asymmetry Analysis")
 print("-" * 80)
+begin('fit Model F', 'model')
 try:
     exog_vars_f = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_rer', 
                    'covid_dummy', 'post_covid', 'thailand_post_covid']
@@ -201,20 +247,17 @@ except Exception as e:
     print(f"MODEL F FAILED: {str(e)}")
     res_f = None
     model_f_success = False
+end()
 
 # MODEL G: Both Nominal and Real Exchange Rates (Horse Race)
 print("\n" + "-" * 80)
 print("MODEL G: Nominal vs Real Exchange Rate Comparison (Entity FE + COVID)")
 print("-" * 80)
+begin('fit Model G', 'model')
 try:
     exog_vars_g = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 'ln_rer', 'covid_dummy']
     exog_g = sm.add_constant(df[exog_vars_g])
     
-    # Check for infinite or NaN values
-    if exog_g.isin([np.inf, -np.inf]).any().any():
-        print("WARNING: Infinite values detected in exogenous variables")
-        print(exog_g.isin([np.inf, -np.inf]).sum())
-    
     mod_g = PanelOLS(df['ln_arrivals'], exog_g, entity_effects=True, time_effects=False)
     res_g = mod_g.fit(cov_type='clustered', cluster_entity=True)
     print(res_g)
@@ -223,6 +266,7 @@ except Exception as e:
     print("Skipping Model G due to numerical issues (likely multicollinearity between nominal and real ER)")
     # Create a dummy result for Model G
     res_g = res_d  # Use Model D as placeholder
+end()
 
 # ==========================================
 # 6. INTERPRETATION & DIAGNOSTICS
@@ -287,6 +331,7 @@ print(comparison)
 # ==========================================
 # 7. SAVE RESULTS
 # ==========================================
+begin('save results', 'io')
 # Save regression results to text file
 with open(os.path.join(script_dir, 'regression_results_model1_woCandE.txt'), 'w') as f:
     f.write("=" * 80 + "\n")
@@ -355,6 +400,7 @@ if model_f_success and res_f is not None:
 all_params = pd.DataFrame(params_data)
 all_params.to_csv(os.path.join(script_dir, 'regression_coefficients_model1_woCandE.csv'))
 print("✓ Coefficients saved to 'regression_coefficients_model1_woCandE.csv'")
+end()
 
 # ==========================================
 # 8. VISUALIZATIONS
@@ -366,6 +412,7 @@ print("=" * 80)
 # Reset index for plotting
 df_plot = df.reset_index()
 
+begin('figure 1', 'figure')
 # Plot 1: Tourist Arrivals Over Time by Country
 plt.figure(figsize=(14, 8))
 for country in df_plot['Country'].unique():
@@ -384,7 +431,9 @@ plt.tight_layout()
 plt.savefig(os.path.join(script_dir, 'arrivals_by_country_woCandE.png'), dpi=300, bbox_inches='tight')
 print("✓ Saved: arrivals_by_country_woCandE.png")
 plt.close()
+end()
 
+begin('figure 2', 'figure')
 # Plot 2: Thailand vs Others - Recovery Pattern
 plt.figure(figsize=(12, 6))
 thailand_data = df_plot[df_plot['Country'] == 'Thailand']
@@ -406,7 +455,9 @@ plt.tight_layout()
 plt.savefig(os.path.join(script_dir, 'thailand_asymmetry_woCandE.png'), dpi=300, bbox_inches='tight')
 print("✓ Saved: thailand_asymmetry_woCandE.png")
 plt.close()
+end()
 
+begin('figure 3', 'figure')
 # Plot 3: Log Arrivals (normalized view)
 plt.figure(figsize=(14, 8))
 for country in df_plot['Country'].unique():
@@ -425,7 +476,9 @@ plt.tight_layout()
 plt.savefig(os.path.join(script_dir, 'log_arrivals_by_country_woCandE.png'), dpi=300, bbox_inches='tight')
 print("✓ Saved: log_arrivals_by_country_woCandE.png")
 plt.close()
+end()
 
+begin('figure 4', 'figure')
 # Plot 4: Correlation Heatmap
 plt.figure(figsize=(10, 8))
 corr_vars = ['ln_arrivals', 'peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 'ln_rer']
@@ -437,7 +490,9 @@ plt.tight_layout()
 plt.savefig(os.path.join(script_dir, 'correlation_matrix_woCandE.png'), dpi=300, bbox_inches='tight')
 print("✓ Saved: correlation_matrix_woCandE.png")
 plt.close()
+end()
 
+begin('figure 5', 'figure')
 # Plot 5: Nominal vs Real Exchange Rate Comparison
 plt.figure(figsize=(14, 8))
 fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
@@ -470,6 +525,7 @@ plt.tight_layout()
 plt.savefig(os.path.join(script_dir, 'exchange_rate_comparison.png'), dpi=300, bbox_inches='tight')
 print("✓ Saved: exchange_rate_comparison.png")
 plt.close()
+end()
 
 print("\n" + "=" * 80)
 print("ANALYSIS COMPLETE!")
@@ -512,3 +568,5 @@ if model_f_success:
 else:
     print(f"  → Model F (RER + Thailand): ✗ (numerical issues)")
 print("=" * 80)
+
+end_run()
@@ -1,5 +1,12 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(script_dir)))
+from tourism.countries import merge_on_country
+from tourism.validation import validate_panel
 
 # ==========================================
 # 1. LOAD PRIMARY DATASET
@@ -95,12 +102,8 @@ if 'cpi_index' in df_primary.columns:
     print("\n✓ Using existing 'cpi_index' column as CPI_destination")
     df_merged = df_primary.rename(columns={'cpi_index': 'CPI_destination'})
 else:
-    # Merge with correct CPI destination data
-    df_merged = df_primary.merge(
-        df_cpi_long,
-        on=['Country', 'Year'],
-        how='left'
-    )
+    # Merge with correct CPI destination data (integer country keys)
+    df_merged = merge_on_country(df_primary, df_cpi_long, on=['Year'], how='left')
 
 # Merge with China CPI data
 df_merged = df_merged.merge(
@@ -124,35 +127,21 @@ df_merged = df_merged.merge(
 df_merged['RER'] = df_merged['exchange_rate'] * (df_merged['CPI_destination'] / df_merged['CPI_china'])
 
 # ==========================================
-# 5.5. DIAGNOSTIC CHECK FOR NEGATIVE VALUES
+# 5.5. DIAGNOSTIC CHECKS (tourism/validation.py PANEL_SCHEMA)
 # ==========================================
 print(f"\n{'='*60}")
 print(f"DIAGNOSTIC CHECKS")
 print(f"{'='*60}")
 
-# Check for negative values in components
-neg_exchange = df_merged[df_merged['exchange_rate'] < 0]
-neg_cpi_dest = df_merged[df_merged['CPI_destination'] < 0]
-neg_cpi_china = df_merged[df_merged['CPI_china'] < 0]
-neg_rer = df_merged[df_merged['RER'] < 0]
-
-if len(neg_exchange) > 0:
-    print(f"\n⚠️  WARNING: {len(neg_exchange)} rows with NEGATIVE exchange_rate!")
-    print(neg_exchange[['Country', 'Year', 'exchange_rate']].head())
-
-if len(neg_cpi_dest) > 0:
-    print(f"\n⚠️  WARNING: {len(neg_cpi_dest)} rows with NEGATIVE CPI_destination!")
-    print(neg_cpi_dest[['Country', 'Year', 'CPI_destination']].head())
-
-if len(neg_cpi_china) > 0:
-    print(f"\n⚠️  WARNING: {len(neg_cpi_china)} rows with NEGATIVE CPI_china!")
-    print(neg_cpi_china[['Country', 'Year', 'CPI_china']].head())
-
-if len(neg_rer) > 0:
-    print(f"\n⚠️  WARNING: {len(neg_rer)} rows with NEGATIVE RER!")
-    print(neg_rer[['Country', 'Year', 'exchange_rate', 'CPI_destination', 'CPI_china', 'RER']].head(10))
+# Negative or zero components, out-of-range values, the RER identity,
+# duplicate Country-Year rows and gaps, checked in one pass
+violations = validate_panel(df_merged)
+if len(violations) > 0:
+    for (check, column), rows in violations.groupby(['check', 'column']):
+        print(f"\n⚠️  WARNING: {len(rows)} rows failed '{check}' on {column} ({rows['message'].iloc[0]})")
+        print(rows[['Country', 'Year', 'value']].head())
 else:
-    print(f"\n✓ No negative RER values found (as expected!)")
+    print(f"\n✓ No negative or invalid RER values found (as expected!)")
 
 # ==========================================
 # 6. SAVE UPDATED DATASET
@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(script_dir)))
+from tourism.recovery import recovery_metrics
 
 # Load data
-df = pd.read_csv('../Primary_Dataset_For_Panel_FINAL.csv')
+df = pd.read_csv(os.path.join(script_dir, '..', 'Primary_Dataset_For_Panel_FINAL.csv'))
 
 # Filter for countries in the model
 countries = ['Australia', 'Cambodia', 'Indonesia', 'Japan', 
@@ -13,42 +19,21 @@ print("="*80)
 print("RECOVERY RATE ANALYSIS: Percentage Change from 2019")
 print("="*80)
 
-results = []
-
-for country in countries:
-    country_data = df[df['Country'] == country].sort_values('Year')
-    
-    # Get values
-    val_2019 = country_data[country_data['Year'] == 2019]['arrivals_from_china'].values
-    val_2022 = country_data[country_data['Year'] == 2022]['arrivals_from_china'].values
-    val_2023 = country_data[country_data['Year'] == 2023]['arrivals_from_china'].values
-    val_2024 = country_data[country_data['Year'] == 2024]['arrivals_from_china'].values
-    
-    if len(val_2019) > 0:
-        baseline = val_2019[0]
-        
-        # Calculate percentage of 2019 level recovered
-        pct_2022 = (val_2022[0] / baseline * 100) if len(val_2022) > 0 else None
-        pct_2023 = (val_2023[0] / baseline * 100) if len(val_2023) > 0 else None
-        pct_2024 = (val_2024[0] / baseline * 100) if len(val_2024) > 0 else None
-        
-        # Recovery rate (how much of the gap closed from 2022 to 2024)
-        if pct_2022 and pct_2024:
-            recovery_rate = pct_2024 - pct_2022
-        else:
-            recovery_rate = None
-        
-        results.append({
-            'Country': country,
-            '2019_Baseline': baseline,
-            '2022_%_of_2019': pct_2022,
-            '2023_%_of_2019': pct_2023,
-            '2024_%_of_2019': pct_2024,
-            'Recovery_Rate_2022_to_2024': recovery_rate
-        })
+# % of the 2019 level in each recovery year, and pp gained 2022 -> 2024.
+# Countries without 2019 are skipped; other missing years stay NaN.
+metrics = recovery_metrics(df, baseline_year=2019, target_years=[2022, 2023, 2024],
+                           start_year=2022, end_year=2024, countries=countries)
+metrics = metrics[metrics['baseline'].notna()]
 
 # Create DataFrame
-results_df = pd.DataFrame(results)
+results_df = pd.DataFrame({
+    'Country': metrics['Country'],
+    '2019_Baseline': metrics['baseline'],
+    '2022_%_of_2019': metrics['pct_2022_vs_2019'],
+    '2023_%_of_2019': metrics['pct_2023_vs_2019'],
+    '2024_%_of_2019': metrics['pct_2024_vs_2019'],
+    'Recovery_Rate_2022_to_2024': metrics['recovery_rate'],
+})
 
 print("\n2019 Baseline (absolute numbers):")
 print(results_df[['Country', '2019_Baseline']].to_string(index=False))
@@ -64,7 +49,7 @@ print("\n" + "="*80)
 print("KEY INSIGHT:")
 print("="*80)
 
-thailand_recovery = results_df[results_df['Country'] == 'Thailand']['Recovery_Rate_2022_to_2024'].values[0]
+thailand_recovery = results_df.set_index('Country').loc['Thailand', 'Recovery_Rate_2022_to_2024']
 avg_recovery = results_df['Recovery_Rate_2022_to_2024'].mean()
 
 print(f"\nThailand's recovery rate (2022→2024): {thailand_recovery:.1f} percentage points")
@@ -1,5 +1,10 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tourism.countries import merge_on_country
 
 # Read the primary dataset (with fixed CPI)
 df_primary = pd.read_csv('Primary_Dataset_For_Panel.xlsx - Sheet1_fixed_CPI.csv')
@@ -26,12 +31,9 @@ df_peace_long['Year'] = df_peace_long['Year'].astype(int)
 if 'peace_index' in df_primary.columns:
     df_primary = df_primary.drop('peace_index', axis=1)
 
-# Merge on Country and Year
-df_merged = df_primary.merge(
-    df_peace_long,
-    on=['Country', 'Year'],
-    how='left'
-)
+# Merge on Country and Year (integer country keys, so GPI spellings such as
+# "Vietnam" or "South Korea" match the panel's names)
+df_merged = merge_on_country(df_primary, df_peace_long, on=['Year'], how='left')
 
 # Rename the new peace index column to peace_index
 df_merged = df_merged.rename(columns={'peace_index_new': 'peace_index'})
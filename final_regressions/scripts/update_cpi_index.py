@@ -1,5 +1,10 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tourism.countries import merge_on_country
 
 # Read the current dataset (with peace index)
 df_primary = pd.read_csv('Primary_Dataset_For_Panel.xlsx - Sheet1_fixed_CPI_with_peace.csv')
@@ -21,12 +26,8 @@ df_cpi_long['Year'] = df_cpi_long['Year'].astype(int)
 if 'cpi_index' in df_primary.columns:
     df_primary = df_primary.drop('cpi_index', axis=1)
 
-# Merge with primary dataset
-df_merged = df_primary.merge(
-    df_cpi_long,
-    on=['Country', 'Year'],
-    how='left'
-)
+# Merge with primary dataset (integer country keys, see tourism/countries.py)
+df_merged = merge_on_country(df_primary, df_cpi_long, on=['Year'], how='left')
 
 # Rename the new CPI index column to cpi_index
 df_merged = df_merged.rename(columns={'cpi_index_correct': 'cpi_index'})
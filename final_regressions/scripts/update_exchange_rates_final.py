@@ -1,4 +1,9 @@
 import pandas as pd
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tourism.countries import merge_on_country
 
 # ==========================================
 # 1. LOAD PRIMARY DATASET
@@ -57,12 +62,8 @@ df_rates_final = df_rates[['Country', 'Year', 'exchange_rate']]
 if 'exchange_rate' in df_primary.columns:
     df_primary = df_primary.drop('exchange_rate', axis=1)
 
-# Merge with the new exchange rates
-df_merged = df_primary.merge(
-    df_rates_final,
-    on=['Country', 'Year'],
-    how='left'
-)
+# Merge with the new exchange rates (integer country keys, see tourism/countries.py)
+df_merged = merge_on_country(df_primary, df_rates_final, on=['Year'], how='left')
 
 # ==========================================
 # 5. SAVE UPDATED DATASET
@@ -9,10 +9,13 @@ If Thailand's effect is unique, only Thailand should show a significant coeffici
 
 import pandas as pd
 import numpy as np
-from linearmodels.panel import PanelOLS
-import statsmodels.api as sm
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tourism.instrument import begin, end
+from tourism.pipeline import placebo_fits
 
 # ==========================================
 # 1. LOAD DATA
@@ -60,33 +63,22 @@ df = df.set_index(['Country', 'Year'])
 # ==========================================
 placebo_results = []
 
-for country in countries_to_include:
+begin('placebo loop', 'model')
+# One shared design array for every country (tourism.pipeline.placebo_fits):
+# Model C regressors plus a placebo interaction column filled in per country
+for country, term, fit in placebo_fits(df, countries_to_include):
     print(f"\n{'='*80}")
     print(f"PLACEBO TEST: {country}")
     print(f"{'='*80}")
     
-    # Create interaction term for this country
-    df_test = df.copy()
-    df_test = df_test.reset_index()
-    df_test[f'is_{country}'] = (df_test['Country'] == country).astype(int)
-    df_test[f'{country}_post_covid'] = df_test[f'is_{country}'] * df_test['post_covid']
-    df_test = df_test.set_index(['Country', 'Year'])
-    
-    # Run Model C with this country's interaction
-    exog_vars = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 
-                 'covid_dummy', 'post_covid', f'{country}_post_covid']
-    
-    exog = sm.add_constant(df_test[exog_vars])
-    
     try:
-        mod = PanelOLS(df_test['ln_arrivals'], exog, entity_effects=True, time_effects=False)
-        res = mod.fit(cov_type='clustered', cluster_entity=True)
+        res = fit()
         
         # Extract results for the interaction term
-        interaction_coef = res.params[f'{country}_post_covid']
-        interaction_se = res.std_errors[f'{country}_post_covid']
-        interaction_tstat = res.tstats[f'{country}_post_covid']
-        interaction_pval = res.pvalues[f'{country}_post_covid']
+        interaction_coef = res.params[term]
+        interaction_se = res.std_errors[term]
+        interaction_tstat = res.tstats[term]
+        interaction_pval = res.pvalues[term]
         
         # Determine if significant
         is_significant = interaction_pval < 0.05
@@ -118,6 +110,7 @@ for country in countries_to_include:
             'significant': False,
             'is_thailand': country == 'Thailand'
         })
+end()
 
 # ==========================================
 # 4. SUMMARY TABLE
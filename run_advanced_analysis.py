@@ -9,6 +9,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from tourism.gmm import fit_gmm
+from tourism.longrun import long_run_multipliers
+from tourism.pipeline import PLACEBO_COUNTRIES, prepare_panel
+from tourism.sur import equality_tests, fit_sur
+
 # Set paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(script_dir, 'final_regressions/new_models_data')
@@ -100,6 +105,33 @@ with open(results_file, 'w') as f:
     f.write(f"   Habit Persistence (rho): {rho:.4f}\n")
     f.write(f"   Short-Run Price Elasticity: {sr_price_elast:.4f}\n")
     f.write(f"   Long-Run Price Elasticity: {lr_price_elast:.4f}\n")
+
+    # Uncertainty for every long-run multiplier b / (1 - rho)
+    lr_table = long_run_multipliers(thailand_ts, n_boot=1999, method='block')
+    f.write("\nLONG-RUN MULTIPLIERS (95% intervals):\n")
+    f.write(f"   {'Variable':<15} {'Long-Run':>9} {'SE (delta)':>11} {'Delta CI':>18} "
+            f"{'Fieller CI':>18} {'Block bootstrap CI':>20}\n")
+    for _, row in lr_table.iterrows():
+        f.write(f"   {row['variable']:<15} {row['long_run']:>9.4f} {row['se_delta']:>11.4f} "
+                f"[{row['lower_delta']:>7.3f}, {row['upper_delta']:>7.3f}] "
+                f"[{row['lower_fieller']:>7.3f}, {row['upper_fieller']:>7.3f}] "
+                f"[{row['lower_boot']:>8.3f}, {row['upper_boot']:>8.3f}]\n")
+    f.write("   > Fieller bounds are NaN when 1 - rho is not significantly different from zero (unbounded set).\n")
+
+    # Habit persistence in the destination panel: FE with a lagged dependent
+    # variable has Nickell bias, so use system GMM (collapsed, lags 2-3)
+    gmm = fit_gmm(prepare_panel(countries=PLACEBO_COUNTRIES),
+                  exog=['ln_gdp_china', 'ln_rer', 'covid_dummy'],
+                  system=True, collapse=True, lags=(2, 3))
+    f.write("\nPANEL HABIT PERSISTENCE (System GMM, two-step Windmeijer SEs):\n")
+    f.write(f"   {'Variable':<18} {'Coef':>9} {'Std Err':>9} {'P-Value':>9}\n")
+    for _, row in gmm['table'].iterrows():
+        f.write(f"   {row['variable']:<18} {row['coef']:>9.4f} {row['std_error']:>9.4f} "
+                f"{row['pvalue']:>9.4f}\n")
+    h = gmm['hansen']
+    f.write(f"   Hansen J: chi2({h['df']}) = {h['statistic']:.3f} (p = {h['pvalue']:.4f}); "
+            f"AR(2) p = {gmm['ar']['pvalue'].iloc[1]:.4f}; "
+            f"{gmm['n_instruments']} instruments, {gmm['n_groups']} destinations\n")
     
     # ==========================================
     # 3. COMPARATIVE ELASTICITY ANALYSIS
@@ -133,6 +165,14 @@ with open(results_file, 'w') as f:
         except Exception as e:
             f.write(f"{country:<15} ERROR: {str(e)}\n")
 
+    # Joint system (SUR) so the elasticities can be compared formally
+    f.write("\nSUR SYSTEM (HAC) - PRICE ELASTICITY EQUALITY TESTS:\n")
+    sur = fit_sur(panel_df[panel_df['Country'].isin(competitors)], cov_type='HAC')
+    f.write(f"{'Test':<40} {'Difference':>11} {'Chi2':>9} {'df':>4} {'P-Value':>9}\n")
+    for _, row in equality_tests(sur, 'ln_rer', reference='Thailand').iterrows():
+        f.write(f"{row['test']:<40} {row['difference']:>11.4f} {row['statistic']:>9.3f} "
+                f"{row['df']:>4} {row['pvalue']:>9.4f}\n")
+
 print(f"Analysis complete. Results saved to {results_file}")
 
 # Visualization: Comparative Elasticity
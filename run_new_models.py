@@ -6,6 +6,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from tourism.recovery import recovery_metrics
+
 # Set paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(script_dir, 'final_regressions/new_models_data')
@@ -77,18 +79,13 @@ print("\nGenerating Recovery Scorecard...")
 
 # Calculate recovery (2024 vs 2019)
 recovery_df = pd.read_csv(os.path.join(data_dir, 'competitor_panel.csv'))
-recovery_stats = []
-
-for country in recovery_df['Country'].unique():
-    try:
-        val_2019 = recovery_df[(recovery_df['Country'] == country) & (recovery_df['Year'] == 2019)]['arrivals_from_china'].values[0]
-        val_2024 = recovery_df[(recovery_df['Country'] == country) & (recovery_df['Year'] == 2024)]['arrivals_from_china'].values[0]
-        recovery_rate = (val_2024 / val_2019) * 100
-        recovery_stats.append({'Country': country, 'Recovery_Rate': recovery_rate})
-    except IndexError:
-        print(f"Skipping {country} due to missing 2019 or 2024 data")
-
-recovery_final = pd.DataFrame(recovery_stats).sort_values('Recovery_Rate', ascending=False)
+recovery_stats = recovery_metrics(recovery_df, baseline_year=2019, target_years=[2024],
+                                  start_year=None, missing='drop')
+for country in sorted(set(recovery_df['Country']) - set(recovery_stats['Country'])):
+    print(f"Skipping {country} due to missing 2019 or 2024 data")
+
+recovery_final = (recovery_stats.rename(columns={'pct_2024_vs_2019': 'Recovery_Rate'})
+                  [['Country', 'Recovery_Rate']].sort_values('Recovery_Rate', ascending=False))
 
 plt.figure(figsize=(10, 6))
 sns.barplot(x='Country', y='Recovery_Rate', data=recovery_final, palette='viridis')
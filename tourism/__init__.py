@@ -0,0 +1,8 @@
+"""
+Shared building blocks for the Thailand tourism econometrics scripts.
+
+The top-level scripts (run_new_models.py, final_regressions/*.py, ...) each
+re-implement the same load -> filter -> feature engineering -> PanelOLS
+pipeline. The modules in this package expose those stages as plain
+functions so they can be reused, timed and benchmarked.
+"""
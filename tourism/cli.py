@@ -0,0 +1,903 @@
+"""
+Single command-line entry point for the analysis pipeline.
+
+    python -m tourism summary                 # quick data check (stdlib only)
+    python -m tourism prepare -o panel.csv    # filtered + feature-engineered panel
+    python -m tourism fit --models A C F      # PanelOLS specifications
+    python -m tourism placebo                 # spatial placebo loop
+    python -m tourism diagnose                # Wald/Wooldridge, VIF, recovery rates
+    python -m tourism plot --figures arrivals asymmetry
+    python -m tourism export -o coefficients.csv
+    python -m tourism rolling --window 8      # RLS elasticity paths per destination
+    python -m tourism tvp                     # Kalman-smoothed time-varying ADL
+    python -m tourism sur --variable ln_rer   # SUR system + cross-country equality tests
+    python -m tourism forecast --rer-change Thailand=-0.1   # 2025-2030 fan charts
+    python -m tourism whatif exchange_rate=-0.1 peace_index:Thailand=0.2
+    python -m tourism serve --port 8000       # JSON endpoints for the dashboard
+    python -m tourism recovery --baseline 2019 --targets 2022 2023 2024
+    python -m tourism recovery --grid 2018 2019   # targets as % of each baseline
+    python -m tourism permtest                # exact p-values for the recovery regressions
+    python -m tourism impute --m 20 --start 2000   # MICE + Rubin's rules for Models A-F
+    python -m tourism validate                # schema checks, only rows changed since last run
+    python -m tourism countries Vietnam "Korea, Rep." --file wdi.csv   # ISO3 name resolution
+    python -m tourism compile book.xlsx -o combined.xlsx   # one-pass join of sheets/files
+    python -m tourism excel data/*.xlsx       # parse workbooks into the columnar cache
+    python -m tourism gmm --system            # Arellano-Bond / Blundell-Bond dynamic panel
+    python -m tourism unitroot --trend ct     # IPS / LLC / Fisher-ADF, Pedroni / Westerlund
+    python -m tourism covariance --models C F # SEs under clustered / Driscoll-Kraay / PCSE ...
+    python -m tourism ife --models C F        # Bai interactive fixed effects, r by IC_p2
+    python -m tourism hierarchical --chains 4 # pooled country x post effects, P(Thailand outlier)
+    python -m tourism hetero --time-effects   # all country x post effects in one fit + Wald tests
+
+pandas, numpy, linearmodels, statsmodels, matplotlib and seaborn are imported
+inside the subcommand that needs them, so `summary` and `--help` start
+without loading any of them. Add --trace to any subcommand to write a stage
+timing file (see tourism.instrument).
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+from .instrument import end_run, stage, start_run
+
+DEFAULT_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'final_regressions', 'Primary_Dataset_For_Panel_FINAL.csv')
+
+SAMPLES = {
+    'model1': 'MODEL1_COUNTRIES',
+    'placebo': 'PLACEBO_COUNTRIES',
+    'recovery': 'RECOVERY_COUNTRIES',
+}
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+def _prepared_panel(args, sample='model1'):
+    from . import pipeline
+
+    countries = args.countries or getattr(pipeline, SAMPLES[args.sample or sample])
+    df = pipeline.load_panel(args.data)
+    return pipeline.prepare_panel(df, countries=countries,
+                                  start_year=args.start, end_year=args.end)
+
+
+def _shock_arg(values):
+    """'0.1' -> 0.1 for every country; 'Thailand=-0.1 Japan=0.05' -> dict."""
+    if values is None:
+        return 0.0
+    if len(values) == 1 and '=' not in values[0]:
+        return float(values[0])
+    return {k: float(v) for k, v in (item.split('=', 1) for item in values)}
+
+
+def _write_table(df, path, index=True):
+    if path.endswith('.json'):
+        df.to_json(path, orient='table' if index else 'records', indent=1)
+    elif path.endswith('.xlsx'):
+        df.to_excel(path, index=index)
+    else:
+        df.to_csv(path, index=index)
+    print(f"✓ Saved: {path}")
+
+
+# ==========================================
+# SUBCOMMANDS
+# ==========================================
+def cmd_summary(args):
+    """Row/country/year counts and missingness using only the csv module."""
+    with open(args.data, newline='') as f:
+        reader = csv.DictReader(f)
+        columns = reader.fieldnames
+        missing = dict.fromkeys(columns, 0)
+        countries, years, n_rows = set(), set(), 0
+        for row in reader:
+            n_rows += 1
+            countries.add(row['Country'])
+            years.add(row['Year'])
+            for col in columns:
+                if row[col] in ('', 'NA', 'NaN', 'nan'):
+                    missing[col] += 1
+
+    print("=" * 80)
+    print(f"DATASET SUMMARY: {os.path.basename(args.data)}")
+    print("=" * 80)
+    print(f"Total rows: {n_rows}")
+    print(f"Countries: {len(countries)}")
+    print(f"Years covered: {min(years)} - {max(years)} ({len(years)} years)")
+    print(f"\n{'Column':<25} {'Missing Count':>14} {'Missing %':>10}")
+    print("-" * 51)
+    for col in sorted(columns, key=lambda c: missing[c], reverse=True):
+        pct = 100 * missing[col] / n_rows if n_rows else 0.0
+        print(f"{col:<25} {missing[col]:>14} {pct:>10.2f}")
+
+
+def cmd_prepare(args):
+    df = _prepared_panel(args)
+    print(f"Prepared {len(df)} observations across "
+          f"{df.index.get_level_values(0).nunique()} countries")
+    if args.output:
+        with stage('write prepared panel', 'io'):
+            _write_table(df.reset_index(), args.output, index=False)
+
+
+def cmd_fit(args):
+    from . import pipeline
+
+    df = _prepared_panel(args)
+    for model in args.models:
+        print("\n" + "-" * 80)
+        print(f"MODEL {model}: {pipeline.MODEL_SPECS[model]['name']}")
+        print("-" * 80)
+        try:
+            print(pipeline.fit_model(df, model, cov_type=args.cov_type))
+        except Exception as e:
+            print(f"MODEL {model} FAILED: {str(e)}")
+
+
+def cmd_placebo(args):
+    df = _prepared_panel(args, sample='placebo')
+    from . import pipeline
+
+    countries = args.countries or pipeline.PLACEBO_COUNTRIES
+    results = pipeline.run_placebo(df, countries=countries)
+    print(results.to_string(index=False))
+    if args.output:
+        _write_table(results, args.output, index=False)
+
+
+def cmd_diagnose(args):
+    from . import pipeline
+
+    if 'het' in args.tests:
+        df = _prepared_panel(args, sample='placebo')
+        print("\nHETEROSKEDASTICITY AND AUTOCORRELATION TESTS")
+        print("-" * 80)
+        print(pipeline.heteroskedasticity_tests(df).to_string(index=False))
+    if 'vif' in args.tests:
+        df = _prepared_panel(args, sample='placebo')
+        for model in pipeline.DIAGNOSTIC_MODELS:
+            print(f"\nVIF - Model {model}")
+            print("-" * 80)
+            print(pipeline.compute_vif(df, pipeline.MODEL_SPECS[model]['exog']).to_string(index=False))
+    if 'recovery' in args.tests:
+        print("\nRECOVERY RATES")
+        print("-" * 80)
+        raw = pipeline.load_panel(args.data)
+        print(pipeline.recovery_rates(raw).to_string(index=False))
+
+
+def cmd_plot(args):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    df = _prepared_panel(args).reset_index()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    for name in args.figures:
+        path = os.path.join(args.output_dir, f'{name}.png')
+        with stage(f'figure {name}', 'figure'):
+            if name == 'arrivals':
+                plt.figure(figsize=(14, 8))
+                for country, country_data in df.groupby('Country'):
+                    plt.plot(country_data['Year'], country_data['arrivals_from_china'],
+                             marker='o', label=country, linewidth=2)
+                plt.ylabel('Chinese Tourist Arrivals', fontsize=12)
+                plt.title('Chinese Tourist Arrivals by Destination', fontsize=14, fontweight='bold')
+                plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+            elif name == 'asymmetry':
+                plt.figure(figsize=(12, 6))
+                thailand = df[df['Country'] == 'Thailand']
+                others = df[df['Country'] != 'Thailand'].groupby('Year')['arrivals_from_china'].mean()
+                plt.plot(thailand['Year'], thailand['arrivals_from_china'],
+                         marker='o', linewidth=3, label='Thailand', color='#FF6B6B')
+                plt.plot(others.index, others.values,
+                         marker='s', linewidth=3, label='Other Countries (Average)', color='#4ECDC4')
+                plt.ylabel('Chinese Tourist Arrivals', fontsize=12)
+                plt.title('Thailand vs Other Destinations: Recovery Asymmetry',
+                          fontsize=14, fontweight='bold')
+                plt.legend(fontsize=11)
+            elif name == 'correlation':
+                import seaborn as sns
+                plt.figure(figsize=(10, 8))
+                corr_vars = ['ln_arrivals', 'peace_index', 'ln_cpi', 'ln_gdp_china',
+                             'ln_exchange_rate', 'ln_rer']
+                sns.heatmap(df[corr_vars].corr(), annot=True, cmap='coolwarm', center=0,
+                            square=True, linewidths=1, cbar_kws={"shrink": 0.8})
+                plt.title('Correlation Matrix of Variables', fontsize=14, fontweight='bold')
+            if name != 'correlation':
+                plt.axvline(x=2020, color='red', linestyle='--', linewidth=2, alpha=0.5)
+                plt.axvline(x=2022, color='green', linestyle='--', linewidth=2, alpha=0.5)
+                plt.xlabel('Year', fontsize=12)
+                plt.grid(True, alpha=0.3)
+            plt.tight_layout()
+            plt.savefig(path, dpi=args.dpi, bbox_inches='tight')
+            plt.close()
+        print(f"✓ Saved: {path}")
+
+
+def cmd_export(args):
+    import pandas as pd
+    from . import pipeline
+
+    df = _prepared_panel(args)
+    columns = {}
+    for model, res in pipeline.fit_all_models(df, args.models).items():
+        if res is None:
+            continue
+        columns[f'Model_{model}_Coef'] = res.params
+        columns[f'Model_{model}_SE'] = res.std_errors
+        columns[f'Model_{model}_Pval'] = res.pvalues
+    _write_table(pd.DataFrame(columns), args.output)
+
+
+def cmd_rolling(args):
+    from . import pipeline
+    from .rolling import rolling_elasticities
+
+    if args.timeseries:
+        df = pipeline.load_thailand_timeseries()
+    else:
+        df = pipeline.load_competitor_panel()
+    paths = rolling_elasticities(df, window=args.window or None, level=args.level)
+    shown = paths[paths['variable'] == args.variable]
+    print(shown.to_string(index=False))
+    if args.output:
+        _write_table(paths, args.output, index=False)
+
+
+def cmd_tvp(args):
+    from . import pipeline
+    from .kalman import fit_tvp
+
+    if args.timeseries:
+        df = pipeline.load_thailand_timeseries()
+    else:
+        df = pipeline.load_competitor_panel()
+    paths, params = fit_tvp(df, varying=args.varying)
+    print(params.to_string(index=False))
+    print(paths[paths['variable'] == args.variable].pivot(
+        index='Year', columns='Country', values='coef').round(4).to_string())
+    if args.output:
+        _write_table(paths, args.output, index=False)
+
+
+def cmd_sur(args):
+    from . import pipeline
+    from .sur import equality_tests, fit_sur
+
+    res = fit_sur(pipeline.load_competitor_panel(), cov_type=args.cov_type,
+                  iterate=args.iterate)
+    print(res['table'].to_string(index=False))
+    print("\nEQUALITY TESTS")
+    print("-" * 80)
+    print(equality_tests(res, args.variable, reference=args.reference).to_string(index=False))
+    if args.output:
+        _write_table(res['table'], args.output, index=False)
+
+
+def cmd_forecast(args):
+    from . import pipeline
+    from .forecast import forecast_arrivals, model_snapshot
+
+    countries = args.countries or getattr(pipeline, SAMPLES[args.sample or 'model1'])
+    snapshot = model_snapshot(pipeline.load_panel(args.data), model=args.model,
+                              countries=countries, start_year=args.start, end_year=args.end)
+    fan = forecast_arrivals(snapshot, n_paths=args.paths, seed=args.seed,
+                            gdp_growth=args.gdp_growth,
+                            rer_change=_shock_arg(args.rer_change),
+                            peace_change=_shock_arg(args.peace_change))
+    print(fan.round(0).to_string(index=False))
+    if args.output:
+        _write_table(fan, args.output, index=False)
+
+
+def cmd_whatif(args):
+    from .whatif import WhatIf
+
+    shocks = {}
+    for item in args.shocks:
+        key, value = item.split('=', 1)
+        if ':' in key:
+            name, country = key.split(':', 1)
+            shocks.setdefault(name, {})[country] = float(value)
+        else:
+            shocks[key] = float(value)
+    engine = WhatIf.load(data_path=args.data, rebuild=args.rebuild)
+    result = engine.query(shocks, models=args.models, countries=args.countries)
+    print(result.round(2).to_string(index=False))
+    if args.elasticities:
+        print("\nELASTICITIES (semi-elasticity for peace_index)")
+        print("-" * 80)
+        print(engine.elasticities().pivot(index='shock', columns='model',
+                                          values='elasticity').round(4).to_string())
+
+
+def cmd_serve(args):
+    from .server import serve
+
+    serve(args.host, args.port, data_path=args.data, cache_entries=args.cache_entries,
+          quiet=args.quiet)
+
+
+def cmd_loadtest(args):
+    from .server import load_test
+
+    stats = load_test(args.url, requests=args.requests, concurrency=args.concurrency,
+                      gzip_ok=not args.no_gzip, etag=args.etag)
+    print(f"Requests: {stats['requests']} in {stats['seconds']:.2f}s "
+          f"({stats['requests_per_second']:.0f} req/s)")
+    print(f"Latency ms: p50 {stats['p50_ms']:.2f}  p90 {stats['p90_ms']:.2f}  "
+          f"p99 {stats['p99_ms']:.2f}  max {stats['max_ms']:.2f}")
+    print(f"Status codes: {stats['status_counts']}")
+
+
+def cmd_recovery(args):
+    import pandas as pd
+
+    from . import pipeline
+    from .recovery import recovery_grid, recovery_metrics
+
+    raw = pipeline.load_panel(args.data)
+    countries = args.countries or getattr(pipeline, SAMPLES[args.sample])
+    if args.grid:
+        out = recovery_grid(raw, args.grid, args.targets, countries=countries,
+                            missing=args.missing)
+        table = out.pivot_table(index=['baseline_year', 'Country'], columns='year',
+                                values='pct', sort=False, dropna=False)
+    else:
+        out = table = recovery_metrics(raw, args.baseline, args.targets, args.start, args.end,
+                                       countries=countries, threshold=args.threshold,
+                                       missing=args.missing)
+    with pd.option_context('display.width', 200):
+        print(table.round(2).to_string(index=bool(args.grid)))
+    if args.output:
+        _write_table(out, args.output, index=False)
+
+
+def cmd_permtest(args):
+    from . import pipeline
+    from .permutation import exact_inference, recovery_cross_section
+
+    raw = pipeline.load_panel(args.data)
+    cross = recovery_cross_section(raw, countries=args.countries or pipeline.RECOVERY_COUNTRIES,
+                                   treated=args.treated)
+    res = exact_inference(cross, alternative=args.alternative, max_exact=args.max_exact,
+                          n_draws=args.draws, seed=args.seed)
+    print(res.round(4).to_string(index=False))
+
+
+def cmd_impute(args):
+    import pandas as pd
+
+    from . import pipeline
+    from .imputation import multiple_imputation
+
+    countries = args.countries or getattr(pipeline, SAMPLES[args.sample or 'placebo'])
+    res = multiple_imputation(pipeline.load_panel(args.data), n_imputations=args.m,
+                              models=args.models, countries=countries, start_year=args.start,
+                              end_year=args.end, n_iter=args.iterations, n_jobs=args.jobs,
+                              seed=args.seed)
+    print(res['nobs'].to_string(index=False))
+    cols = ['model', 'variable', 'coef', 'std_error', 'pvalue', 'fmi', 'coef_cc', 'std_error_cc']
+    with pd.option_context('display.width', 200):
+        print(res['table'][cols].round(4).to_string(index=False))
+    if args.output:
+        _write_table(res['table'], args.output, index=False)
+
+
+def cmd_validate(args):
+    import pandas as pd
+
+    from . import pipeline
+    from .validation import SNAPSHOT_PATH, PanelValidator
+
+    path = args.snapshot or SNAPSHOT_PATH
+    v = PanelValidator() if args.full else PanelValidator.load(path)
+    out = v.validate(pipeline.load_panel(args.data))
+    print(f"Checked {v.last_checked} new or changed rows")
+    if len(out):
+        with pd.option_context('display.width', 200, 'display.max_colwidth', 60):
+            print(out.drop(columns='row_hash').to_string(index=False))
+    errors = v.errors()
+    print(f"{'⚠️ ' if len(errors) else '✓'} {len(errors)} errors, "
+          f"{len(out) - len(errors)} warnings")
+    if not args.no_save:
+        v.save(path)
+    if args.output:
+        _write_table(out.drop(columns='row_hash'), args.output, index=False)
+
+
+def cmd_countries(args):
+    import pandas as pd
+
+    from .countries import registry
+    from .excel import read_excel
+
+    names = list(args.names)
+    if args.file:
+        table = read_excel(args.file) if args.file.endswith('.xlsx') else pd.read_csv(args.file)
+        names += table[args.column].dropna().astype(str).tolist()
+    out = registry().report(names)
+    if args.unmatched:
+        out = out[out['match'] != 'exact']
+    print(out.to_string(index=False))
+    if args.output:
+        _write_table(out, args.output, index=False)
+
+
+def cmd_compile(args):
+    from .compile import multiway_join, read_files, read_sheets
+
+    if len(args.paths) == 1 and args.paths[0].endswith('.xlsx'):
+        frames = read_sheets(args.paths[0], args.sheets, n_jobs=args.jobs)
+    else:
+        frames = read_files(args.paths, n_jobs=args.jobs)
+    wide, provenance = multiway_join(frames, key=args.key, how=args.how)
+    print(provenance.to_string(index=False))
+    print(f"✓ {len(wide)} countries, {len(wide.columns)} columns")
+    if args.output:
+        _write_table(wide, args.output, index=False)
+
+
+def cmd_excel(args):
+    import time
+
+    from .excel import read_many, sheet_names
+
+    requests = [(path, name) for path in args.paths for name in sheet_names(path)]
+    t0 = time.perf_counter()
+    frames = read_many(requests, n_jobs=args.jobs, cache=not args.refresh)
+    elapsed = time.perf_counter() - t0
+    for (path, name), df in zip(requests, frames):
+        print(f"  {os.path.basename(path)} [{name}]: {df.shape[0]} rows x {df.shape[1]} columns")
+    print(f"✓ {len(requests)} sheets in {elapsed:.2f}s")
+
+
+def cmd_gmm(args):
+    from . import pipeline
+    from .gmm import fit_gmm
+
+    exog = [c for c in pipeline.MODEL_SPECS[args.model]['exog'] if c not in args.endog]
+    res = fit_gmm(_prepared_panel(args, 'placebo'), exog=exog, endog=args.endog,
+                  system=args.system, lags=(args.min_lag, None if args.all_lags else args.max_lag),
+                  collapse=args.collapse, two_step=not args.one_step)
+    kind = 'System' if args.system else 'Difference'
+    step = 'one-step, robust' if args.one_step else 'two-step, Windmeijer'
+    print(f"{kind} GMM ({step}), Model {args.model} regressors: {res['n_obs']} observations, "
+          f"{res['n_groups']} destinations, {res['n_instruments']} instruments")
+    print("-" * 80)
+    print(res['table'].to_string(index=False))
+    h = res['hansen']
+    print(f"\nHansen J: chi2({h['df']}) = {h['statistic']:.3f}, p = {h['pvalue']:.4f}")
+    for _, row in res['ar'].iterrows():
+        print(f"AR({int(row['order'])}) in differences: z = {row['z']:.3f}, p = {row['pvalue']:.4f}")
+    if res['n_instruments'] > res['n_groups']:
+        print("⚠️  More instruments than destinations; drop --no-collapse / --all-lags "
+              "or lower --max-lag")
+    if args.output:
+        _write_table(res['table'], args.output, index=False)
+
+
+def cmd_unitroot(args):
+    import pandas as pd
+
+    from .unitroot import panel_stationarity
+
+    res = panel_stationarity(_prepared_panel(args, 'placebo'), variables=args.variables,
+                             y=args.y, x=args.x, trend=args.trend, max_lags=args.max_lags,
+                             criterion=args.criterion, n_sims=args.sims, seed=args.seed)
+    with pd.option_context('display.width', 200):
+        if args.per_country:
+            print(res['adf'].round(4).to_string(index=False))
+            print()
+        print(res['unit_root'].round(4).to_string(index=False))
+        print()
+        print(res['cointegration'].round(4).to_string(index=False))
+    if args.output:
+        _write_table(pd.concat([res['unit_root'], res['cointegration']], ignore_index=True),
+                     args.output, index=False)
+
+
+def cmd_covariance(args):
+    import pandas as pd
+
+    from . import pipeline
+    from .covariance import PanelCovariance
+
+    df = _prepared_panel(args)
+    tables = []
+    for model in args.models:
+        pc = PanelCovariance.from_result(pipeline.fit_model(df, model))
+        se = pc.compare(args.types, bandwidth=args.bandwidth)
+        print("\n" + "-" * 80)
+        print(f"MODEL {model}: standard errors by covariance type")
+        print("-" * 80)
+        with pd.option_context('display.width', 200):
+            print(pd.concat([pd.Series(pc.params, index=pc.columns, name='coef'), se],
+                            axis=1).round(4).to_string())
+        tables.append(se.rename_axis('variable').reset_index().assign(model=model))
+    if args.output:
+        _write_table(pd.concat(tables, ignore_index=True), args.output, index=False)
+
+
+def cmd_ife(args):
+    import pandas as pd
+
+    from .interactive import fit_ife
+
+    df = _prepared_panel(args, 'placebo')
+    tables, previous = [], None
+    for model in args.models:
+        res = fit_ife(df, model, n_factors=args.factors, max_factors=args.max_factors,
+                      criterion=args.criterion, cov_type=args.cov_type, init=previous)
+        previous = res
+        print("\n" + "-" * 80)
+        print(f"MODEL {model}: interactive fixed effects, r = {res['n_factors']} "
+              f"({res['iterations']} iterations{'' if res['converged'] else ', NOT converged'})")
+        print("-" * 80)
+        with pd.option_context('display.width', 200):
+            if args.factors is None:
+                print(res['criteria'].round(4).to_string())
+                print()
+            print(res['table'].round(4).to_string(index=False))
+            if res['n_factors']:
+                print("\nLoadings:")
+                print(res['loadings'].round(3).to_string())
+        tables.append(res['table'].assign(model=model, n_factors=res['n_factors']))
+    if args.output:
+        _write_table(pd.concat(tables, ignore_index=True), args.output, index=False)
+
+
+def cmd_hierarchical(args):
+    import pandas as pd
+
+    from .hierarchical import hierarchical_post_effects
+
+    res = hierarchical_post_effects(_prepared_panel(args, 'placebo'), n_draws=args.draws,
+                                    burn=args.burn, thin=args.thin, n_chains=args.chains,
+                                    n_jobs=args.jobs, prior_scale=args.prior_scale, k=args.k,
+                                    focus=args.focus, seed=args.seed)
+    print("\n" + "-" * 80)
+    print(f"HIERARCHICAL POST-COVID EFFECTS ({res['n_draws']} draws)")
+    print("-" * 80)
+    with pd.option_context('display.width', 200):
+        print(res['effects'].round(4).to_string(index=False))
+        print()
+        print(res['hyper'].round(4).to_string(index=False))
+    out = res['outlier']
+    if out is not None:
+        print(f"\n{args.focus}: P(|theta - mu| > {args.k:g} tau) = {out['p_outlier']:.3f}, "
+              f"P(lowest) = {out['p_lowest']:.3f}, P(highest) = {out['p_highest']:.3f}, "
+              f"P(theta < mu) = {out['p_below_mean']:.3f}")
+    if args.output:
+        _write_table(res['effects'], args.output, index=False)
+
+
+def cmd_hetero(args):
+    import pandas as pd
+
+    from .heterogeneous import fit_heterogeneous
+
+    res = fit_heterogeneous(_prepared_panel(args, 'placebo'), time_effects=args.time_effects,
+                            focus=args.focus, base=args.base, cov_type=args.cov_type,
+                            bootstrap=args.bootstrap, weights=args.weights, seed=args.seed)
+    print("\n" + "-" * 80)
+    print("COUNTRY x POST EFFECTS (one regression"
+          + (f", relative to {res['base']})" if res['base'] else ")"))
+    print("-" * 80)
+    if res['dropped']:
+        print(f"⚠️  Dropped (no variation after the fixed effects): {', '.join(res['dropped'])}")
+    with pd.option_context('display.width', 200):
+        print(res['effects'].round(4).to_string(index=False))
+        print()
+        print(res['tests'].round(4).to_string(index=False))
+    if args.output:
+        _write_table(res['tests'], args.output, index=False)
+
+
+# ==========================================
+# ARGUMENT PARSING
+# ==========================================
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='tourism', description='Thailand tourism econometrics pipeline')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data', default=DEFAULT_DATA, help='Panel CSV (default: %(default)s)')
+    common.add_argument('--trace', action='store_true',
+                        help='Write a stage timing trace to ./traces')
+
+    sample = argparse.ArgumentParser(add_help=False)
+    sample.add_argument('--sample', choices=sorted(SAMPLES),
+                        help='Predefined country sample')
+    sample.add_argument('--countries', nargs='+', help='Explicit country list')
+    sample.add_argument('--start', type=int, default=2008, help='First year (default: 2008)')
+    sample.add_argument('--end', type=int, default=2024, help='Last year (default: 2024)')
+
+    model_names = list('ABCDEFG')
+
+    p = sub.add_parser('summary', parents=[common], help='Quick data check (no pandas)')
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser('prepare', parents=[common, sample], help='Filter and engineer features')
+    p.add_argument('-o', '--output', help='Write the prepared panel (.csv or .json)')
+    p.set_defaults(func=cmd_prepare)
+
+    p = sub.add_parser('fit', parents=[common, sample], help='Fit PanelOLS Models A-G')
+    p.add_argument('--models', nargs='+', choices=model_names, default=model_names)
+    p.add_argument('--cov-type', default='clustered',
+                   help='clustered (by entity), robust, unadjusted, ...')
+    p.set_defaults(func=cmd_fit)
+
+    p = sub.add_parser('placebo', parents=[common, sample], help='Spatial placebo loop')
+    p.add_argument('-o', '--output', help='Write the placebo table (.csv or .json)')
+    p.set_defaults(func=cmd_placebo)
+
+    p = sub.add_parser('diagnose', parents=[common, sample], help='Diagnostic tests')
+    p.add_argument('--tests', nargs='+', choices=['het', 'vif', 'recovery'],
+                   default=['het', 'vif', 'recovery'])
+    p.set_defaults(func=cmd_diagnose)
+
+    p = sub.add_parser('plot', parents=[common, sample], help='Generate figures')
+    p.add_argument('--figures', nargs='+', choices=['arrivals', 'asymmetry', 'correlation'],
+                   default=['arrivals', 'asymmetry', 'correlation'])
+    p.add_argument('--output-dir', default='.', help='Directory for PNG files')
+    p.add_argument('--dpi', type=int, default=300)
+    p.set_defaults(func=cmd_plot)
+
+    p = sub.add_parser('export', parents=[common, sample], help='Export model coefficients')
+    p.add_argument('--models', nargs='+', choices=model_names, default=model_names)
+    p.add_argument('-o', '--output', default='regression_coefficients.csv',
+                   help='Output file (.csv or .json)')
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('rolling', parents=[common],
+                       help='Rolling/expanding elasticities by recursive least squares')
+    p.add_argument('--window', type=int, default=10,
+                   help='Years per window; 0 for expanding windows (default: 10)')
+    p.add_argument('--timeseries', action='store_true',
+                   help='Use thailand_timeseries.csv instead of competitor_panel.csv')
+    p.add_argument('--variable', default='ln_rer', help='Coefficient to print (default: ln_rer)')
+    p.add_argument('--level', type=float, default=0.95, help='Confidence level')
+    p.add_argument('-o', '--output', help='Write all paths (.csv or .json)')
+    p.set_defaults(func=cmd_rolling)
+
+    p = sub.add_parser('tvp', parents=[common],
+                       help='Time-varying ADL(1,0) by Kalman filtering and smoothing')
+    p.add_argument('--timeseries', action='store_true',
+                   help='Use thailand_timeseries.csv instead of competitor_panel.csv')
+    p.add_argument('--varying', nargs='+', default=['ln_arrivals_lag1', 'ln_rer'],
+                   help='Coefficients that follow random walks')
+    p.add_argument('--variable', default='lr_ln_rer',
+                   help='Smoothed path to print (default: lr_ln_rer)')
+    p.add_argument('-o', '--output', help='Write all smoothed paths (.csv or .json)')
+    p.set_defaults(func=cmd_tvp)
+
+    p = sub.add_parser('sur', parents=[common],
+                       help='SUR system over competitor_panel.csv with equality tests')
+    p.add_argument('--cov-type', choices=['unadjusted', 'HAC'], default='HAC')
+    p.add_argument('--iterate', action='store_true', help='Iterate FGLS to convergence')
+    p.add_argument('--variable', default='ln_rer', help='Coefficient to test (default: ln_rer)')
+    p.add_argument('--reference', default='Thailand', help='Destination compared with the rest')
+    p.add_argument('-o', '--output', help='Write the coefficient table (.csv or .json)')
+    p.set_defaults(func=cmd_sur)
+
+    p = sub.add_parser('forecast', parents=[common, sample],
+                       help='Monte Carlo 2025-2030 arrival forecasts for a scenario')
+    p.add_argument('--model', choices=['A', 'C', 'D', 'F', 'G'], default='F')
+    p.add_argument('--paths', type=int, default=1_000_000, help='Simulated paths')
+    p.add_argument('--gdp-growth', type=float, default=0.045,
+                   help='Annual growth of gdp_china (default: 0.045)')
+    p.add_argument('--rer-change', nargs='+',
+                   help='Proportional RER shift: a number or Country=value pairs')
+    p.add_argument('--peace-change', nargs='+',
+                   help='peace_index shift: a number or Country=value pairs')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('-o', '--output', help='Write the fan-chart table (.csv or .json)')
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser('whatif', parents=[common],
+                       help='Instant what-if queries over cached model coefficients')
+    p.add_argument('shocks', nargs='*',
+                   help='NAME=VALUE or NAME:COUNTRY=VALUE, e.g. exchange_rate=-0.1 '
+                        'peace_index:Thailand=0.2')
+    p.add_argument('--models', nargs='+', help='Subset of cached models')
+    p.add_argument('--countries', nargs='+', help='Subset of destinations')
+    p.add_argument('--elasticities', action='store_true', help='Also print elasticities')
+    p.add_argument('--rebuild', action='store_true', help='Refit and rewrite the cache')
+    p.set_defaults(func=cmd_whatif)
+
+    p = sub.add_parser('serve', parents=[common], help='Local JSON results service')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8000)
+    p.add_argument('--cache-entries', type=int, default=256, help='LRU cache size')
+    p.add_argument('--quiet', action='store_true', help='Do not log each request')
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('loadtest', parents=[common], help='Load-test a results endpoint')
+    p.add_argument('url')
+    p.add_argument('--requests', type=int, default=1000)
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--no-gzip', action='store_true', help='Do not send Accept-Encoding: gzip')
+    p.add_argument('--etag', action='store_true', help='Revalidate with If-None-Match (304 path)')
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser('recovery', parents=[common],
+                       help='Recovery ratios, pp gains and time-to-recovery')
+    p.add_argument('--sample', choices=sorted(SAMPLES), default='recovery',
+                   help='Predefined country sample')
+    p.add_argument('--baseline', type=int, default=2019, help='Baseline (100%%) year')
+    p.add_argument('--targets', type=int, nargs='+', default=[2022, 2023, 2024],
+                   help='Years reported as %% of the baseline')
+    p.add_argument('--start', type=int, default=2022, help='Start of the pp-gain window')
+    p.add_argument('--end', type=int, default=2024, help='End of the pp-gain window')
+    p.add_argument('--threshold', type=float, default=100.0,
+                   help='%% of the baseline that counts as recovered')
+    p.add_argument('--missing', choices=['keep', 'drop', 'interpolate'], default='keep')
+    p.add_argument('--grid', type=int, nargs='+', metavar='BASELINE',
+                   help='Instead: each target year as %% of each of these baseline years')
+    p.add_argument('--countries', nargs='+', help='Override the sample country list')
+    p.add_argument('-o', '--output', help='Write the table to CSV')
+    p.set_defaults(func=cmd_recovery)
+
+    p = sub.add_parser('permtest', parents=[common],
+                       help='Exact permutation p-values for the recovery regressions')
+    p.add_argument('--countries', nargs='+', help='Cross-section countries')
+    p.add_argument('--treated', nargs='+', default=['Thailand'], help='Treated countries')
+    p.add_argument('--alternative', choices=['two-sided', 'less', 'greater'],
+                   default='two-sided')
+    p.add_argument('--max-exact', type=int, default=1_000_000,
+                   help='Enumerate up to this many assignments/permutations')
+    p.add_argument('--draws', type=int, default=99_999, help='Monte Carlo draws beyond that')
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=cmd_permtest)
+
+    p = sub.add_parser('impute', parents=[common, sample],
+                       help="Multiple imputation of the panel, pooled with Rubin's rules")
+    p.add_argument('--m', type=int, default=20, help='Number of imputations')
+    p.add_argument('--models', nargs='+', choices=['A', 'B', 'C', 'D', 'E', 'F'],
+                   default=['A', 'B', 'C', 'D', 'E', 'F'])
+    p.add_argument('--iterations', type=int, default=10, help='Gibbs sweeps per chain')
+    p.add_argument('--jobs', type=int, help='Worker processes (default: one per CPU)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('-o', '--output', help='Write the pooled table (.csv or .json)')
+    p.set_defaults(func=cmd_impute)
+
+    p = sub.add_parser('validate', parents=[common],
+                       help='Schema, range and identity checks on the panel (incremental)')
+    p.add_argument('--full', action='store_true', help='Ignore the saved snapshot')
+    p.add_argument('--snapshot', help='Snapshot file (default: .tourism_cache/panel_validation.npz)')
+    p.add_argument('--no-save', action='store_true', help='Do not update the snapshot')
+    p.add_argument('-o', '--output', help='Write the violations (.csv or .json)')
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser('countries', parents=[common],
+                       help='Resolve country names to ISO3 codes and canonical names')
+    p.add_argument('names', nargs='*', help='Country names to resolve')
+    p.add_argument('--file', help='CSV or .xlsx file with a country column')
+    p.add_argument('--column', default='Country', help='Country column in --file')
+    p.add_argument('--unmatched', action='store_true',
+                   help='Only show names that needed a token, fuzzy or no match')
+    p.add_argument('-o', '--output', help='Write the table (.csv or .json)')
+    p.set_defaults(func=cmd_countries)
+
+    p = sub.add_parser('compile', parents=[common],
+                       help='Join workbook sheets or files on the canonical country in one pass')
+    p.add_argument('paths', nargs='+', help='One .xlsx workbook (all sheets) or several files')
+    p.add_argument('--sheets', nargs='+', help='Sheets to read (default: all)')
+    p.add_argument('--key', default='Country', help='Country column in every source')
+    p.add_argument('--how', choices=['outer', 'inner', 'left'], default='outer')
+    p.add_argument('--jobs', type=int, help='Worker processes (default: one per CPU)')
+    p.add_argument('-o', '--output', help='Write the wide table (.xlsx, .csv or .json)')
+    p.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser('excel', parents=[common],
+                       help='Parse workbooks into the columnar sheet cache')
+    p.add_argument('paths', nargs='+', help='.xlsx workbooks')
+    p.add_argument('--jobs', type=int, help='Worker processes (default: one per CPU)')
+    p.add_argument('--refresh', action='store_true', help='Re-parse even if cached')
+    p.set_defaults(func=cmd_excel)
+
+    p = sub.add_parser('gmm', parents=[common, sample],
+                       help='Difference / system GMM with a lagged dependent variable')
+    p.add_argument('--model', choices=['A', 'C', 'D', 'F', 'G'], default='D',
+                   help='Model whose regressors are used (default: D)')
+    p.add_argument('--endog', nargs='+', default=[],
+                   help='Regressors instrumented GMM-style like the lagged dependent variable')
+    p.add_argument('--system', action='store_true', help='System GMM (Blundell-Bond)')
+    p.add_argument('--collapse', action=argparse.BooleanOptionalAction, default=True,
+                   help='One instrument per lag (default; --no-collapse for one per lag and year)')
+    p.add_argument('--min-lag', type=int, default=2, help='First instrument lag (default: 2)')
+    p.add_argument('--max-lag', type=int, default=3, help='Last instrument lag (default: 3)')
+    p.add_argument('--all-lags', action='store_true',
+                   help='Use every available lag as an instrument (overrides --max-lag)')
+    p.add_argument('--one-step', action='store_true', help='Report the one-step estimate')
+    p.add_argument('-o', '--output', help='Write the coefficient table (.csv or .json)')
+    p.set_defaults(func=cmd_gmm)
+
+    p = sub.add_parser('unitroot', parents=[common, sample],
+                       help='Panel unit-root and cointegration tests')
+    p.add_argument('--variables', nargs='+',
+                   default=['ln_arrivals', 'ln_gdp_china', 'ln_cpi', 'ln_rer'])
+    p.add_argument('--y', default='ln_arrivals', help='Cointegration dependent variable')
+    p.add_argument('--x', nargs='+', default=['ln_gdp_china', 'ln_cpi', 'ln_rer'],
+                   help='Cointegration regressors')
+    p.add_argument('--trend', choices=['n', 'c', 'ct'], default='c')
+    p.add_argument('--max-lags', type=int, help='Largest ADF lag (default: 4 (T/100)^(1/4))')
+    p.add_argument('--criterion', choices=['aic', 'bic'], default='aic')
+    p.add_argument('--sims', type=int, default=1000, help='Null simulations for the moments')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--per-country', action='store_true', help='Also print each ADF regression')
+    p.add_argument('-o', '--output', help='Write the panel test table (.csv or .json)')
+    p.set_defaults(func=cmd_unitroot)
+
+    p = sub.add_parser('covariance', parents=[common, sample],
+                       help='Compare covariance estimators on fitted Models A-G')
+    p.add_argument('--models', nargs='+', choices=model_names, default=['A', 'C', 'D', 'F'])
+    p.add_argument('--types', nargs='+', choices=['unadjusted', 'robust', 'clustered', 'time',
+                                                  'two-way', 'driscoll-kraay', 'pcse'],
+                   default=['clustered', 'two-way', 'driscoll-kraay', 'pcse'])
+    p.add_argument('--bandwidth', type=int, help='Driscoll-Kraay lag (default: 4 (T/100)^(2/9))')
+    p.add_argument('-o', '--output', help='Write the standard-error table (.csv or .json)')
+    p.set_defaults(func=cmd_covariance)
+
+    p = sub.add_parser('ife', parents=[common, sample],
+                       help='Interactive fixed effects (Bai 2009) for Models A-F')
+    p.add_argument('--models', nargs='+', choices=model_names[:6], default=['A', 'C', 'D', 'F'])
+    p.add_argument('--factors', type=int, help='Fixed number of factors (default: by --criterion)')
+    p.add_argument('--max-factors', type=int, default=3)
+    p.add_argument('--criterion', choices=['icp1', 'icp2', 'icp3'], default='icp2')
+    p.add_argument('--cov-type', choices=['unadjusted', 'robust', 'clustered'], default='clustered')
+    p.add_argument('-o', '--output', help='Write the coefficient table (.csv or .json)')
+    p.set_defaults(func=cmd_ife)
+
+    p = sub.add_parser('hierarchical', parents=[common, sample],
+                       help='Partially pooled country x post-COVID effects (Gibbs sampler)')
+    p.add_argument('--draws', type=int, default=10000, help='Kept draws per chain')
+    p.add_argument('--burn', type=int, default=1000)
+    p.add_argument('--thin', type=int, default=1)
+    p.add_argument('--chains', type=int, default=4)
+    p.add_argument('--jobs', type=int, help='Worker processes (default: one per chain)')
+    p.add_argument('--prior-scale', type=float, default=1.0, help='Half-Cauchy scale of tau')
+    p.add_argument('--k', type=float, default=2.0, help='Outlier threshold in units of tau')
+    p.add_argument('--focus', default='Thailand')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('-o', '--output', help='Write the per-country table (.csv or .json)')
+    p.set_defaults(func=cmd_hierarchical)
+
+    p = sub.add_parser('hetero', parents=[common, sample],
+                       help='All country x post-COVID effects in one fit, with Wald tests')
+    p.add_argument('--time-effects', action='store_true', help='Add year fixed effects')
+    p.add_argument('--focus', default='Thailand')
+    p.add_argument('--base', help='Reference destination with --time-effects')
+    p.add_argument('--cov-type', choices=['unadjusted', 'robust', 'time', 'driscoll-kraay', 'pcse'],
+                   default='driscoll-kraay')
+    p.add_argument('--bootstrap', type=int, default=999,
+                   help='Wild bootstrap draws per test, by year (default: 999; 0 = none)')
+    p.add_argument('--weights', choices=['webb', 'rademacher'], default='webb')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('-o', '--output', help='Write the test table (.csv or .json)')
+    p.set_defaults(func=cmd_hetero)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        start_run(f'tourism_{args.command}')
+    try:
+        args.func(args)
+    finally:
+        if args.trace:
+            end_run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
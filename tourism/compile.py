@@ -0,0 +1,126 @@
+"""
+Single-pass multi-way joins for country-level compilations.
+
+combining_by_country/combine_by_country.py and web_scraping/cleaning.py
+read one sheet or file at a time and grow a master frame with
+`master.merge(df, on='Country', how='outer')`. Every merge rebuilds the
+growing frame, so K sources cost O(K^2) column copies, and each step
+joins on raw strings. Here:
+
+1. all sources are read first through tourism.excel, which serves
+   workbooks from its columnar cache and parses the rest in parallel
+   worker processes (openpyxl parsing is pure Python, so threads would
+   not help),
+2. each source's country column is resolved once to integer codes through
+   the shared registry (tourism.countries) and becomes its index,
+3. the wide table is assembled by one pd.concat(axis=1) over those
+   indexes (outer = union of countries, inner = intersection, left = the
+   first source's countries), then the canonical names are written back.
+
+Column provenance is kept. Every output column is listed with its source,
+its original name and its non-missing count. Names that clash across
+sources get the source label as a suffix instead of merge's _x / _y.
+Spellings that resolve to the same country within one source keep the
+first row, and the drop is counted in the provenance table.
+
+Usage:
+    from tourism.compile import compile_workbook, read_files, multiway_join
+    wide, provenance = compile_workbook('combining_by_country/....xlsx')
+    wide, provenance = multiway_join(read_files(paths, usecols=['Country', 'Rank_Number']))
+"""
+
+import os
+
+import pandas as pd
+
+from .countries import registry
+from .excel import read_many, read_workbook, select_columns, sheet_names
+from .instrument import timed
+
+
+def read_sheets(path, sheets=None, n_jobs=None, usecols=None):
+    """Every sheet (or `sheets`) of a workbook as {sheet name: DataFrame} (tourism.excel)."""
+    frames = read_workbook(path, sheets, n_jobs)
+    return {name: select_columns(df, usecols) for name, df in frames.items()}
+
+
+@timed('read files', 'io')
+def read_files(paths, n_jobs=None, usecols=None, labels=None):
+    """
+    CSV / Excel files (first sheet) as {label: DataFrame}, label defaulting
+    to the file stem. .xlsx workbooks go through the cached, parallel
+    tourism.excel. Legacy .xls workbooks, which openpyxl cannot open, are
+    read by pd.read_excel (needs xlrd).
+    """
+    paths = list(paths)
+    labels = labels or [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    books = [p for p in paths if p.endswith('.xlsx')]
+    frames = dict(zip(books, read_many([(p, sheet_names(p)[0]) for p in books], n_jobs)))
+
+    def read(p):
+        if p in frames:
+            return select_columns(frames[p], usecols)
+        if p.endswith('.xls'):
+            return pd.read_excel(p, sheet_name=0, usecols=usecols)
+        return pd.read_csv(p, usecols=usecols)
+
+    return {label: read(p) for label, p in zip(labels, paths)}
+
+
+@timed('multi-way join', 'io')
+def multiway_join(frames, key='Country', how='outer', sort=True, keep_key=False):
+    """
+    Join {label: DataFrame} sources on the canonical country in one concat.
+
+    Parameters
+    ----------
+    frames : dict (or list of (label, frame) pairs), each frame with a `key` column
+    how : 'outer' (all countries), 'inner' (countries in every source) or
+        'left' (countries of the first source)
+    sort : sort the rows by canonical country name
+    keep_key : keep the integer country code as a 'country_id' column
+
+    Returns (wide, provenance): the wide frame with `key` first, and one row
+    per output column with column, source, source_column, rows (rows read
+    from the source), non_null and dropped_duplicates (rows whose country was
+    already in that source).
+    """
+    reg = registry()
+    items = list(frames.items()) if isinstance(frames, dict) else list(frames)
+    counts = {}
+    for _, df in items:
+        for c in df.columns:
+            if c != key:
+                counts[c] = counts.get(c, 0) + 1
+
+    parts, records = [], []
+    for label, df in items:
+        df = df[df[key].notna() & (df[key].astype(str).str.strip() != '')]
+        codes = reg.codes(df[key])
+        part = df.drop(columns=key).set_axis(codes, axis=0)
+        dup = part.index.duplicated(keep='first')
+        part = part[~dup]
+        names = {c: c if counts[c] == 1 else f'{c}_{label}' for c in part.columns}
+        part = part.rename(columns=names)
+        parts.append(part)
+        for original, column in names.items():
+            records.append({'column': column, 'source': label, 'source_column': original,
+                            'rows': len(df), 'non_null': int(part[column].notna().sum()),
+                            'dropped_duplicates': int(dup.sum())})
+
+    if how not in ('outer', 'inner', 'left'):
+        raise ValueError(f"Unknown join: {how}")
+    wide = pd.concat(parts, axis=1, join='inner' if how == 'inner' else 'outer')
+    if how == 'left':
+        wide = wide.reindex(parts[0].index)
+    wide.insert(0, key, reg.names(wide.index.values))
+    if keep_key:
+        wide.insert(1, 'country_id', wide.index.values)
+    if sort:
+        wide = wide.sort_values(key, kind='stable')
+    return wide.reset_index(drop=True), pd.DataFrame(records)
+
+
+def compile_workbook(path, sheets=None, n_jobs=None, how='outer', key='Country'):
+    """read_sheets + multiway_join: one wide row per country across a workbook's sheets."""
+    return multiway_join(read_sheets(path, sheets, n_jobs), key=key, how=how)
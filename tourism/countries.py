@@ -0,0 +1,431 @@
+"""
+Canonical country registry keyed by ISO3.
+
+Every source spells countries differently. The panel uses ISO 3166 short
+names ("Korea, Republic of", "Viet Nam"), WDI uses "Korea, Rep.", the HDI
+sheets use "Korea (Republic of)" and US News uses "Vietnam".
+combining_by_country/combine_by_country.py fixed this with a dict applied
+row by row, and every other merge joined on raw strings. Here one table
+maps each ISO3 code to a canonical name (the panel's spelling) and its
+aliases. Names are resolved per column:
+
+1. the column is factorized, so each distinct spelling is resolved once,
+2. each spelling is normalized (case, accents, punctuation, '&', 'the',
+   'St.') and looked up among the aliases, then as a sorted-token key
+   ("Republic of Korea"),
+3. what is still unknown goes through a fuzzy match (difflib) limited to
+   aliases that share the first letter, with a high cutoff, so typos
+   resolve but "High human development" does not,
+4. results are cached per spelling, so later columns only pay for new
+   spellings.
+
+Codes are integer positions in the table. Unknown spellings get stable
+codes after the table, so joins on codes stay exact for them too.
+merge_on_country joins two frames on these integer codes instead of on
+strings and writes back the canonical names.
+
+Usage:
+    from tourism.countries import registry, standardize_countries, merge_on_country
+    standardize_countries(['Vietnam', 'Korea, Rep.', 'USA'])
+    registry().iso3(df['Country'])
+    merge_on_country(panel, peace_long, on=['Year'], how='left')
+"""
+
+import difflib
+import functools
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from .instrument import timed
+
+KEY = 'country_id'
+
+# ISO3 | canonical name | aliases (WDI, UN/HDI, US News and common spellings).
+# Normalization already equates case, accents, punctuation and word order,
+# so only genuinely different spellings need an alias.
+COUNTRY_TABLE = """
+AFG|Afghanistan
+ALB|Albania
+DZA|Algeria
+AND|Andorra
+AGO|Angola
+ATG|Antigua and Barbuda
+ARG|Argentina
+ARM|Armenia
+ABW|Aruba
+AUS|Australia
+AUT|Austria
+AZE|Azerbaijan
+BHS|Bahamas|Bahamas, The
+BHR|Bahrain
+BGD|Bangladesh
+BRB|Barbados
+BLR|Belarus
+BEL|Belgium
+BLZ|Belize
+BEN|Benin
+BMU|Bermuda
+BTN|Bhutan
+BOL|Bolivia, Plurinational State of|Bolivia
+BIH|Bosnia and Herzegovina|Bosnia
+BWA|Botswana
+BRA|Brazil
+BRN|Brunei Darussalam|Brunei
+BGR|Bulgaria
+BFA|Burkina Faso
+BDI|Burundi
+CPV|Cabo Verde|Cape Verde
+KHM|Cambodia
+CMR|Cameroon
+CAN|Canada
+CYM|Cayman Islands
+CAF|Central African Republic
+TCD|Chad
+CHL|Chile
+CHN|China|People's Republic of China|Mainland China
+COL|Colombia
+COM|Comoros
+COG|Congo|Congo, Rep.|Republic of the Congo|Congo-Brazzaville
+COD|Congo, The Democratic Republic of the|Congo, Dem. Rep.|Democratic Republic of the Congo|Democratic Republic of the Congo (DRC)|DRC|DR Congo|Congo-Kinshasa
+CRI|Costa Rica
+CIV|Côte d'Ivoire|Ivory Coast
+HRV|Croatia
+CUB|Cuba
+CUW|Curaçao
+CYP|Cyprus
+CZE|Czechia|Czech Republic
+DNK|Denmark
+DJI|Djibouti
+DMA|Dominica
+DOM|Dominican Republic
+ECU|Ecuador
+EGY|Egypt|Egypt, Arab Rep.
+SLV|El Salvador
+GNQ|Equatorial Guinea
+ERI|Eritrea
+EST|Estonia
+SWZ|Eswatini|Eswatini (Kingdom of)|Swaziland
+ETH|Ethiopia
+FRO|Faroe Islands
+FJI|Fiji
+FIN|Finland
+FRA|France
+PYF|French Polynesia
+ATF|French Southern Territories
+GAB|Gabon
+GMB|Gambia|Gambia, The
+GEO|Georgia
+DEU|Germany
+GHA|Ghana
+GRC|Greece
+GRL|Greenland
+GRD|Grenada
+GUM|Guam
+GTM|Guatemala
+GIN|Guinea
+GNB|Guinea-Bissau
+GUY|Guyana
+HTI|Haiti
+VAT|Holy See|Vatican|Vatican City
+HND|Honduras
+HKG|Hong Kong|Hong Kong, China (SAR)|Hong Kong SAR, China|Hong Kong SAR
+HUN|Hungary
+ISL|Iceland
+IND|India
+IDN|Indonesia
+IRN|Iran, Islamic Republic of|Iran|Iran, Islamic Rep.
+IRQ|Iraq
+IRL|Ireland
+ISR|Israel
+ITA|Italy
+JAM|Jamaica
+JPN|Japan
+JOR|Jordan
+KAZ|Kazakhstan
+KEN|Kenya
+KIR|Kiribati
+PRK|Korea, Democratic People's Republic of|Korea (Democratic People's Rep. of)|Korea, Dem. People's Rep.|North Korea|DPRK
+KOR|Korea, Republic of|Korea, Rep.|South Korea|Republic of Korea
+XKX|Kosovo
+KWT|Kuwait
+KGZ|Kyrgyzstan|Kyrgyz Republic
+LAO|Lao People's Democratic Republic|Laos|Lao PDR
+LVA|Latvia
+LBN|Lebanon
+LSO|Lesotho
+LBR|Liberia
+LBY|Libya
+LIE|Liechtenstein
+LTU|Lithuania
+LUX|Luxembourg
+MAC|Macao|Macau|Macao SAR, China|Macao, China (SAR)
+MDG|Madagascar
+MWI|Malawi
+MYS|Malaysia
+MDV|Maldives
+MLI|Mali
+MLT|Malta
+MHL|Marshall Islands
+MTQ|Martinique
+MRT|Mauritania
+MUS|Mauritius
+MEX|Mexico
+FSM|Micronesia, Federated States of|Micronesia|Micronesia, Fed. Sts.
+MDA|Moldova, Republic of|Moldova
+MCO|Monaco
+MNG|Mongolia
+MNE|Montenegro
+MAR|Morocco
+MOZ|Mozambique
+MMR|Myanmar|Burma
+NAM|Namibia
+NRU|Nauru
+NPL|Nepal
+NLD|Netherlands|Holland
+ANT|Netherlands Antilles
+NCL|New Caledonia
+NZL|New Zealand
+NIC|Nicaragua
+NER|Niger
+NGA|Nigeria
+MKD|North Macedonia|Macedonia|Former Yugoslav Republic of Macedonia
+NOR|Norway
+OMN|Oman
+PAK|Pakistan
+PLW|Palau
+PSE|Palestine, State of|Palestine|Palestinian territories|West Bank and Gaza
+PAN|Panama
+PNG|Papua New Guinea
+PRY|Paraguay
+PER|Peru
+PHL|Philippines
+POL|Poland
+PRT|Portugal
+PRI|Puerto Rico
+QAT|Qatar
+ROU|Romania
+RUS|Russian Federation|Russia
+RWA|Rwanda
+KNA|Saint Kitts and Nevis
+LCA|Saint Lucia
+VCT|Saint Vincent and the Grenadines
+WSM|Samoa
+SMR|San Marino
+STP|Sao Tome and Principe
+SAU|Saudi Arabia
+SEN|Senegal
+SRB|Serbia
+SYC|Seychelles
+SLE|Sierra Leone
+SGP|Singapore
+SVK|Slovakia|Slovak Republic
+SVN|Slovenia
+SLB|Solomon Islands
+SOM|Somalia
+ZAF|South Africa
+SSD|South Sudan
+ESP|Spain
+LKA|Sri Lanka
+SDN|Sudan
+SUR|Suriname
+SWE|Sweden
+CHE|Switzerland
+SYR|Syrian Arab Republic|Syria
+TWN|Taiwan|Taiwan, China|Chinese Taipei|Taiwan, Province of China
+TJK|Tajikistan
+TZA|Tanzania, United Republic of|Tanzania
+THA|Thailand
+TLS|Timor-Leste|East Timor
+TGO|Togo
+TON|Tonga
+TTO|Trinidad and Tobago
+TUN|Tunisia
+TUR|Türkiye|Turkey|Turkiye
+TKM|Turkmenistan
+TUV|Tuvalu
+UGA|Uganda
+UKR|Ukraine
+ARE|United Arab Emirates|UAE
+GBR|United Kingdom|UK|United Kingdom (UK)|Great Britain|Britain
+USA|United States of America|United States|USA|US|U.S.
+URY|Uruguay
+UZB|Uzbekistan
+VUT|Vanuatu
+VEN|Venezuela, Bolivarian Republic of|Venezuela|Venezuela, RB
+VNM|Viet Nam|Vietnam
+YEM|Yemen|Yemen, Rep.
+ZMB|Zambia
+ZWE|Zimbabwe
+"""
+
+_DROP_WORDS = {'the'}
+_EXPAND = {'st': 'saint', 'rep': 'republic', 'dem': 'democratic', 'fed': 'federated',
+           'sts': 'states'}
+
+
+def normalize_name(name):
+    """Lower-case ASCII words without punctuation, 'the' or abbreviations."""
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    text = text.lower().replace('&', ' and ').replace("'", '')
+    words = re.findall(r'[a-z0-9]+', text)
+    return ' '.join(_EXPAND.get(w, w) for w in words if w not in _DROP_WORDS)
+
+
+def _token_key(key):
+    return ' '.join(sorted(key.split()))
+
+
+class CountryRegistry:
+    """ISO3 codes, canonical names and alias lookups with a per-spelling cache."""
+
+    def __init__(self, table=COUNTRY_TABLE, aliases=None, cutoff=0.85):
+        rows = [line.split('|') for line in table.strip().splitlines()]
+        self.iso3_codes = np.array([r[0] for r in rows], dtype=object)
+        self.canonical = np.array([r[1] for r in rows], dtype=object)
+        self.n_known = len(rows)
+        self.cutoff = cutoff
+        self._exact = {}
+        self._tokens = {}
+        for code, row in enumerate(rows):
+            for name in row[1:] + [row[0]]:
+                self._add_alias(name, code)
+        for name, iso3 in (aliases or {}).items():
+            self._add_alias(name, self.code_of_iso3(iso3))
+        # Fuzzy blocks: aliases grouped by their first letter
+        self._blocks = {}
+        for key in self._exact:
+            self._blocks.setdefault(key[:1], []).append(key)
+        self._cache = {}
+        self._match = {}
+        self._unknown = {}
+        self._unknown_names = []
+
+    def _add_alias(self, name, code):
+        key = normalize_name(name)
+        self._exact.setdefault(key, code)
+        self._tokens.setdefault(_token_key(key), code)
+
+    def code_of_iso3(self, iso3):
+        hit = np.flatnonzero(self.iso3_codes == iso3)
+        if not len(hit):
+            raise KeyError(f"Unknown ISO3 code: {iso3}")
+        return int(hit[0])
+
+    def _resolve(self, name):
+        """Code and match type ('exact', 'tokens', 'fuzzy', 'unknown') of one spelling."""
+        key = normalize_name(name)
+        if key in self._exact:
+            return self._exact[key], 'exact'
+        if _token_key(key) in self._tokens:
+            return self._tokens[_token_key(key)], 'tokens'
+        close = difflib.get_close_matches(key, self._blocks.get(key[:1], []), n=1,
+                                          cutoff=self.cutoff)
+        if close:
+            return self._exact[close[0]], 'fuzzy'
+        # Unknown spellings share a code per normalized key, after the table
+        if key not in self._unknown:
+            self._unknown[key] = self.n_known + len(self._unknown_names)
+            self._unknown_names.append(str(name))
+        return self._unknown[key], 'unknown'
+
+    def _lookup(self, name):
+        code = self._cache.get(name)
+        if code is None:
+            code, how = self._resolve(name)
+            self._cache[name] = code
+            self._match[name] = how
+        return code
+
+    def codes(self, values):
+        """
+        Integer country codes for a column of names (-1 for missing). Each
+        distinct spelling is resolved once, through the column's
+        categorical codes.
+        """
+        positions, uniques = pd.factorize(pd.Series(values, dtype=object).values)
+        resolved = np.fromiter((self._lookup(u) for u in uniques), dtype=np.int32,
+                               count=len(uniques))
+        out = np.full(len(positions), -1, dtype=np.int32)
+        observed = positions >= 0
+        out[observed] = resolved[positions[observed]]
+        return out
+
+    def names(self, codes):
+        """Canonical names for codes (unknown codes keep their first spelling)."""
+        codes = np.asarray(codes)
+        table = np.concatenate([self.canonical,
+                                np.array(self._unknown_names, dtype=object), [None]])
+        return table[np.where(codes >= 0, codes, len(table) - 1)]
+
+    def standardize(self, values, unknown='keep'):
+        """
+        Canonical names for a column of names. `unknown` is 'keep' (leave
+        the spelling as it is), 'nan' or 'raise'.
+        """
+        codes = self.codes(values)
+        out = self.names(codes)
+        bad = codes >= self.n_known
+        if bad.any() and unknown == 'raise':
+            raise KeyError(f"Unknown countries: {sorted(set(out[bad]))}")
+        if unknown == 'nan':
+            out = np.where(bad, None, out)
+        if isinstance(values, pd.Series):
+            return pd.Series(out, index=values.index, name=values.name)
+        return out
+
+    def iso3(self, values):
+        """ISO3 codes for a column of names (None where unknown)."""
+        codes = self.codes(values)
+        table = np.concatenate([self.iso3_codes, [None]])
+        return table[np.where((codes >= 0) & (codes < self.n_known), codes, len(table) - 1)]
+
+    def categorical(self, values):
+        """pd.Categorical of canonical names, categories in ISO3 table order."""
+        codes = self.codes(values)
+        categories = np.concatenate([self.canonical,
+                                     np.array(self._unknown_names, dtype=object)])
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    def report(self, values):
+        """One row per distinct spelling: name, code, iso3, canonical, match."""
+        uniques = pd.unique(pd.Series(values, dtype=object).dropna())
+        codes = self.codes(uniques)
+        known = codes < self.n_known
+        return pd.DataFrame({
+            'name': uniques, 'code': codes,
+            'iso3': np.where(known, self.iso3_codes[np.minimum(codes, self.n_known - 1)], None),
+            'canonical': self.names(codes),
+            'match': [self._match[u] for u in uniques],
+        })
+
+
+@functools.lru_cache(maxsize=1)
+def registry():
+    """Shared registry, so the per-spelling cache is shared by every caller."""
+    return CountryRegistry()
+
+
+def standardize_countries(values, unknown='keep'):
+    """Canonical country names for a column of names (see CountryRegistry.standardize)."""
+    return registry().standardize(values, unknown)
+
+
+@timed('country merge', 'io')
+def merge_on_country(left, right, on=None, how='left', entity='Country', keep_key=False):
+    """
+    left.merge(right) on integer country codes (plus the columns in `on`)
+    instead of the raw names. The entity column of the result holds the
+    canonical names; with keep_key the integer codes are kept as
+    'country_id'.
+    """
+    reg = registry()
+    on = list(on or [])
+    lpos = list(left.columns).index(entity)
+    lhs = left.drop(columns=entity).assign(**{KEY: reg.codes(left[entity])})
+    rhs = right.drop(columns=entity).assign(**{KEY: reg.codes(right[entity])})
+    out = lhs.merge(rhs, on=[KEY] + on, how=how)
+    out.insert(lpos, entity, reg.names(out[KEY].values))
+    return out if keep_key else out.drop(columns=KEY)
@@ -0,0 +1,248 @@
+"""
+Cached Excel ingestion.
+
+pd.read_excel re-parses the whole workbook XML on every call. It also
+reads sheet_name=None one sheet after another. The compilation scripts
+read the same workbooks (the country comparison sheets, the US News
+category files, data/0156250119952022202312.xlsx and
+average-length-of-stay-filtered.xlsx) on every run. Here:
+
+- a sheet is parsed once with openpyxl in read-only mode, streaming
+  values_only rows. Cell conversion, trailing-blank trimming and type
+  inference (pandas' TextParser) match pd.read_excel, so frames are equal,
+- the parsed sheet is written to a columnar cache file keyed by the
+  workbook's SHA-256 and the sheet name:
+  <CACHE_DIR>/excel/<digest>/<sheet>.npz, one array per column plus JSON
+  metadata, so no pickle is involved. Editing the workbook changes the
+  digest, so stale entries are never served. The sheet list is cached
+  next to them,
+- later reads load the arrays straight from the cache,
+- cache misses across sheets or files are parsed in parallel worker
+  processes, each streaming its own sheet.
+
+The digest of a path is memoized per (size, mtime), so repeated reads in
+one process hash the file once.
+
+Usage:
+    from tourism.excel import read_excel, read_workbook, sheet_names
+    df = read_excel('data/Ciara_data/average-length-of-stay-filtered.xlsx')
+    sheets = read_workbook('combining_by_country/....xlsx')   # {name: DataFrame}
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .instrument import timed
+from .pipeline import CACHE_DIR, file_digest
+
+EXCEL_CACHE_DIR = os.path.join(CACHE_DIR, 'excel')
+
+
+# ==========================================
+# STREAMING READER
+# ==========================================
+def _convert(value):
+    """Cell value as pd.read_excel's openpyxl reader converts it."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def parse_sheet(path, sheet_name):
+    """One sheet through openpyxl's read-only streaming reader, typed like pd.read_excel."""
+    from openpyxl import load_workbook
+    from pandas.io.parsers import TextParser
+
+    book = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = book[sheet_name]
+        data, last = [], 0
+        for row in sheet.iter_rows(values_only=True):
+            values = [_convert(v) for v in row]
+            while values and values[-1] == '':
+                values.pop()
+            data.append(values)
+            if values:
+                last = len(data)
+    finally:
+        book.close()
+    data = data[:last]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(r) for r in data)
+    return TextParser([r + [''] * (width - len(r)) for r in data], header=0).read()
+
+
+# ==========================================
+# COLUMNAR CACHE
+# ==========================================
+@functools.lru_cache(maxsize=256)
+def _digest(path, size, mtime_ns):
+    return file_digest(path)
+
+
+def workbook_digest(path):
+    """SHA-256 of a workbook, memoized per (path, size, mtime)."""
+    st = os.stat(path)
+    return _digest(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def _cache_file(digest, sheet_name, cache_dir):
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', sheet_name)[:40]
+    tag = hashlib.sha1(sheet_name.encode()).hexdigest()[:8]
+    return os.path.join(cache_dir, digest, f'{slug}-{tag}.npz')
+
+
+def _label(value):
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+
+def save_columnar(df, path):
+    """One array per column plus JSON metadata; strings as unicode arrays with a null mask."""
+    arrays, columns = {}, []
+    for j, (name, s) in enumerate(df.items()):
+        kind = s.dtype.kind
+        if kind in 'biuf':
+            arrays[f'c{j}'] = s.to_numpy()
+            columns.append({'name': _label(name), 'kind': 'numeric'})
+        elif kind == 'M':
+            arrays[f'c{j}'] = s.to_numpy().view(np.int64)
+            columns.append({'name': _label(name), 'kind': 'datetime', 'dtype': str(s.dtype)})
+        else:
+            values = s.to_numpy(dtype=object)
+            missing = pd.isna(values)
+            if all(isinstance(v, str) for v in values[~missing]):
+                arrays[f'c{j}'] = np.where(missing, '', values).astype(str)
+                arrays[f'm{j}'] = missing
+                columns.append({'name': _label(name), 'kind': 'string', 'dtype': str(s.dtype)})
+            else:
+                arrays[f'c{j}'] = np.array(json.dumps(
+                    [None if m else v for v, m in zip(values.tolist(), missing)], default=str))
+                columns.append({'name': _label(name), 'kind': 'json'})
+    arrays['meta'] = np.array(json.dumps({'columns': columns, 'rows': len(df)}))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp.npz'
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_columnar(path):
+    """Inverse of save_columnar."""
+    with np.load(path) as f:
+        meta = json.loads(str(f['meta']))
+        data = {}
+        for j, col in enumerate(meta['columns']):
+            values = f[f'c{j}']
+            if col['kind'] == 'numeric':
+                s = pd.Series(values)
+            elif col['kind'] == 'datetime':
+                s = pd.Series(values.view(col['dtype']))
+            elif col['kind'] == 'string':
+                s = pd.Series(np.where(f[f'm{j}'], None, values.astype(object)),
+                              dtype=object).astype(col['dtype'])
+            else:
+                s = pd.Series([np.nan if v is None else v for v in json.loads(str(values))],
+                              dtype=object)
+            data[j] = s
+    out = pd.DataFrame(data, index=pd.RangeIndex(meta['rows']))
+    out.columns = [c['name'] for c in meta['columns']]
+    return out
+
+
+def _parse_to_cache(task):
+    path, sheet_name, cache_file = task
+    df = parse_sheet(path, sheet_name)
+    save_columnar(df, cache_file)
+    return df
+
+
+def _parallel_map(func, items, n_jobs):
+    """[func(item) ...] in worker processes (n_jobs=1 runs in-process)."""
+    n_jobs = n_jobs or min(len(items), os.cpu_count() or 1)
+    if n_jobs == 1 or len(items) < 2:
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(min(n_jobs, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+# ==========================================
+# PUBLIC READERS
+# ==========================================
+def sheet_names(path, cache_dir=EXCEL_CACHE_DIR):
+    """Sheet names of a workbook, cached with its digest."""
+    index = os.path.join(cache_dir, workbook_digest(path), 'sheets.json')
+    if os.path.exists(index):
+        with open(index) as f:
+            return json.load(f)
+    from openpyxl import load_workbook
+
+    book = load_workbook(path, read_only=True, keep_links=False)
+    names = list(book.sheetnames)
+    book.close()
+    os.makedirs(os.path.dirname(index), exist_ok=True)
+    with open(index, 'w') as f:
+        json.dump(names, f)
+    return names
+
+
+@timed('read workbooks', 'io')
+def read_many(requests, n_jobs=None, cache_dir=EXCEL_CACHE_DIR, cache=True):
+    """
+    DataFrames for a list of (path, sheet name) pairs, in order. Cached
+    sheets are loaded from the cache; the rest are parsed in parallel and
+    cached.
+    """
+    requests = list(requests)
+    out = [None] * len(requests)
+    misses = []
+    for i, (path, sheet) in enumerate(requests):
+        target = _cache_file(workbook_digest(path), sheet, cache_dir)
+        if cache and os.path.exists(target):
+            out[i] = load_columnar(target)
+        else:
+            misses.append((i, (path, sheet, target)))
+    parsed = _parallel_map(_parse_to_cache, [task for _, task in misses], n_jobs)
+    for (i, _), df in zip(misses, parsed):
+        out[i] = df
+    return out
+
+
+def read_workbook(path, sheets=None, n_jobs=None, cache_dir=EXCEL_CACHE_DIR, cache=True):
+    """Every sheet (or `sheets`) of a workbook as {sheet name: DataFrame}."""
+    names = sheet_names(path, cache_dir) if sheets is None else list(sheets)
+    frames = read_many([(path, s) for s in names], n_jobs, cache_dir, cache)
+    return dict(zip(names, frames))
+
+
+def read_excel(path, sheet_name=0, usecols=None, cache_dir=EXCEL_CACHE_DIR, cache=True):
+    """
+    Cached stand-in for pd.read_excel(path, sheet_name, usecols) for
+    header-on-first-row sheets. sheet_name may be a name, a position, a
+    list of either, or None for every sheet (a dict is returned then).
+    """
+    names = sheet_names(path, cache_dir)
+    if sheet_name is None or isinstance(sheet_name, list):
+        wanted = names if sheet_name is None else [
+            names[s] if isinstance(s, int) else s for s in sheet_name]
+        return {k: select_columns(v, usecols) for k, v in read_workbook(
+            path, wanted, cache_dir=cache_dir, cache=cache).items()}
+    name = names[sheet_name] if isinstance(sheet_name, int) else sheet_name
+    return select_columns(read_many([(path, name)], 1, cache_dir, cache)[0], usecols)
+
+
+def select_columns(df, usecols):
+    """usecols as in pd.read_excel: column names or positions (None keeps all)."""
+    if usecols is None:
+        return df
+    if all(isinstance(c, int) for c in usecols):
+        return df.iloc[:, list(usecols)]
+    return df[[c for c in df.columns if c in set(usecols)]]
@@ -0,0 +1,254 @@
+"""
+Monte Carlo scenario forecasts of Chinese arrivals, 2025-2030.
+
+The panel models stop at in-sample fits. This module projects
+arrivals_from_china for every destination in a model's sample from
+user-defined paths for gdp_china, RER and peace_index (CPI_destination and
+exchange_rate are held at their last observed values unless given).
+
+For an entity-FE model the forecast of ln_arrivals is
+
+    y_it = ybar_i + (x_it - xbar_i)' b + e_it,
+
+which is linear in b. Each simulated path draws
+- b from N(b_hat, V) using the model's clustered covariance (parameter
+  uncertainty), and
+- e_it from a per-destination AR(1) fitted to the within residuals and
+  started at the last observed residual (shock uncertainty).
+
+Paths are simulated in chunks. Each chunk is a handful of array operations
+over (paths, destinations, years) and is reduced right away into
+fixed-bin histograms per destination-year. The fan-chart quantiles are read
+off the accumulated histograms, so 10^6 paths never need to be held in
+memory at once.
+
+Usage:
+    from tourism.forecast import forecast_arrivals, model_snapshot
+    fan = forecast_arrivals(model_snapshot(model='F'), rer_change={'Thailand': -0.10})
+    fan[fan['Country'] == 'Thailand']
+"""
+
+import numpy as np
+import pandas as pd
+
+from .instrument import stage, timed
+from .pipeline import (MODEL1_COUNTRIES, MODEL_SPECS, engineer_features, fit_model,
+                       load_panel, prepare_panel)
+
+HORIZON = (2025, 2030)
+QUANTILES = (0.05, 0.10, 0.25, 0.50, 0.75, 0.90, 0.95)
+SCENARIO_COLUMNS = ['gdp_china', 'RER', 'peace_index', 'CPI_destination', 'exchange_rate']
+
+
+# ==========================================
+# MODEL SNAPSHOT
+# ==========================================
+def model_snapshot(df=None, model='F', countries=MODEL1_COUNTRIES, start_year=2008,
+                   end_year=2024, cov_type='clustered'):
+    """
+    Fit one entity-FE model and keep what forecasting needs: the slope
+    coefficients and covariance, each destination's sample means of y and
+    x, the in-sample RER means used for ln_rer, and the AR(1) of the
+    within residuals (phi, innovation sd, last residual).
+
+    Models with time effects (B, E) have no forecastable year effects and
+    are rejected.
+    """
+    spec = MODEL_SPECS[model]
+    if spec['time_effects']:
+        raise ValueError(f"Model {model} has time effects, which cannot be projected forward")
+    raw = load_panel() if df is None else df
+    panel = prepare_panel(raw, countries=countries, start_year=start_year, end_year=end_year)
+    res = fit_model(panel, model, cov_type=cov_type)
+
+    exog = spec['exog']
+    b = res.params[exog].values
+    V = res.cov.loc[exog, exog].values
+
+    flat = panel.reset_index()
+    names = list(pd.unique(flat['Country']))
+    grouped = flat.groupby('Country', sort=False)
+    y_bar = grouped['ln_arrivals'].mean().loc[names].values
+    x_bar = grouped[exog].mean().loc[names].values
+
+    # Within residuals and their AR(1), per destination
+    d_idx = pd.Categorical(flat['Country'], categories=names).codes
+    flat['resid'] = (flat['ln_arrivals'] - y_bar[d_idx]
+                     - (flat[exog].values - x_bar[d_idx]) @ b)
+    phi, sd, last = [], [], []
+    for name in names:
+        e = flat.loc[flat['Country'] == name].sort_values('Year')['resid'].values
+        p = float(e[1:] @ e[:-1] / (e[:-1] @ e[:-1])) if len(e) > 2 else 0.0
+        p = min(max(p, 0.0), 0.99)
+        phi.append(p)
+        sd.append(float(np.std(e[1:] - p * e[:-1], ddof=1)) if len(e) > 2 else float(np.std(e)))
+        last.append(e[-1])
+
+    rer_mean = grouped['RER'].mean().loc[names].values
+    return {
+        'model': model, 'exog': exog, 'names': names, 'params': b, 'cov': V,
+        'y_bar': y_bar, 'x_bar': x_bar, 'rer_mean': rer_mean,
+        'phi': np.array(phi), 'shock_sd': np.array(sd), 'last_resid': np.array(last),
+        'last_year': int(flat['Year'].max()), 'start_year': start_year, 'end_year': end_year,
+    }
+
+
+# ==========================================
+# SCENARIOS
+# ==========================================
+def _per_country(value, names):
+    if isinstance(value, dict):
+        return np.array([value.get(n, 0.0) for n in names], dtype=float)
+    return np.full(len(names), float(value))
+
+
+def build_scenario(df=None, countries=MODEL1_COUNTRIES, horizon=HORIZON, gdp_growth=0.045,
+                   rer_change=0.0, peace_change=0.0, scenario=None):
+    """
+    Exogenous paths for the forecast years.
+
+    Starts from each destination's last observed values. gdp_china grows
+    at `gdp_growth` per year, and RER and exchange_rate shift once by
+    `rer_change` (proportional, -0.10 = 10% cheaper destination).
+    peace_index shifts by `peace_change`, and CPI_destination is held flat.
+    rer_change and peace_change may be dicts keyed by country. A
+    user-supplied `scenario` frame (Year plus any of SCENARIO_COLUMNS, with
+    or without Country) overrides the generated values where given.
+    """
+    raw = load_panel() if df is None else df
+    years = np.arange(horizon[0], horizon[1] + 1)
+    hist = raw[raw['Country'].isin(countries)].sort_values('Year')
+    last = hist.groupby('Country')[SCENARIO_COLUMNS].last().reindex(countries)
+    gdp_last = hist.dropna(subset=['gdp_china']).iloc[-1]
+    gdp_year = int(gdp_last['Year'])
+
+    n = len(countries)
+    rer_shift = 1 + _per_country(rer_change, countries)
+    out = pd.DataFrame({
+        'Country': np.repeat(countries, len(years)),
+        'Year': np.tile(years, n),
+    })
+    out['gdp_china'] = gdp_last['gdp_china'] * (1 + gdp_growth) ** (out['Year'] - gdp_year)
+    for col, values in [('RER', last['RER'].values * rer_shift),
+                        ('exchange_rate', last['exchange_rate'].values * rer_shift),
+                        ('peace_index', last['peace_index'].values
+                         + _per_country(peace_change, countries)),
+                        ('CPI_destination', last['CPI_destination'].values)]:
+        out[col] = np.repeat(values, len(years))
+
+    if scenario is not None:
+        keys = ['Country', 'Year'] if 'Country' in scenario.columns else ['Year']
+        cols = [c for c in SCENARIO_COLUMNS if c in scenario.columns]
+        merged = out.merge(scenario[keys + cols], on=keys, how='left', suffixes=('', '_user'))
+        for c in cols:
+            out[c] = merged[f'{c}_user'].fillna(merged[c]).values
+    return out
+
+
+def scenario_design(snapshot, scenario):
+    """(D, H, k) regressor array for the forecast years, aligned with snapshot['names']."""
+    future = engineer_features(scenario.assign(arrivals_from_china=np.nan))
+    # ln_rer uses the in-sample RER mean, not the mean of the scenario years
+    rer_mean = dict(zip(snapshot['names'], snapshot['rer_mean']))
+    future['ln_rer'] = np.log(future['RER'] / future['Country'].map(rer_mean))
+    future = future.set_index(['Country', 'Year']).sort_index()
+
+    years = np.sort(future.index.get_level_values('Year').unique())
+    X = np.stack([future.loc[name, snapshot['exog']].loc[years].values
+                  for name in snapshot['names']])
+    if np.isnan(X).any():
+        raise ValueError("Scenario has missing values for some destination-years")
+    return years, X
+
+
+# ==========================================
+# SIMULATION
+# ==========================================
+def _simulate_chunk(snapshot, mean, steps, n, rng, parameters, shocks):
+    """(n, D, H) simulated ln_arrivals for one chunk."""
+    D, H, k = steps.shape
+    y = np.broadcast_to(mean, (n, D, H)).copy()
+    if parameters:
+        L = np.linalg.cholesky(snapshot['cov'] + 1e-12 * np.eye(k))
+        db = rng.standard_normal((n, k)) @ L.T
+        y += np.einsum('nk,dhk->ndh', db, steps)
+    if shocks:
+        e = np.broadcast_to(snapshot['last_resid'], (n, D)).copy()
+        for h in range(H):
+            e = snapshot['phi'] * e + snapshot['shock_sd'] * rng.standard_normal((n, D))
+            y[:, :, h] += e
+    return y
+
+
+@timed('forecast simulation', 'model')
+def forecast_arrivals(snapshot=None, scenario=None, n_paths=1_000_000, quantiles=QUANTILES,
+                      chunk_size=50_000, bins=4096, parameters=True, shocks=True, seed=0,
+                      **scenario_kwargs):
+    """
+    Fan-chart quantiles of arrivals_from_china for every destination-year.
+
+    Parameters
+    ----------
+    snapshot : output of model_snapshot (default: Model F on the Model 1 sample)
+    scenario : output of build_scenario, or None to build one from
+        scenario_kwargs (gdp_growth, rer_change, peace_change, horizon, ...)
+    n_paths : simulated paths (parameter and shock draws per path)
+    chunk_size : paths simulated per vectorized chunk
+    bins : histogram bins per destination-year. Quantiles are accurate to
+        about one bin on the log scale (typically well under 1% in levels)
+    parameters, shocks : switch the two sources of uncertainty
+
+    Returns a DataFrame with Country, Year, point (no-uncertainty forecast),
+    mean, and one column per quantile (q05, q50, ...), all in arrivals.
+    """
+    snapshot = snapshot or model_snapshot()
+    if scenario is None:
+        scenario = build_scenario(countries=snapshot['names'], **scenario_kwargs)
+    years, X = scenario_design(snapshot, scenario)
+    steps = X - snapshot['x_bar'][:, None, :]
+    mean = snapshot['y_bar'][:, None] + steps @ snapshot['params']
+    D, H = mean.shape
+    rng = np.random.default_rng(seed)
+
+    # Bin range per cell from the analytic variance, padded generously
+    var = np.zeros((D, H))
+    if parameters:
+        var += np.einsum('dhk,kl,dhl->dh', steps, snapshot['cov'], steps)
+    centre = mean.copy()
+    if shocks:
+        # AR(1): Var(e_h) = sd^2 (1 + phi^2 + ... + phi^(2(h-1)))
+        phi = snapshot['phi'][:, None]
+        var += snapshot['shock_sd'][:, None] ** 2 * np.cumsum(phi ** (2 * np.arange(H)), axis=1)
+        centre += phi ** np.arange(1, H + 1) * snapshot['last_resid'][:, None]
+    half = 8 * np.sqrt(var) + 1e-6
+    lo, width = centre - half, 2 * half / bins
+
+    counts = np.zeros(D * H * bins, dtype=np.int64)
+    offset = (np.arange(D * H) * bins).reshape(D, H)
+    level_sum = np.zeros((D, H))
+    done = 0
+    while done < n_paths:
+        n = min(chunk_size, n_paths - done)
+        with stage('forecast chunk', 'model', paths=n):
+            y = _simulate_chunk(snapshot, mean, steps, n, rng, parameters, shocks)
+            level_sum += np.exp(y).sum(axis=0)
+            idx = np.clip(((y - lo) / width).astype(np.int64), 0, bins - 1)
+            counts += np.bincount((idx + offset).ravel(), minlength=counts.size)
+        done += n
+
+    cdf = np.cumsum(counts.reshape(D, H, bins), axis=2) / n_paths
+    out = pd.DataFrame({
+        'Country': np.repeat(snapshot['names'], H),
+        'Year': np.tile(years, D),
+        'point': np.exp(mean).ravel(),
+        'mean': (level_sum / n_paths).ravel(),
+    })
+    for q in quantiles:
+        # First bin whose CDF reaches q, interpolated linearly inside the bin
+        k = np.argmax(cdf >= q, axis=2)
+        below = np.take_along_axis(cdf, np.maximum(k - 1, 0)[..., None], axis=2)[..., 0]
+        below = np.where(k == 0, 0.0, below)
+        inside = np.take_along_axis(cdf, k[..., None], axis=2)[..., 0] - below
+        frac = np.where(inside > 0, (q - below) / np.where(inside > 0, inside, 1), 0.5)
+        out[f'q{round(q * 100):02d}'] = np.exp(lo + (k + frac) * width).ravel()
+    return out
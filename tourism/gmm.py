@@ -0,0 +1,271 @@
+"""
+Dynamic panel GMM (Arellano-Bond difference GMM, Blundell-Bond system GMM).
+
+Habit persistence is only estimated for Thailand on its own
+(run_advanced_analysis.py, ADL(1,0) by OLS). Putting ln_arrivals_lag1 into
+the fixed-effects panel instead gives Nickell bias of order 1/T. Here
+
+    y_it = rho y_i,t-1 + x_it' b + a_i + e_it
+
+is estimated in first differences (difference GMM) with y_i,t-2, y_i,t-3,
+... as instruments. System GMM adds the level equations, instrumented with
+Delta y_i,t-1. Regressors listed in `endog` are instrumented the same way
+as y. The others are exogenous and instrument themselves: differenced in
+the difference equations, in levels in the level equations.
+
+The instrument matrix Z (rows = transformed observations) is built as a
+scipy.sparse matrix straight from the observation coordinates. That is one
+vectorized pass per lag, so its cost is the number of non-zeros. With
+`collapse` (one column per lag instead of per lag and period) or a
+maximum lag, that count is linear in N x T. The moment matrices are sparse
+products as well:
+
+- sum_i Z_i' H Z_i is (A'Z)'(A'Z), where A maps the idiosyncratic errors
+  to the transformed ones (e_t - e_t-1 in differences, e_t in levels). For
+  system GMM this gives the usual H with the difference/level cross blocks,
+  and gaps in the years are handled without special cases.
+- per-destination sums Z_i' u_i are one sparse product with the
+  destination indicator.
+
+The two-step estimate uses W = (sum_i Z_i'u_i u_i'Z_i)^-1 from the
+one-step residuals, with the Windmeijer (2005) finite-sample correction of
+its covariance. The Hansen J test of the overidentifying restrictions and
+the Arellano-Bond AR(1)/AR(2) tests on the differenced residuals are
+reported with it. With few destinations keep the instrument count below the
+number of groups (collapse=True, lags=(2, 3)). Otherwise J is weak and the
+weight matrix is singular; a pseudo-inverse is used then.
+
+Usage:
+    from tourism.gmm import fit_gmm
+    from tourism.pipeline import PLACEBO_COUNTRIES, prepare_panel
+    res = fit_gmm(prepare_panel(countries=PLACEBO_COUNTRIES),
+                  exog=['ln_gdp_china', 'ln_rer', 'covid_dummy'],
+                  system=True, collapse=True, lags=(2, 3))
+    res['table'], res['hansen'], res['ar']
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+from .instrument import timed
+from .pipeline import panel_grid
+
+
+# ==========================================
+# LAGS AND INSTRUMENTS
+# ==========================================
+def _lag(a, k):
+    out = np.full_like(a, np.nan)
+    if k < a.shape[1]:
+        out[:, k:] = a[:, :a.shape[1] - k]
+    return out
+
+
+def _diff(a):
+    return a - _lag(a, 1)
+
+
+def _block(i, t, source, lags, collapse, first_row):
+    """
+    COO entries (rows, keys, values) of one GMM-style instrument block:
+    row r gets source[i_r, t_r - l] for every lag l. The key is the lag
+    (collapsed) or the (period, lag) pair.
+    """
+    rows, keys, vals = [], [], []
+    for j, l in enumerate(lags):
+        ok = t - l >= 0
+        v = np.zeros(len(t))
+        v[ok] = source[i[ok], t[ok] - l]
+        ok &= np.isfinite(v) & (v != 0)
+        rows.append(first_row + np.flatnonzero(ok))
+        keys.append(np.full(ok.sum(), j) if collapse else t[ok] * len(lags) + j)
+        vals.append(v[ok])
+    return np.concatenate(rows), np.concatenate(keys), np.concatenate(vals)
+
+
+def _assemble(blocks, n_rows):
+    """Stack blocks into one CSR matrix, dropping instrument columns with no entries."""
+    rows, cols, vals, offset = [], [], [], 0
+    for r, keys, v in blocks:
+        uniq, col = np.unique(keys, return_inverse=True)
+        rows.append(r)
+        cols.append(col + offset)
+        vals.append(v)
+        offset += len(uniq)
+    return sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(n_rows, offset))
+
+
+# ==========================================
+# ESTIMATION
+# ==========================================
+def _step(ZX, Zy, W):
+    """GMM estimate for weight W. Returns (b, (X'Z W Z'X)^-1)."""
+    A = np.linalg.inv(ZX.T @ W @ ZX)
+    return A @ (ZX.T @ W @ Zy), A
+
+
+def _group_moments(S, Z, u):
+    """(N, L) array of per-destination moments Z_i' u_i."""
+    return np.asarray((S @ Z.multiply(u[:, None])).todense())
+
+
+def _windmeijer(ZX, W2, A2, V1, G1, S, Z, X, u2):
+    """Windmeijer (2005) corrected covariance of the two-step estimate."""
+    v = W2 @ (Z.T @ u2)
+    Gv = G1 @ v
+    D = np.empty_like(A2)
+    for k in range(X.shape[1]):
+        H = _group_moments(S, Z, X[:, k])
+        dOmega_v = -(H.T @ Gv + G1.T @ (H @ v))
+        D[:, k] = -A2 @ (ZX.T @ (W2 @ dOmega_v))
+    return A2 + D @ A2 + A2 @ D.T + D @ V1 @ D.T
+
+
+def _ar_test(order, resid, grid_rows, X, G, S, P, V, shape):
+    """
+    Arellano-Bond test for order-`order` serial correlation in the
+    differenced residuals, robust to heteroskedasticity across destinations.
+    P = (X'ZWZ'X)^-1 X'ZW for the weight W used by the reported estimate.
+    """
+    i, t = grid_rows
+    E = np.full(shape, np.nan)
+    E[i, t] = resid
+    W = _lag(E, order)[i, t]
+    ok = np.isfinite(W)
+    if not ok.any():
+        return np.nan, np.nan
+    w = np.where(ok, W, 0.0)
+    s = np.bincount(i, weights=w * resid, minlength=shape[0])
+    wX = w @ X
+    var = s @ s - 2 * wX @ P @ (G.T @ s) + wX @ V @ wX
+    z = float(s.sum() / np.sqrt(var)) if var > 0 else np.nan
+    return z, float(2 * stats.norm.sf(abs(z)))
+
+
+@timed('dynamic panel GMM', 'model')
+def fit_gmm(df, y='ln_arrivals', exog=(), endog=(), entity='Country', time='Year',
+            system=False, lags=(2, None), collapse=False, two_step=True):
+    """
+    Difference or system GMM estimate of a dynamic panel with one lag of y.
+
+    Parameters
+    ----------
+    df : long panel (or one indexed by entity and time). Years missing for a
+        destination break its differences and lags there.
+    exog : strictly exogenous regressors (instrument themselves)
+    endog : endogenous regressors, instrumented GMM-style like y
+    system : add the level equations (Blundell-Bond) and a constant
+    lags : (first, last) instrument lag for the difference equations;
+        last=None uses every available lag
+    collapse : one instrument column per lag rather than per lag and period
+    two_step : two-step estimate with Windmeijer standard errors (otherwise
+        the one-step estimate with cluster-robust standard errors)
+
+    Returns a dict with params and cov (pandas), the one-step params_onestep
+    and cov_onestep, a `table` DataFrame (variable, coef, std_error, z,
+    pvalue, lower, upper), hansen (statistic, df, pvalue), an `ar` DataFrame
+    (order, z, pvalue), n_obs, n_groups, n_instruments and instrument_nnz.
+    """
+    exog, endog = list(exog), list(endog)
+    names, years, grid = panel_grid(df, [y] + endog + exog, entity, time)
+    N, T = len(names), len(years)
+    lag_name = f'{y}_lag1'
+    Y = grid[y]
+    regressors = [_lag(Y, 1)] + [grid[c] for c in endog + exog]
+    columns = [lag_name] + endog + exog + (['const'] if system else [])
+    first, last = lags
+    gmm_lags = np.arange(first, (T - 1 if last is None else min(last, T - 1)) + 1)
+
+    # Difference equations
+    dY, dR = _diff(Y), [_diff(r) for r in regressors]
+    ok = np.isfinite(dY) & np.logical_and.reduce([np.isfinite(r) for r in dR])
+    i_d, t_d = np.nonzero(ok)
+    n_d = len(i_d)
+    parts_X = [np.column_stack([r[i_d, t_d] for r in dR] + ([np.zeros(n_d)] if system else []))]
+    parts_y = [dY[i_d, t_d]]
+    blocks = [_block(i_d, t_d, grid[c], gmm_lags, collapse, 0) for c in [y] + endog]
+    blocks += [(np.arange(n_d), np.zeros(n_d, dtype=int), dR[1 + len(endog) + j][i_d, t_d])
+               for j in range(len(exog))]
+    A_rows = [np.arange(n_d), np.arange(n_d)]
+    A_cols = [i_d * T + t_d, i_d * T + t_d - 1]
+    A_vals = [np.ones(n_d), -np.ones(n_d)]
+
+    # Level equations (system GMM)
+    n = n_d
+    if system:
+        ok = np.isfinite(Y) & np.logical_and.reduce([np.isfinite(r) for r in regressors])
+        i_l, t_l = np.nonzero(ok)
+        n_l = len(i_l)
+        parts_X.append(np.column_stack([r[i_l, t_l] for r in regressors] + [np.ones(n_l)]))
+        parts_y.append(Y[i_l, t_l])
+        blocks += [_block(i_l, t_l, _diff(grid[c]), gmm_lags[:1] - 1, collapse, n_d)
+                   for c in [y] + endog]
+        blocks += [(n_d + np.arange(n_l), np.zeros(n_l, dtype=int), grid[c][i_l, t_l])
+                   for c in exog]
+        blocks.append((n_d + np.arange(n_l), np.zeros(n_l, dtype=int), np.ones(n_l)))
+        A_rows.append(n_d + np.arange(n_l))
+        A_cols.append(i_l * T + t_l)
+        A_vals.append(np.ones(n_l))
+        n += n_l
+        group = np.concatenate([i_d, i_l])
+    else:
+        group = i_d
+
+    X = np.vstack(parts_X)
+    yv = np.concatenate(parts_y)
+    blocks = [(r, k, v) for r, k, v in blocks if len(r)]
+    Z = _assemble(blocks, n)
+    A = sparse.csr_matrix((np.concatenate(A_vals), (np.concatenate(A_rows), np.concatenate(A_cols))),
+                          shape=(n, N * T))
+    S = sparse.csr_matrix((np.ones(n), (group, np.arange(n))), shape=(N, n))
+    L, k = Z.shape[1], X.shape[1]
+    if L < k:
+        raise ValueError(f"{L} instruments for {k} regressors: the model is not identified")
+
+    ZX = np.asarray(Z.T @ X)
+    Zy = Z.T @ yv
+    M = A.T @ Z
+    W1 = np.linalg.pinv((M.T @ M).toarray(), hermitian=True)
+    b1, A1 = _step(ZX, Zy, W1)
+    u1 = yv - X @ b1
+    G1 = _group_moments(S, Z, u1)
+    P1 = A1 @ ZX.T @ W1
+    V1 = P1 @ (G1.T @ G1) @ P1.T
+    W2 = np.linalg.pinv(G1.T @ G1, hermitian=True)
+
+    if two_step:
+        b, A2 = _step(ZX, Zy, W2)
+        u = yv - X @ b
+        V = _windmeijer(ZX, W2, A2, V1, G1, S, Z, X, u)
+        P, G = A2 @ ZX.T @ W2, _group_moments(S, Z, u)
+    else:
+        b, u, V, P, G = b1, u1, V1, P1, G1
+
+    Zu = Z.T @ u
+    J = float(Zu @ W2 @ Zu)
+    hansen = {'statistic': J, 'df': L - k, 'pvalue': float(stats.chi2.sf(J, L - k))}
+    ar = []
+    for order in (1, 2):
+        z, p = _ar_test(order, u[:n_d], (i_d, t_d), X[:n_d], G, S, P, V, (N, T))
+        ar.append({'order': order, 'z': z, 'pvalue': p})
+
+    se = np.sqrt(np.diag(V))
+    z = b / se
+    crit = stats.norm.ppf(0.975)
+    table = pd.DataFrame({
+        'variable': columns,
+        'coef': b,
+        'std_error': se,
+        'z': z,
+        'pvalue': 2 * stats.norm.sf(np.abs(z)),
+        'lower': b - crit * se,
+        'upper': b + crit * se,
+    })
+    return {'params': pd.Series(b, index=columns), 'cov': pd.DataFrame(V, columns, columns),
+            'params_onestep': pd.Series(b1, index=columns),
+            'cov_onestep': pd.DataFrame(V1, columns, columns), 'table': table,
+            'hansen': hansen, 'ar': pd.DataFrame(ar), 'n_obs': n_d, 'n_groups': N,
+            'n_instruments': L, 'instrument_nnz': Z.nnz, 'system': system,
+            'two_step': two_step}
@@ -0,0 +1,222 @@
+"""
+Heterogeneous post-COVID effects: every destination x post interaction in
+one regression.
+
+ideas.md (step 2) specifies
+
+    ln(arrivals_it) = a_i (+ g_t) + X_it b + sum_j theta_j 1{i = j} post_t + e_it.
+
+placebo_regressions.py approximates it with one Model C fit per
+destination. Each of those fits compares that destination with a common
+post effect estimated on all the others, so the placebo coefficients are
+not directly comparable. Here all theta_j come from a single
+within-transformed OLS fit (tourism.covariance.within_transform). The
+comparisons are Wald tests on that fit (tourism.sur.wald_test):
+
+- joint: theta equal across all destinations,
+- pairwise: theta_focus = theta_j for every other destination,
+- theta_focus = the mean of the other destinations' theta.
+
+Without year effects post_t is spanned by the interactions, so post_covid
+is left out of X. With year effects the interactions sum to post_t, which
+the year effects absorb. One destination (`base`) is dropped then, and
+theta_j is measured relative to it. The contrasts are unaffected. Any
+regressor without variation after the transform (ln_gdp_china and
+covid_dummy under year effects) is dropped.
+
+Standard errors come from tourism.covariance.PanelCovariance
+(Driscoll-Kraay by default). Each theta_j is identified from one
+destination only, and OLS makes that destination's residuals orthogonal
+to its interaction. So every theta row of the destination-clustered meat
+is exactly zero. 'clustered' and 'two-way' are therefore refused: they
+would understate the theta standard errors several-fold. Covariances that
+sum scores by year ('time', 'driscoll-kraay') or by observation
+('robust', 'pcse') keep the theta scores.
+
+bootstrap=B adds wild restricted bootstrap p-values with the weights drawn
+by year (Webb six-point weights by default, since Rademacher weights give
+only 2^G distinct draws) and year-clustered Wald statistics. For the same
+reason the bootstrap is not clustered by destination: a wild cluster
+bootstrap with one treated cluster per coefficient is unreliable
+(MacKinnon-Webb 2017). For each hypothesis the restricted estimate is a
+closed form on the fitted model. All B bootstrap coefficient vectors come
+from one (B x n) (n x k) product, and their Wald statistics are batched
+over draws. No bootstrap draw refits the model.
+
+Usage:
+    from tourism.heterogeneous import fit_heterogeneous
+    from tourism.pipeline import PLACEBO_COUNTRIES, prepare_panel
+    res = fit_heterogeneous(prepare_panel(countries=PLACEBO_COUNTRIES), bootstrap=9999)
+    res['effects'], res['tests']
+"""
+
+import numpy as np
+import pandas as pd
+
+from .covariance import PanelCovariance, within_transform
+from .instrument import timed
+from .sur import wald_test
+
+HETEROGENEOUS_EXOG = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 'covid_dummy']
+
+# Destination-clustered meats are zero in every theta row (see above)
+DEGENERATE_COV_TYPES = ['clustered', 'two-way']
+
+
+# ==========================================
+# WILD CLUSTER BOOTSTRAP
+# ==========================================
+def _bootstrap_weights(kind, n_groups, n_boot, rng):
+    """(n_groups, n_boot) wild bootstrap weights."""
+    if kind == 'rademacher':
+        return rng.choice([-1.0, 1.0], size=(n_groups, n_boot))
+    if kind == 'webb':
+        w = np.sqrt([0.5, 1.0, 1.5])
+        return rng.choice(np.concatenate([-w, w]), size=(n_groups, n_boot))
+    raise ValueError(f"Unknown weights: {kind}")
+
+
+def _cluster_wald(X, E, b0, bread, groups, R, r):
+    """
+    Cluster-robust Wald statistics of R b = r for a batch of responses
+    X b0 + E[:, j] (already within-transformed). Returns one per column of E.
+    """
+    db = (E.T @ X) @ bread
+    resid = E - X @ db.T
+    S = np.stack([X[idx].T @ resid[idx] for idx in groups])          # (G, k, B)
+    V = bread @ np.einsum('gkb,glb->bkl', S, S) @ bread
+    d = (b0 + db) @ R.T - r
+    return np.einsum('bq,bq->b', d, np.linalg.solve(R @ V @ R.T, d[..., None])[..., 0])
+
+
+def wild_cluster_pvalue(X, y, params, bread, entity_codes, time_codes, R, r=None,
+                        time_effects=False, n_boot=9999, weights='webb', rng=None):
+    """
+    Wild restricted bootstrap p-value of R params = r on the
+    within-transformed data (X, y), weights and Wald statistics clustered
+    by year. Returns (observed statistic, p-value).
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    R = np.atleast_2d(R)
+    r = np.zeros(len(R)) if r is None else np.asarray(r, dtype=float)
+    groups = [np.flatnonzero(time_codes == g) for g in range(time_codes.max() + 1)]
+    observed = _cluster_wald(X, (y - X @ params)[:, None], params, bread, groups, R, r)[0]
+
+    restricted = params - bread @ R.T @ np.linalg.solve(R @ bread @ R.T, R @ params - r)
+    E = (y - X @ restricted)[:, None] * _bootstrap_weights(weights, len(groups), n_boot,
+                                                           rng)[time_codes]
+    # Year weights vary within a destination, so the draws are re-demeaned
+    E = within_transform(E, entity_codes, time_codes, True, time_effects)
+    stats_b = _cluster_wald(X, E, restricted, bread, groups, R, r)
+    return observed, float((1 + np.sum(stats_b >= observed)) / (1 + n_boot))
+
+
+# ==========================================
+# ESTIMATOR
+# ==========================================
+@timed('heterogeneous post effects', 'model')
+def fit_heterogeneous(df, exog=HETEROGENEOUS_EXOG, post='post_covid', y='ln_arrivals',
+                      time_effects=False, focus='Thailand', base=None, cov_type='driscoll-kraay',
+                      bootstrap=0, weights='webb', seed=0, entity='Country', time='Year',
+                      **cov_kwargs):
+    """
+    All destination x post interactions in one fixed-effects regression.
+
+    Parameters
+    ----------
+    df : prepared panel (tourism.pipeline.prepare_panel)
+    exog : regressors besides the interactions (post itself is never included)
+    time_effects : add year effects; theta is then relative to `base`
+        (default: the first destination other than `focus`)
+    focus : destination compared with every other one
+    cov_type : a tourism.covariance.COV_TYPES entry other than 'clustered'
+        and 'two-way'; cov_kwargs (bandwidth, group_debias) are passed on
+        to PanelCovariance.cov
+    bootstrap : wild bootstrap draws per test, by year (0 = analytic only)
+    weights : 'webb' or 'rademacher'
+
+    Returns a dict with
+    - table: every coefficient (variable, coef, std_error, t, pvalue, lower, upper),
+    - effects: theta per destination with the same columns (theta = 0 for `base`),
+    - tests: test, difference, statistic, df, pvalue and boot_pvalue,
+    - covariance: the PanelCovariance, to switch covariance type without refitting,
+    - dropped: regressors without variation after the transform, base, nobs.
+    """
+    if cov_type in DEGENERATE_COV_TYPES:
+        raise ValueError(f"cov_type='{cov_type}' clusters by destination, which zeroes the "
+                         "scores of destination-specific effects; use 'driscoll-kraay', "
+                         "'time', 'robust' or 'pcse'")
+    if entity not in df.columns:
+        df = df.reset_index()
+    df = df.dropna(subset=[y, post] + list(exog))
+    entity_codes, names = pd.factorize(df[entity], sort=True)
+    time_codes, _ = pd.factorize(df[time], sort=True)
+    names = list(names)
+    if focus not in names:
+        raise ValueError(f"{focus} is not in the panel")
+    if time_effects and base is None:
+        base = next(n for n in names if n != focus)
+    theta_names = [n for n in names if not (time_effects and n == base)]
+    terms = [f'{n}_{post}' for n in theta_names]
+
+    post_values = df[post].to_numpy(dtype=float)
+    D = np.column_stack([(entity_codes == names.index(n)) * post_values for n in theta_names])
+    raw = np.column_stack([df[y].to_numpy(dtype=float), df[list(exog)].to_numpy(dtype=float), D])
+    data = within_transform(raw, entity_codes, time_codes, True, time_effects)
+    yt, Xt = data[:, 0], data[:, 1:]
+
+    columns = list(exog) + terms
+    scale = np.abs(raw[:, 1:]).max(axis=0)
+    keep = np.abs(Xt).max(axis=0) > 1e-10 * np.maximum(scale, 1.0)
+    dropped = [c for c, k in zip(columns, keep) if not k]
+    Xt = Xt[:, keep]
+    columns = [c for c, k in zip(columns, keep) if k]
+
+    params = np.linalg.lstsq(Xt, yt, rcond=None)[0]
+    resid = yt - Xt @ params
+    absorbed = len(names) + (time_codes.max() if time_effects else 0)
+    pc = PanelCovariance(Xt, resid, entity_codes, time_codes, params, columns,
+                         absorbed=absorbed, nested=not time_effects)
+    table = pc.table(cov_type, **cov_kwargs)
+    cov = pc.cov(cov_type, **cov_kwargs)
+
+    effects = table[table['variable'].isin(terms)].copy()
+    effects.insert(0, 'country', [t[:-len(post) - 1] for t in effects['variable']])
+    effects = effects.drop(columns='variable')
+    if time_effects:
+        effects = pd.concat([effects, pd.DataFrame([{'country': base, 'coef': 0.0}])],
+                            ignore_index=True)
+    effects = effects.set_index('country').reindex(names).reset_index()
+
+    # Contrasts on theta: focus vs each destination, all equal, focus vs the rest's mean
+    pos = {n: columns.index(f'{n}_{post}') for n in theta_names}
+
+    def row(weights_by_country):
+        out = np.zeros(len(columns))
+        for n, w in weights_by_country.items():
+            if n in pos:
+                out[pos[n]] += w
+        return out
+
+    others = [n for n in names if n != focus]
+    hypotheses = [(f'{post} effect equal across all destinations',
+                   np.array([row({focus: 1.0, n: -1.0}) for n in others]))]
+    hypotheses += [(f'{focus} = {n}', row({focus: 1.0, n: -1.0})[None]) for n in others]
+    hypotheses.append((f'{focus} = mean of others',
+                       row({focus: 1.0, **{n: -1.0 / len(others) for n in others}})[None]))
+
+    rng = np.random.default_rng(seed)
+    tests = []
+    for label, R in hypotheses:
+        stat, dof, p = wald_test(params, cov, R)
+        boot = np.nan
+        if bootstrap:
+            boot = wild_cluster_pvalue(Xt, yt, params, pc.bread, entity_codes, time_codes, R,
+                                       time_effects=time_effects, n_boot=bootstrap,
+                                       weights=weights, rng=rng)[1]
+        tests.append({'test': label, 'difference': float(R[0] @ params) if len(R) == 1 else np.nan,
+                      'statistic': stat, 'df': dof, 'pvalue': p, 'boot_pvalue': boot})
+
+    return {'table': table, 'effects': effects, 'tests': pd.DataFrame(tests),
+            'covariance': pc, 'dropped': dropped, 'base': base if time_effects else None,
+            'nobs': len(yt)}
@@ -0,0 +1,251 @@
+"""
+Hierarchical (partially pooled) country-specific post-COVID effects.
+
+placebo_regressions.py re-fits Model C once per destination with that
+destination's post-COVID interaction and compares the p-values. Here every
+destination's post-COVID deviation enters one Bayesian model:
+
+    y_it = a_i + x_it' b + theta_i post_t + e_it,   e_it ~ N(0, sigma_i^2)
+    theta_i ~ N(mu, tau^2)
+
+with flat priors on a_i, b and mu, Jeffreys priors on sigma_i^2 and a
+half-Cauchy(0, prior_scale) prior on tau (Wand et al. 2011 auxiliary
+variable, so every conditional is conjugate). mu is the regional
+post-COVID effect and post_covid itself is absorbed by it, so x is Model
+C's regressors without post_covid and thailand_post_covid.
+
+Gibbs sampler, one sweep:
+1. (a_i, theta_i) for all destinations at once: N independent bivariate
+   normals drawn through a vectorized 2 x 2 Cholesky,
+2. b from its GLS conditional given the destination variances,
+3. sigma_i^2 for all destinations from inverse-gamma draws,
+4. mu, tau^2 and the auxiliary variable.
+The data enter only through per-destination sufficient statistics (sums
+and cross-products of the within-destination centred y, X and post),
+computed once, so a sweep costs O(N k^2) regardless of T. Chains run in
+worker processes, each with its own seed from one SeedSequence.
+
+Thailand is an outlier to the extent that theta_Thailand sits far from the
+regional distribution. Reported per destination:
+- p_below_mean: P(theta_i < mu),
+- p_outlier: P(|theta_i - mu| > k tau) (k = 2 by default),
+- p_lowest / p_highest: P(theta_i is the smallest / largest of all),
+- mean_rank: posterior mean rank (1 = most negative).
+Split R-hat across chains is reported for mu, tau and each theta_i.
+
+Usage:
+    from tourism.hierarchical import hierarchical_post_effects
+    from tourism.pipeline import PLACEBO_COUNTRIES, prepare_panel
+    res = hierarchical_post_effects(prepare_panel(countries=PLACEBO_COUNTRIES))
+    res['effects'], res['hyper'], res['outlier']
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .instrument import timed
+
+HIERARCHICAL_EXOG = ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 'covid_dummy']
+
+
+# ==========================================
+# SUFFICIENT STATISTICS
+# ==========================================
+def sufficient_stats(df, exog=HIERARCHICAL_EXOG, post='post_covid', y='ln_arrivals',
+                     entity='Country'):
+    """
+    Per-destination sums of the within-destination centred y and X:
+    n, Sp (sum of post), Spp (sum of post^2), yy, Xy, XX, Spy (sum of post y)
+    and SpX (sum of post X).
+    """
+    if entity not in df.columns:
+        df = df.reset_index()
+    df = df.dropna(subset=[y, post] + list(exog))
+    codes, names = pd.factorize(df[entity], sort=True)
+    N = len(names)
+    n = np.bincount(codes, minlength=N).astype(float)
+
+    def centred(values):
+        sums = np.zeros((N,) + values.shape[1:])
+        np.add.at(sums, codes, values)
+        return values - (sums / n.reshape((N,) + (1,) * (values.ndim - 1)))[codes]
+
+    yc = centred(df[y].to_numpy(dtype=float))
+    Xc = centred(df[list(exog)].to_numpy(dtype=float))
+    p = df[post].to_numpy(dtype=float)
+
+    def group(values):
+        out = np.zeros((N,) + values.shape[1:])
+        np.add.at(out, codes, values)
+        return out
+
+    return {
+        'names': list(names), 'exog': list(exog),
+        'n': n, 'Sp': group(p), 'Spp': group(p * p),
+        'yy': group(yc * yc), 'Xy': group(Xc * yc[:, None]),
+        'XX': group(Xc[:, :, None] * Xc[:, None, :]),
+        'Spy': group(p * yc), 'SpX': group(p[:, None] * Xc),
+    }
+
+
+# ==========================================
+# GIBBS SAMPLER
+# ==========================================
+def gibbs_chain(stats, n_draws=10000, burn=1000, thin=1, prior_scale=1.0, seed=0):
+    """
+    One chain. Returns {'theta', 'alpha', 'sigma2': (n_draws, N),
+    'beta': (n_draws, k), 'mu', 'tau2': (n_draws,)}.
+    """
+    rng = np.random.default_rng(seed)
+    n, Sp, Spp = stats['n'], stats['Sp'], stats['Spp']
+    yy, Xy, XX, Spy, SpX = stats['yy'], stats['Xy'], stats['XX'], stats['Spy'], stats['SpX']
+    N, k = Xy.shape
+
+    beta = np.linalg.lstsq(XX.sum(axis=0), Xy.sum(axis=0), rcond=None)[0]
+    theta, alpha = np.zeros(N), np.zeros(N)
+    sigma2 = np.maximum((yy - 2 * Xy @ beta + np.einsum('k,ikl,l->i', beta, XX, beta)) / n, 1e-6)
+    mu, tau2, aux = 0.0, 1.0, 1.0
+    A2 = prior_scale ** 2
+
+    out = {'theta': np.empty((n_draws, N)), 'alpha': np.empty((n_draws, N)),
+           'sigma2': np.empty((n_draws, N)), 'beta': np.empty((n_draws, k)),
+           'mu': np.empty(n_draws), 'tau2': np.empty(n_draws)}
+    total = burn + n_draws * thin
+    for it in range(total):
+        # 1. (alpha_i, theta_i) | rest: bivariate normal per destination
+        w = 1 / sigma2
+        sp = Spy - SpX @ beta
+        # (the centred residuals sum to zero, so the alpha part of the mean is 0)
+        q11, q12, q22 = n * w, Sp * w, Spp * w + 1 / tau2
+        b1, b2 = np.zeros(N), sp * w + mu / tau2
+        det = q11 * q22 - q12 * q12
+        m1, m2 = (q22 * b1 - q12 * b2) / det, (q11 * b2 - q12 * b1) / det
+        L11 = np.sqrt(q11)
+        L21 = q12 / L11
+        L22 = np.sqrt(q22 - L21 * L21)
+        z = rng.standard_normal((2, N))
+        theta = m2 + z[1] / L22
+        alpha = m1 + (z[0] - L21 * (theta - m2)) / L11
+
+        # 2. beta | rest: GLS with destination weights
+        prec = np.einsum('i,ikl->kl', w, XX)
+        rhs = np.einsum('i,ik->k', w, Xy - theta[:, None] * SpX)
+        chol = np.linalg.cholesky(prec)
+        mean = np.linalg.solve(prec, rhs)
+        beta = mean + np.linalg.solve(chol.T, rng.standard_normal(k))
+
+        # 3. sigma_i^2 | rest from the residual sums of squares
+        sp = Spy - SpX @ beta
+        ssr = (yy - 2 * Xy @ beta + np.einsum('k,ikl,l->i', beta, XX, beta)
+               - 2 * theta * sp + n * alpha ** 2 + Spp * theta ** 2 + 2 * alpha * theta * Sp)
+        sigma2 = np.maximum(ssr, 1e-12) / 2 / rng.standard_gamma(n / 2)
+
+        # 4. hyperparameters
+        mu = theta.mean() + np.sqrt(tau2 / N) * rng.standard_normal()
+        dev = theta - mu
+        tau2 = (1 / aux + dev @ dev / 2) / rng.standard_gamma((N + 1) / 2)
+        aux = (1 / tau2 + 1 / A2) / rng.standard_gamma(1.0)
+
+        if it >= burn and (it - burn) % thin == 0:
+            j = (it - burn) // thin
+            out['theta'][j], out['alpha'][j], out['sigma2'][j] = theta, alpha, sigma2
+            out['beta'][j], out['mu'][j], out['tau2'][j] = beta, mu, tau2
+    return out
+
+
+def _run_chain(task):
+    stats, n_draws, burn, thin, prior_scale, seed = task
+    return gibbs_chain(stats, n_draws, burn, thin, prior_scale, seed)
+
+
+def split_rhat(chains):
+    """Split R-hat (Gelman et al. 2013) of draws (n_chains, n_draws, ...)."""
+    chains = np.asarray(chains)
+    half = chains.shape[1] // 2
+    parts = np.concatenate([chains[:, :half], chains[:, half:2 * half]], axis=0)
+    n = parts.shape[1]
+    W = parts.var(axis=1, ddof=1).mean(axis=0)
+    B = n * parts.mean(axis=1).var(axis=0, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(((n - 1) / n * W + B / n) / W)
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+@timed('hierarchical post-COVID effects', 'model')
+def hierarchical_post_effects(df, exog=HIERARCHICAL_EXOG, post='post_covid', y='ln_arrivals',
+                              n_draws=10000, burn=1000, thin=1, n_chains=4, n_jobs=None,
+                              prior_scale=1.0, k=2.0, focus='Thailand', level=0.95, seed=0):
+    """
+    Partially pooled destination x post effects by Gibbs sampling.
+
+    Parameters
+    ----------
+    df : prepared panel (tourism.pipeline.prepare_panel)
+    exog : regressors besides the destination effects and theta_i post
+    n_draws, burn, thin : kept draws, burn-in sweeps and thinning per chain
+    n_chains : independent chains
+    n_jobs : worker processes (default: min(n_chains, CPUs)); 1 runs in-process
+    prior_scale : half-Cauchy scale of tau (log points)
+    k : outlier threshold in units of tau
+    focus : destination whose outlier probabilities are returned as 'outlier'
+
+    Returns a dict with
+    - effects: per destination mean, sd, lower, upper, p_below_mean,
+      p_outlier, p_lowest, p_highest, mean_rank and rhat,
+    - hyper: mu, tau and the coefficients b with mean, sd, interval, rhat,
+    - outlier: the effects row of `focus` as a dict,
+    - draws: {'theta', 'mu', 'tau', 'beta'} with chains stacked.
+    """
+    stats = sufficient_stats(df, exog, post, y)
+    names = stats['names']
+    seeds = np.random.SeedSequence(seed).generate_state(n_chains)
+    tasks = [(stats, n_draws, burn, thin, prior_scale, int(s)) for s in seeds]
+    n_jobs = n_jobs or min(n_chains, os.cpu_count() or 1)
+    if n_jobs == 1:
+        chains = [_run_chain(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            chains = list(pool.map(_run_chain, tasks))
+
+    theta_c = np.stack([c['theta'] for c in chains])
+    mu_c = np.stack([c['mu'] for c in chains])
+    tau_c = np.sqrt(np.stack([c['tau2'] for c in chains]))
+    beta_c = np.stack([c['beta'] for c in chains])
+    theta, mu, tau = (a.reshape((-1,) + a.shape[2:]) for a in (theta_c, mu_c, tau_c))
+    beta = beta_c.reshape(-1, beta_c.shape[-1])
+
+    q = [(1 - level) / 2, (1 + level) / 2]
+    ranks = theta.argsort(axis=1).argsort(axis=1) + 1
+    effects = pd.DataFrame({
+        'country': names,
+        'mean': theta.mean(axis=0),
+        'sd': theta.std(axis=0, ddof=1),
+        'lower': np.quantile(theta, q[0], axis=0),
+        'upper': np.quantile(theta, q[1], axis=0),
+        'p_below_mean': (theta < mu[:, None]).mean(axis=0),
+        'p_outlier': (np.abs(theta - mu[:, None]) > k * tau[:, None]).mean(axis=0),
+        'p_lowest': (ranks == 1).mean(axis=0),
+        'p_highest': (ranks == len(names)).mean(axis=0),
+        'mean_rank': ranks.mean(axis=0),
+        'rhat': split_rhat(theta_c),
+    })
+
+    hyper_draws = np.column_stack([mu, tau, beta])
+    hyper_chains = np.concatenate([mu_c[..., None], tau_c[..., None], beta_c], axis=-1)
+    hyper = pd.DataFrame({
+        'parameter': ['mu', 'tau'] + stats['exog'],
+        'mean': hyper_draws.mean(axis=0),
+        'sd': hyper_draws.std(axis=0, ddof=1),
+        'lower': np.quantile(hyper_draws, q[0], axis=0),
+        'upper': np.quantile(hyper_draws, q[1], axis=0),
+        'rhat': split_rhat(hyper_chains),
+    })
+    outlier = effects.set_index('country').loc[focus].to_dict() if focus in names else None
+    return {'effects': effects, 'hyper': hyper, 'outlier': outlier,
+            'draws': {'theta': theta, 'mu': mu, 'tau': tau, 'beta': beta},
+            'n_draws': len(mu), 'k': k}
@@ -0,0 +1,298 @@
+"""
+Multiple imputation of the panel with Rubin's-rules pooling.
+
+Every script drops rows missing any key variable. peace_index is missing
+before 2008 for every destination and for every year in the Maldives, and
+exchange_rate (hence RER) is missing in 1995-1999. Those rows and the whole
+Maldives series never reach Models A-F. This module fills them by chained
+equations (MICE) and pools the model estimates across M completed panels.
+
+Imputation model, per variable (peace_index, ln_exchange_rate,
+ln_arrivals), one Gibbs sweep at a time:
+- predictors are destination intercepts and destination-specific linear
+  trends (the panel structure), covid_dummy, the fully observed ln_cpi,
+  ln_gdp_china and ln_cpi_china, and the current values of the other
+  imputed variables,
+- destinations with no observed values of the variable (Maldives for
+  peace_index) get no intercept or trend of their own and are imputed from
+  the pooled part of the model,
+- missing cells are drawn from the posterior predictive of a Bayesian
+  normal regression (sigma^2 and then the coefficients are drawn before the
+  residual), so between-imputation variance reflects parameter uncertainty.
+RER is not imputed. It is rebuilt as exchange_rate * CPI_destination /
+CPI_china (passive imputation), which keeps the identity exact.
+Imputed arrivals help predict the covariates but are dropped before
+estimation (multiple imputation then deletion), so the outcome is never
+made up.
+
+Each imputation is an independent chain. Chains run on a process pool whose
+workers receive the observed panel once through the pool initializer. Tasks
+carry only a seed, and workers return the imputed cells and the model
+coefficients and covariances, never a completed panel. Memory is therefore
+one copy of the observed data per worker plus M x (missing cells).
+
+Pooling (Rubin 1987; Barnard-Rubin degrees of freedom):
+    Qbar = mean_m Q_m,  Ubar = mean_m U_m,  B = cov_m(Q_m),
+    T = Ubar + (1 + 1/M) B.
+
+Usage:
+    from tourism.imputation import multiple_imputation
+    res = multiple_imputation(n_imputations=20, start_year=2000)
+    res['table'][res['table']['model'] == 'F']
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import PLACEBO_COUNTRIES, fit_model, load_panel, prepare_panel
+
+MI_MODELS = ['A', 'B', 'C', 'D', 'E', 'F']
+
+# Chained-equation variables: (transformed name, raw column, log scale)
+IMPUTED = [
+    ('peace_index', 'peace_index', False),
+    ('ln_exchange_rate', 'exchange_rate', True),
+    ('ln_arrivals', 'arrivals_from_china', True),
+]
+
+# Observed panel and settings, set once per worker by _init_worker
+_SHARED = {}
+
+
+# ==========================================
+# CHAINED EQUATIONS
+# ==========================================
+def _observed_arrays(raw, countries, start_year, end_year):
+    """Balanced (country, year) frame and the arrays the chains work on."""
+    years = np.arange(start_year, end_year + 1)
+    index = pd.MultiIndex.from_product([countries, years], names=['Country', 'Year'])
+    panel = raw.set_index(['Country', 'Year']).reindex(index).reset_index()
+
+    aux = np.column_stack([
+        np.log(panel['CPI_destination']), np.log(panel['gdp_china']),
+        np.log(panel['CPI_china']),
+        ((panel['Year'] >= 2020) & (panel['Year'] <= 2021)).astype(float),
+    ])
+    if np.isnan(aux).any():
+        raise ValueError("CPI_destination, gdp_china and CPI_china must be fully observed")
+    values = np.column_stack([np.log(panel[col]) if log else panel[col]
+                              for _, col, log in IMPUTED]).astype(float)
+
+    # Destination intercepts and centred trends, one column per destination
+    codes = pd.Categorical(panel['Country'], categories=countries).codes
+    D = np.zeros((len(panel), len(countries)))
+    D[np.arange(len(panel)), codes] = 1.0
+    trend = (panel['Year'].values - years.mean())[:, None] * D
+    return panel[['Country', 'Year']], values, np.isnan(values), aux, D, trend
+
+
+def _draw_regression(X, y, rng, ridge=1e-8):
+    """One posterior draw of (beta, sigma) for y = X beta + e under a flat prior."""
+    n, k = X.shape
+    XtX = X.T @ X + ridge * np.eye(k)
+    L = np.linalg.cholesky(XtX)
+    beta_hat = np.linalg.solve(XtX, X.T @ y)
+    resid = y - X @ beta_hat
+    dof = max(n - k, 1)
+    sigma = np.sqrt(resid @ resid / rng.chisquare(dof))
+    # beta ~ N(beta_hat, sigma^2 (X'X)^-1) via the Cholesky factor of X'X
+    beta = beta_hat + sigma * np.linalg.solve(L.T, rng.standard_normal(k))
+    return beta, sigma
+
+
+def impute_chain(values, missing, aux, D, trend, n_iter=10, seed=0):
+    """
+    One MICE chain. values (n, p) with NaN where missing. Returns the
+    completed array after `n_iter` sweeps.
+    """
+    rng = np.random.default_rng(seed)
+    current = values.copy()
+    p = values.shape[1]
+    # Start from destination means (overall mean where a destination has none)
+    for j in range(p):
+        col = values[:, j]
+        overall = np.nanmean(col)
+        counts = D[~missing[:, j]].sum(axis=0)
+        sums = D[~missing[:, j]].T @ col[~missing[:, j]]
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), overall)
+        current[missing[:, j], j] = (D @ means)[missing[:, j]]
+
+    order = np.argsort(missing.sum(axis=0))
+    for _ in range(n_iter):
+        for j in order:
+            miss = missing[:, j]
+            if not miss.any():
+                continue
+            obs = ~miss
+            # Own intercept and trend only for destinations observed at least twice
+            has = D[obs].sum(axis=0) >= 2
+            others = np.delete(current, j, axis=1)
+            X = np.column_stack([np.ones(len(current)), D[:, has][:, 1:], trend[:, has],
+                                 aux, others])
+            # Drop columns constant over the observed rows (unidentified there)
+            keep = np.ptp(X[obs], axis=0) > 0
+            keep[0] = True
+            X = X[:, keep]
+            beta, sigma = _draw_regression(X[obs], current[obs, j], rng)
+            current[miss, j] = X[miss] @ beta + sigma * rng.standard_normal(miss.sum())
+    return current
+
+
+def completed_raw(observed_raw, values):
+    """Raw-scale frame with imputed cells filled and RER rebuilt from its identity."""
+    out = observed_raw.copy()
+    for j, (_, col, log) in enumerate(IMPUTED):
+        out[col] = np.exp(values[:, j]) if log else values[:, j]
+    out['RER'] = out['exchange_rate'] * out['CPI_destination'] / out['CPI_china']
+    return out
+
+
+# ==========================================
+# WORKERS
+# ==========================================
+def _init_worker(shared):
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+
+def _run_imputation(seed):
+    """Impute once and fit the models. Returns the imputed cells and estimates."""
+    s = _SHARED
+    values = impute_chain(s['values'], s['missing'], s['aux'], s['D'], s['trend'],
+                          s['n_iter'], seed)
+    raw = completed_raw(s['observed_raw'], values)
+    # Multiple imputation then deletion: imputed outcomes are not analysed
+    raw.loc[s['missing'][:, s['outcome']], 'arrivals_from_china'] = np.nan
+    panel = prepare_panel(raw, countries=s['countries'], start_year=s['start_year'],
+                          end_year=s['end_year'])
+    fits = {}
+    for model in s['models']:
+        res = fit_model(panel, model, cov_type=s['cov_type'])
+        fits[model] = (res.params.values, res.cov.values, list(res.params.index),
+                       int(res.nobs), float(res.df_resid))
+    return values[s['missing']], fits
+
+
+# ==========================================
+# RUBIN'S RULES
+# ==========================================
+def rubin_pool(estimates, covariances, df_complete):
+    """
+    Pool M estimates (M, k) and covariances (M, k, k).
+
+    Returns a dict with coef, cov (total T), within, between, riv (relative
+    increase in variance), fmi (fraction of missing information) and df
+    (Barnard-Rubin), the last four per coefficient.
+    """
+    Q = np.asarray(estimates)
+    U = np.asarray(covariances)
+    M = len(Q)
+    qbar = Q.mean(axis=0)
+    ubar = U.mean(axis=0)
+    B = np.cov(Q, rowvar=False, ddof=1).reshape(len(qbar), len(qbar)) if M > 1 \
+        else np.zeros_like(ubar)
+    T = ubar + (1 + 1 / M) * B
+
+    b, u, t = np.diag(B), np.diag(ubar), np.diag(T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        riv = (1 + 1 / M) * b / u
+        lam = np.where(t > 0, (1 + 1 / M) * b / t, 0.0)
+        df_old = np.where(lam > 0, (M - 1) / lam ** 2, np.inf)
+        df_obs = (df_complete + 1) / (df_complete + 3) * df_complete * (1 - lam)
+        df = np.where(np.isinf(df_old), df_obs, df_old * df_obs / (df_old + df_obs))
+        fmi = np.where(np.isinf(df_old), 0.0, (riv + 2 / (df + 3)) / (riv + 1))
+    return {'coef': qbar, 'cov': T, 'within': u, 'between': b, 'riv': riv, 'fmi': fmi,
+            'df': df}
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+@timed('multiple imputation', 'model')
+def multiple_imputation(df=None, n_imputations=20, models=MI_MODELS,
+                        countries=PLACEBO_COUNTRIES, start_year=2008, end_year=2024,
+                        n_iter=10, n_jobs=None, cov_type='clustered', level=0.95, seed=0):
+    """
+    Impute the panel M times, fit `models` on every completed panel and
+    pool with Rubin's rules.
+
+    Parameters
+    ----------
+    df : raw panel (default: Primary_Dataset_For_Panel_FINAL.csv)
+    n_imputations : number of completed panels M
+    countries, start_year, end_year : estimation sample; the default keeps
+        the Maldives, which complete-case analysis drops entirely
+    n_iter : Gibbs sweeps per chain
+    n_jobs : worker processes (default: min(M, CPUs)); 1 runs in-process
+
+    Returns a dict with
+    - table: model, variable, coef, std_error, within_se, between_se, riv,
+      fmi, df, t, pvalue, lower, upper, coef_cc and std_error_cc (the
+      complete-case fit),
+    - nobs: per model, rows analysed after imputation vs complete case,
+    - imputations: Country, Year, variable and one column per imputation
+      for every imputed cell (raw scale).
+    """
+    raw = load_panel() if df is None else df
+    raw = raw[raw['Country'].isin(countries) & raw['Year'].between(start_year, end_year)]
+    keys, values, missing, aux, D, trend = _observed_arrays(raw, list(countries),
+                                                            start_year, end_year)
+    observed_raw = raw.set_index(['Country', 'Year']).reindex(
+        pd.MultiIndex.from_frame(keys)).reset_index()
+    shared = {'observed_raw': observed_raw, 'values': values,
+              'missing': missing, 'aux': aux, 'D': D, 'trend': trend, 'n_iter': n_iter,
+              'outcome': [name for name, _, _ in IMPUTED].index('ln_arrivals'),
+              'countries': list(countries), 'start_year': start_year, 'end_year': end_year,
+              'models': list(models), 'cov_type': cov_type}
+
+    seeds = np.random.SeedSequence(seed).generate_state(n_imputations)
+    n_jobs = n_jobs or min(n_imputations, os.cpu_count() or 1)
+    if n_jobs == 1:
+        _init_worker(shared)
+        results = [_run_imputation(int(s)) for s in seeds]
+    else:
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker,
+                                 initargs=(shared,)) as pool:
+            results = list(pool.map(_run_imputation, [int(s) for s in seeds]))
+
+    complete_case = prepare_panel(raw, countries=countries, start_year=start_year,
+                                  end_year=end_year)
+    tables, nobs = [], []
+    for model in models:
+        params = np.array([r[1][model][0] for r in results])
+        covs = np.array([r[1][model][1] for r in results])
+        names, n_mi, df_com = results[0][1][model][2:]
+        pooled = rubin_pool(params, covs, df_com)
+        cc = fit_model(complete_case, model, cov_type=cov_type)
+        se = np.sqrt(np.diag(pooled['cov']))
+        tstat = pooled['coef'] / se
+        crit = stats.t.ppf(0.5 + level / 2, pooled['df'])
+        tables.append(pd.DataFrame({
+            'model': model, 'variable': names, 'coef': pooled['coef'], 'std_error': se,
+            'within_se': np.sqrt(pooled['within']), 'between_se': np.sqrt(pooled['between']),
+            'riv': pooled['riv'], 'fmi': pooled['fmi'], 'df': pooled['df'], 't': tstat,
+            'pvalue': 2 * stats.t.sf(np.abs(tstat), pooled['df']),
+            'lower': pooled['coef'] - crit * se, 'upper': pooled['coef'] + crit * se,
+            'coef_cc': cc.params.reindex(names).values,
+            'std_error_cc': cc.std_errors.reindex(names).values,
+        }))
+        nobs.append({'model': model, 'nobs_mi': n_mi, 'nobs_cc': int(cc.nobs)})
+
+    rows, cols = np.nonzero(missing)
+    imputations = pd.DataFrame({
+        'Country': keys['Country'].values[rows],
+        'Year': keys['Year'].values[rows],
+        'variable': [IMPUTED[c][1] for c in cols],
+    })
+    draws = np.column_stack([r[0] for r in results])
+    log_cols = np.array([IMPUTED[c][2] for c in cols])
+    draws[log_cols] = np.exp(draws[log_cols])
+    for m in range(n_imputations):
+        imputations[f'm{m}'] = draws[:, m]
+    return {'table': pd.concat(tables, ignore_index=True), 'nobs': pd.DataFrame(nobs),
+            'imputations': imputations}
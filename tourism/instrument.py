@@ -0,0 +1,255 @@
+"""
+Stage-level timing and memory instrumentation.
+
+Records wall-clock time, CPU time and peak RSS for each pipeline stage
+(load, filter, feature engineering, model fits, diagnostics, figures) and
+writes one JSON file per run. The file is in Chrome trace-event format
+("traceEvents"), so it opens directly in chrome://tracing or Perfetto, and
+also carries a flat "stages" list that is easy to load with pandas and
+compare across runs.
+
+Usage in a script:
+
+    from tourism.instrument import start_run, stage, end_run
+
+    start_run('running_panel_data_regression')
+    with stage('load'):
+        df = pd.read_csv(data_path)
+    ...
+    end_run()     # writes traces/running_panel_data_regression_<timestamp>.json
+
+Top-level scripts that are one long sequence of sections can use
+begin('section') / end() instead of re-indenting code under `with`.
+Functions can be decorated with @timed('name'); when no run is active the
+decorator and stage() add no overhead beyond a None check.
+"""
+
+import functools
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_DIR_ENV = 'TOURISM_TRACE_DIR'
+
+
+# ==========================================
+# MEMORY PROBES
+# ==========================================
+def peak_rss_mb():
+    """High-water mark of the process resident set size, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def current_rss_mb():
+    """Current resident set size in MB (Linux only, None elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# ==========================================
+# TRACER
+# ==========================================
+class Tracer:
+    """Collects nested stage records for one run."""
+
+    def __init__(self, run_name, out_dir=None):
+        self.run_name = run_name
+        self.out_dir = out_dir
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self._open = []
+        self.records = []
+
+    def begin(self, name, category='stage', **args):
+        self._open.append({
+            'name': name,
+            'category': category,
+            'args': args,
+            'depth': len(self._open),
+            'wall0': time.perf_counter(),
+            'cpu0': time.process_time(),
+            'rss0': current_rss_mb(),
+        })
+
+    def end(self):
+        entry = self._open.pop()
+        wall1 = time.perf_counter()
+        rss1 = current_rss_mb()
+        peak = peak_rss_mb()
+        self.records.append({
+            'name': entry['name'],
+            'category': entry['category'],
+            'depth': entry['depth'],
+            'start_s': entry['wall0'] - self._t0,
+            'wall_s': wall1 - entry['wall0'],
+            'cpu_s': time.process_time() - entry['cpu0'],
+            'rss_mb': rss1,
+            'rss_delta_mb': (rss1 - entry['rss0']) if rss1 is not None and entry['rss0'] is not None else None,
+            'peak_rss_mb': peak,
+            'args': entry['args'],
+        })
+
+    @contextmanager
+    def stage(self, name, category='stage', **args):
+        self.begin(name, category, **args)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def to_dict(self):
+        pid = os.getpid()
+        events = [{
+            'name': r['name'],
+            'cat': r['category'],
+            'ph': 'X',
+            'ts': round(r['start_s'] * 1e6, 3),
+            'dur': round(r['wall_s'] * 1e6, 3),
+            'pid': pid,
+            'tid': 0,
+            'args': dict(r['args'], cpu_s=r['cpu_s'], rss_mb=r['rss_mb'],
+                         peak_rss_mb=r['peak_rss_mb']),
+        } for r in sorted(self.records, key=lambda r: r['start_s'])]
+
+        return {
+            'run': self.run_name,
+            'started': self.started.isoformat(timespec='seconds'),
+            'total_wall_s': time.perf_counter() - self._t0,
+            'peak_rss_mb': peak_rss_mb(),
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'argv': sys.argv,
+            'stages': sorted(self.records, key=lambda r: r['start_s']),
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+        }
+
+    def write(self, path=None):
+        """Write the trace; default path is <out_dir>/<run>_<timestamp>.json."""
+        while self._open:
+            self.end()
+        if path is None:
+            out_dir = self.out_dir or os.environ.get(TRACE_DIR_ENV) or os.path.join(os.getcwd(), 'traces')
+            os.makedirs(out_dir, exist_ok=True)
+            stamp = self.started.strftime('%Y%m%d_%H%M%S')
+            path = os.path.join(out_dir, f'{self.run_name}_{stamp}.json')
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+        return path
+
+    def summary(self, top=15):
+        """Text table of the slowest top-level-or-nested stages."""
+        lines = [f"{'Stage':<45} {'Wall (s)':>10} {'CPU (s)':>10} {'Peak RSS (MB)':>14}",
+                 '-' * 82]
+        for r in sorted(self.records, key=lambda r: r['wall_s'], reverse=True)[:top]:
+            label = ('  ' * r['depth'] + r['name'])[:45]
+            peak = f"{r['peak_rss_mb']:.1f}" if r['peak_rss_mb'] is not None else 'n/a'
+            lines.append(f"{label:<45} {r['wall_s']:>10.3f} {r['cpu_s']:>10.3f} {peak:>14}")
+        return '\n'.join(lines)
+
+
+# ==========================================
+# MODULE-LEVEL ACTIVE RUN
+# ==========================================
+_active = None
+
+
+def start_run(run_name, out_dir=None):
+    """Start collecting stages for this process; returns the Tracer."""
+    global _active
+    _active = Tracer(run_name, out_dir)
+    return _active
+
+
+def active_tracer():
+    return _active
+
+
+def end_run(path=None, verbose=True):
+    """Write the active run's trace file and stop collecting."""
+    global _active
+    if _active is None:
+        return None
+    tracer, _active = _active, None
+    out = tracer.write(path)
+    if verbose:
+        print("\n" + "=" * 80)
+        print("STAGE TIMINGS")
+        print("=" * 80)
+        print(tracer.summary())
+        print(f"\n✓ Trace saved to: {out}")
+    return out
+
+
+@contextmanager
+def stage(name, category='stage', **args):
+    """Time a block under the active run (no-op when no run is active)."""
+    if _active is None:
+        yield None
+        return
+    with _active.stage(name, category, **args) as tracer:
+        yield tracer
+
+
+def begin(name, category='stage', **args):
+    if _active is not None:
+        _active.begin(name, category, **args)
+
+
+def end():
+    if _active is not None and _active._open:
+        _active.end()
+
+
+def timed(name=None, category='stage'):
+    """Decorator form of stage(); the stage name defaults to the function name."""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(label, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def load_trace(path):
+    """Read a trace file back; returns the parsed dict."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_traces(*paths):
+    """
+    Wall-clock seconds per stage across several runs (one column per run),
+    for spotting which stage dominates as the panel grows.
+    """
+    import pandas as pd
+
+    columns = {}
+    for path in paths:
+        trace = load_trace(path)
+        stages = pd.DataFrame(trace['stages'])
+        label = f"{trace['run']} {trace['started']}"
+        columns[label] = stages.groupby('name')['wall_s'].sum()
+    return pd.DataFrame(columns)
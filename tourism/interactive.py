@@ -0,0 +1,342 @@
+"""
+Interactive fixed effects (Bai 2009) for the Model A-F designs.
+
+The PanelOLS fits absorb destination (and in Models B/E year) effects
+additively. A common shock that hits destinations with different
+intensities (COVID, the Chinese outbound cycle) is left in the residual
+and is correlated with the regressors. The interactive-effects model
+
+    y_it = x_it' b + a_i (+ d_t) + lambda_i' f_t + e_it
+
+lets r unobserved common factors f_t load on each destination with its own
+lambda_i. It is estimated by alternating least squares on the
+destination x year grid:
+
+- factor step: given b, the residual matrix W = Y - X b gives the
+  additive effects (row means, plus column means with year effects).
+  The top r singular vectors of W net of its two-way means give F
+  (normalized F'F / T = I) and Lambda = W F / T. For small grids this is
+  a full SVD. Larger grids use a randomized truncated SVD
+  (Halko-Martinsson-Tropp) whose range finder is seeded with the previous
+  iteration's F, so one power iteration per step is enough,
+- coefficient step: on a balanced grid, Bai's step b = (sum_i X_i' M X_i)^-1
+  sum_i X_i' M y_i, with the loadings and additive effects profiled out
+  given F. The cross-products of the demeaned data are computed once, so
+  a step only costs the F projections. Unbalanced grids use
+  b = (X'X)^-1 X'(y - additive - Lambda F') over the observed cells.
+
+The two-step map is accelerated with SQUAREM (Varadhan-Roland 2008),
+falling back to the plain step whenever the extrapolation raises the sum
+of squared residuals. Missing cells are filled with the current fit (EM),
+so unbalanced grids work too. The number of factors is chosen by the Bai-Ng
+(2002) IC_p1 / IC_p2 / IC_p3 criteria over r = 0..max_factors. Each r is
+warm-started from the r - 1 solution, and a fit can be warm-started from a
+previous result (init=), which keeps specification searches cheap.
+
+The constant is dropped: destination effects absorb it. The loadings are
+centred across destinations (Lambda' 1 = 0, Bai 2009, Section 7). Without
+that, a factor with equal loadings reproduces any regressor that only
+varies over years (ln_gdp_china, covid_dummy, post_covid), and its
+coefficient is not identified. So the factors describe how each
+destination deviates from the average response to the common shocks, and
+the year-only regressors are identified from the cross-destination mean.
+Standard errors follow Bai (2009), Theorem 3: Z_i = M_F X_i - sum_k a_ik
+M_F X_k / N, which is M_F X M_Lambda on the grid, sandwiched as
+unadjusted, robust or clustered by destination. The asymptotic bias terms
+are not corrected.
+
+Usage:
+    from tourism.interactive import fit_ife, compare_models
+    from tourism.pipeline import PLACEBO_COUNTRIES, prepare_panel
+    df = prepare_panel(countries=PLACEBO_COUNTRIES)
+    res = fit_ife(df, 'D')              # r chosen by IC_p2
+    res['table'], res['criteria'], res['factors']
+    compare_models(df, ['A', 'C', 'D', 'F'])
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import MODEL_SPECS, panel_grid
+
+CRITERIA = ['icp1', 'icp2', 'icp3']
+
+
+# ==========================================
+# FACTOR STEP
+# ==========================================
+def _additive(W, time_effects):
+    """Destination (and year) means of W as an (N, T) matrix."""
+    A = np.broadcast_to(W.mean(axis=1, keepdims=True), W.shape)
+    if time_effects:
+        A = A + W.mean(axis=0, keepdims=True) - W.mean()
+    return A
+
+
+def _factors(W, r, F0=None, svd='auto', rng=None, oversample=5, n_power=1):
+    """
+    Top-r factors of W (N, T): Lambda (N, r) and F (T, r) with F'F / T = I,
+    W ~ Lambda F'. svd is 'exact', 'randomized' or 'auto' (randomized when
+    min(N, T) > 100). F0 seeds the randomized range finder.
+    """
+    N, T = W.shape
+    if r == 0:
+        return np.zeros((N, 0)), np.zeros((T, 0))
+    if svd == 'exact' or (svd == 'auto' and min(N, T) <= 100):
+        V = np.linalg.svd(W, full_matrices=False)[2][:r].T
+    else:
+        rng = rng if rng is not None else np.random.default_rng(0)
+        omega = rng.standard_normal((T, min(r + oversample, T)))
+        if F0 is not None and F0.shape[1]:
+            m = min(F0.shape[1], omega.shape[1])
+            omega[:, :m] = F0[:, :m]
+        Q = np.linalg.qr(W @ omega)[0]
+        for _ in range(n_power):
+            Q = np.linalg.qr(W @ np.linalg.qr(W.T @ Q)[0])[0]
+        V = np.linalg.svd(Q.T @ W, full_matrices=False)[2][:r].T
+    F = np.sqrt(T) * V
+    Lam = W @ F / T
+    sign = np.where(Lam.sum(axis=0) < 0, -1.0, 1.0)
+    return Lam * sign, F * sign
+
+
+# ==========================================
+# ALTERNATING LEAST SQUARES
+# ==========================================
+def _solve(Y, X, obs, r, time_effects, beta0, state=None, svd='auto', accelerate=True,
+           tol=1e-9, max_iter=5000, rng=None):
+    """
+    Interactive-effects fit with r factors on the grid. Y (N, T), X
+    (N, T, k), obs (N, T) bool. Returns beta, the fitted additive + factor
+    matrix L, Lambda, F, SSR, iterations and a converged flag.
+    """
+    N, T = Y.shape
+    Xo, yo = X[obs], Y[obs]
+    P = np.linalg.pinv(Xo.T @ Xo)
+    balanced = bool(obs.all())
+    if balanced:
+        # Cross-destination deviations carry the factors; with no year
+        # effects the cross-destination means identify b as well.
+        Xt, yt = X - X.mean(axis=0), Y - Y.mean(axis=0)
+        Xt, yt = Xt - Xt.mean(axis=1, keepdims=True), yt - yt.mean(axis=1, keepdims=True)
+        A0, c0 = np.einsum('itk,itl->kl', Xt, Xt), np.einsum('itk,it->k', Xt, yt)
+        if not time_effects:
+            Xb, yb = X.mean(axis=0), Y.mean(axis=0)
+            Xb, yb = Xb - Xb.mean(axis=0), yb - yb.mean()
+            A0, c0 = A0 + N * Xb.T @ Xb, c0 + N * Xb.T @ yb
+    state = dict(state or {})
+    if 'L' not in state:
+        state['L'] = np.zeros_like(Y)
+    F = state.get('F')
+    state['F'] = F[:, :r] if F is not None and F.shape[1] >= r else F
+
+    def fitted(W, F0):
+        Lam, F = _factors(W - _additive(W, True), r, F0, svd, rng)
+        return Lam, F, _additive(W, time_effects) + Lam @ F.T
+
+    def step(beta, st):
+        W = np.where(obs, Y - X @ beta, st['L'])
+        Lam, F, L = fitted(W, st.get('F'))
+        if balanced:
+            # Bai's step: b given F, loadings and additive effects profiled out
+            XF, yF = np.einsum('itk,tr->irk', Xt, F), yt @ F
+            beta_new = np.linalg.lstsq(A0 - np.einsum('irk,irl->kl', XF, XF) / T,
+                                       c0 - np.einsum('irk,ir->k', XF, yF) / T, rcond=None)[0]
+            R = yt - Xt @ beta_new
+            R = R - (R @ F) @ F.T / T
+            ssr = float((R * R).sum())
+            if not time_effects:
+                ssr += N * float(np.sum((yb - Xb @ beta_new) ** 2))
+        else:
+            beta_new = P @ (Xo.T @ (yo - L[obs]))
+            e = yo - Xo @ beta_new - L[obs]
+            ssr = float(e @ e)
+        return beta_new, {'L': L, 'F': F, 'Lam': Lam, 'ssr': ssr}
+
+    beta = np.asarray(beta0, dtype=float)
+    converged = False
+    for it in range(1, max_iter + 1):
+        b1, s1 = step(beta, state)
+        if accelerate:
+            b2, s2 = step(b1, s1)
+            d1, d2 = b1 - beta, b2 - 2 * b1 + beta
+            nv = np.linalg.norm(d2)
+            if nv > 0:
+                alpha = min(-np.linalg.norm(d1) / nv, -1.0)
+                b3, s3 = step(beta - 2 * alpha * d1 + alpha ** 2 * d2, s2)
+                if s3['ssr'] <= s2['ssr']:
+                    b2, s2 = b3, s3
+            b1, s1 = b2, s2
+        done = np.max(np.abs(b1 - beta)) < tol * (1 + np.max(np.abs(beta), initial=0.0))
+        beta, state = b1, s1
+        if done:
+            converged = True
+            break
+    if balanced:
+        state['Lam'], state['F'], state['L'] = fitted(Y - X @ beta, state['F'])
+    return {'beta': beta, 'L': state['L'], 'Lam': state['Lam'], 'F': state['F'],
+            'ssr': state['ssr'], 'iterations': it, 'converged': converged}
+
+
+def _penalties(N, T):
+    """Bai-Ng (2002) penalty per factor for IC_p1, IC_p2, IC_p3."""
+    NT, C2 = N * T, min(N, T)
+    return {'icp1': (N + T) / NT * np.log(NT / (N + T)),
+            'icp2': (N + T) / NT * np.log(C2),
+            'icp3': np.log(C2) / C2}
+
+
+def _covariance(X, E, obs, Lam, F, time_effects, cov_type, df_resid):
+    """Bai (2009) sandwich for beta from the grid (missing cells zeroed)."""
+    N, T, k = X.shape
+    Xd = np.where(obs[..., None], X, 0.0)
+    Xd = Xd - Xd.mean(axis=1, keepdims=True)
+    if time_effects:
+        Xd = Xd - Xd.mean(axis=0, keepdims=True)
+    MX = Xd - np.einsum('tr,sr,isk->itk', F, F, Xd) / T
+    if Lam.shape[1]:
+        H = Lam @ np.linalg.pinv(Lam.T @ Lam) @ Lam.T
+        Z = MX - np.einsum('ij,jtk->itk', H, MX)
+    else:
+        Z = MX
+    Z = np.where(obs[..., None], Z, 0.0)
+    E = np.where(obs, E, 0.0)
+    Dinv = np.linalg.pinv(np.einsum('itk,itl->kl', Z, Z))
+    if cov_type == 'unadjusted':
+        return float((E * E).sum()) / df_resid * Dinv
+    if cov_type == 'robust':
+        s = Z * E[..., None]
+        meat = np.einsum('itk,itl->kl', s, s)
+    elif cov_type == 'clustered':
+        s = np.einsum('itk,it->ik', Z, E)
+        meat = N / (N - 1) * s.T @ s
+    else:
+        raise ValueError(f"Unknown cov_type: {cov_type}")
+    out = Dinv @ meat @ Dinv
+    return (out + out.T) / 2
+
+
+# ==========================================
+# PUBLIC API
+# ==========================================
+def _spec(model):
+    return MODEL_SPECS[model] if isinstance(model, str) else model
+
+
+@timed('interactive fixed effects', 'model')
+def fit_ife(df, model='A', n_factors=None, max_factors=3, criterion='icp2',
+            cov_type='clustered', svd='auto', accelerate=True, tol=1e-9, max_iter=5000,
+            init=None, y='ln_arrivals', entity='Country', time='Year', seed=0):
+    """
+    Bai (2009) interactive fixed effects for one Model A-F design.
+
+    Parameters
+    ----------
+    df : prepared panel (tourism.pipeline.prepare_panel)
+    model : key of MODEL_SPECS, or a spec dict with 'exog' and 'time_effects'
+    n_factors : fixed number of factors; None chooses it by `criterion`
+        ('icp1', 'icp2' or 'icp3') over 0..max_factors
+    cov_type : 'unadjusted', 'robust' or 'clustered' (by destination)
+    svd : 'exact', 'randomized' or 'auto' for the factor step
+    accelerate : SQUAREM extrapolation of the alternating map
+    init : a previous fit_ife result to warm-start from (its factors, and
+        its coefficients when the regressors match)
+
+    Returns a dict with params, cov, table (variable, coef, std_error, t,
+    pvalue, lower, upper), n_factors, criteria (one row per r with sigma2,
+    the IC values and iterations), factors (years x r), loadings
+    (destinations x r), iterations, converged, n_obs, df_resid, ssr and
+    the (beta, F, L) state for warm starts.
+    """
+    spec = _spec(model)
+    exog = [c for c in spec['exog'] if c != 'const']
+    time_effects = spec.get('time_effects', False)
+    names, years, grid = panel_grid(df, [y] + exog, entity, time)
+    Y = grid[y]
+    X = np.stack([grid[c] for c in exog], axis=-1)
+    obs = ~np.isnan(Y)
+    X = np.where(obs[..., None], X, 0.0)
+    N, T = Y.shape
+    n_obs = int(obs.sum())
+    rng = np.random.default_rng(seed)
+
+    ranks = [n_factors] if n_factors is not None else range(max_factors + 1)
+    if max(ranks) >= min(N, T) - 1:
+        raise ValueError(f"At most {min(N, T) - 2} factors on a {N} x {T} grid")
+    state, beta = {}, None
+    if init is not None:
+        state = {'F': init['F'], 'L': init['L']} if init['L'].shape == Y.shape else {}
+        if list(init['params'].index) == exog:
+            beta = init['beta']
+    if beta is None:
+        beta = np.linalg.lstsq(X[obs], Y[obs], rcond=None)[0]
+
+    fits, rows = {}, []
+    pen = _penalties(N, T)
+    for r in ranks:
+        fit = _solve(Y, X, obs, r, time_effects, beta, state, svd, accelerate, tol, max_iter, rng)
+        fits[r] = fit
+        beta, state = fit['beta'], {'F': fit['F'], 'L': fit['L']}
+        sigma2 = fit['ssr'] / n_obs
+        row = {'n_factors': r, 'sigma2': sigma2, 'iterations': fit['iterations']}
+        row.update({c: np.log(sigma2) + r * pen[c] for c in CRITERIA})
+        rows.append(row)
+    criteria = pd.DataFrame(rows).set_index('n_factors')
+    r = n_factors if n_factors is not None else int(criteria[criterion].idxmin())
+    fit = fits[r]
+
+    df_resid = n_obs - len(exog) - N - (T - 1 if time_effects else 0) - r * (N + T - r)
+    E = Y - X @ fit['beta'] - fit['L']
+    cov = _covariance(X, E, obs, fit['Lam'], fit['F'], time_effects, cov_type, max(df_resid, 1))
+    params = pd.Series(fit['beta'], index=exog, name='coef')
+    with np.errstate(invalid='ignore'):
+        se = np.sqrt(np.diag(cov))
+    t = fit['beta'] / se
+    crit = stats.norm.ppf(0.975)
+    table = pd.DataFrame({
+        'variable': exog,
+        'coef': fit['beta'],
+        'std_error': se,
+        't': t,
+        'pvalue': 2 * stats.norm.sf(np.abs(t)),
+        'lower': fit['beta'] - crit * se,
+        'upper': fit['beta'] + crit * se,
+    })
+    labels = [f'f{j + 1}' for j in range(r)]
+    return {
+        'params': params,
+        'cov': pd.DataFrame(cov, index=exog, columns=exog),
+        'table': table,
+        'n_factors': r,
+        'criterion': criterion if n_factors is None else None,
+        'criteria': criteria,
+        'factors': pd.DataFrame(fit['F'], index=pd.Index(years, name=time), columns=labels),
+        'loadings': pd.DataFrame(fit['Lam'], index=pd.Index(names, name=entity), columns=labels),
+        'iterations': fit['iterations'],
+        'converged': fit['converged'],
+        'n_obs': n_obs,
+        'df_resid': df_resid,
+        'ssr': fit['ssr'],
+        'beta': fit['beta'],
+        'F': fit['F'],
+        'L': fit['L'],
+    }
+
+
+def compare_models(df, models=('A', 'C', 'D', 'F'), **kwargs):
+    """
+    fit_ife for several designs, each warm-started from the previous fit's
+    factors. Returns (coefficients: variable x model, summary: one row per
+    model with n_factors, iterations and converged).
+    """
+    coefs, rows, previous = {}, [], None
+    for model in models:
+        res = fit_ife(df, model, init=previous, **kwargs)
+        coefs[model] = res['params']
+        rows.append({'model': model, 'n_factors': res['n_factors'],
+                     'iterations': res['iterations'], 'converged': res['converged'],
+                     'n_obs': res['n_obs']})
+        previous = res
+    return pd.DataFrame(coefs), pd.DataFrame(rows).set_index('model')
@@ -0,0 +1,247 @@
+"""
+Time-varying-parameter ADL(1,0) by Kalman filtering and smoothing.
+
+run_advanced_analysis.py fits the ADL(1,0)
+
+    ln_arrivals_t = c + rho * ln_arrivals_{t-1} + b1 * ln_gdp_china_t
+                    + b2 * ln_rer_t + b3 * covid_dummy_t + e_t
+
+with constant habit persistence (rho) and RER elasticity (b2) over a sample
+that includes COVID. Here the coefficients follow random walks,
+
+    beta_t = beta_{t-1} + eta_t,    eta_t ~ N(0, sigma2 * diag(q)),
+    e_t ~ N(0, sigma2),
+
+with q = 0 for the coefficients held fixed (by default everything except
+rho and ln_rer). sigma2 is concentrated out of the likelihood, leaving only
+the signal-to-noise ratios q to estimate. They are chosen by a coarse grid
+followed by a finer grid around the best point. Every grid point and every
+destination goes through the filter together: the state arrays carry
+leading (grid, destination) axes and the only Python loop is over years.
+q = 0 is always on the grid, so the constant-coefficient ADL is nested
+(with q = 0 the smoothed coefficients and standard errors match the OLS
+ADL to about 1e-6).
+
+The filter starts from a diffuse prior scaled to each regressor. Observations that still identify a
+new direction of the state (the first k observed years, or the first
+COVID year for covid_dummy) are left out of the likelihood, which makes
+sigma2 the usual RSS / (n - k) when q = 0.
+
+Usage:
+    from tourism.kalman import fit_tvp
+    from tourism.pipeline import load_competitor_panel
+    paths, params = fit_tvp(load_competitor_panel())
+    paths[paths['variable'] == 'lr_ln_rer']
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import ADL_REGRESSORS, add_lags, stack_destinations
+
+TVP_VARYING = ['ln_arrivals_lag1', 'ln_rer']
+
+# Coarse grid of signal-to-noise ratios (0 = constant coefficient). Capped at
+# 1: on 16-25 annual observations larger values let the coefficient path
+# absorb all of the noise (sigma2 -> 0), a degenerate likelihood maximum.
+Q_GRID = np.concatenate([[0.0], 10.0 ** np.arange(-6.0, 0.5, 0.5)])
+
+DIFFUSE = 1e8
+
+
+def _diffuse_steps(X, mask):
+    """Observed rows that raise the rank of the regressors seen so far."""
+    D, T, k = X.shape
+    diffuse = np.zeros((D, T), dtype=bool)
+    for d in range(D):
+        rank = 0
+        for t in np.flatnonzero(mask[d]):
+            r = np.linalg.matrix_rank(X[d, :t + 1][mask[d, :t + 1]])
+            diffuse[d, t] = r > rank
+            rank = r
+            if rank == k:
+                break
+    return diffuse
+
+
+def _prior_variance(X, mask):
+    """Diffuse prior variance for each coefficient, (D, k)."""
+    scale = (X ** 2).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)[:, None]
+    return DIFFUSE / np.where(scale > 0, scale, 1.0)
+
+
+def kalman_filter(Y, X, mask, q, diffuse):
+    """
+    Filter a random-walk-coefficient regression for a batch of models.
+
+    Y (D, T), X (D, T, k), mask (D, T) and diffuse (D, T) come from
+    stack_destinations / _diffuse_steps; q has shape (..., D, k) and holds
+    the state-noise variances relative to sigma2. Returns a dict with the
+    predicted states `a` (..., T, k) and covariances `P` (..., T, k, k),
+    innovations `v`, their variances `F`, gains `K`, the concentrated
+    log-likelihood `loglik` (..., D) and `sigma2` (..., D).
+    """
+    batch = q.shape[:-1]
+    D, T, k = X.shape
+    a = np.zeros(batch + (k,))
+    P0 = _prior_variance(X, mask)
+    P = np.broadcast_to(P0[:, :, None] * np.eye(k), batch + (k, k)).copy()
+    Q = q[..., :, None] * np.eye(k)
+
+    out_a = np.empty(batch + (T, k))
+    out_P = np.empty(batch + (T, k, k))
+    v = np.zeros(batch + (T,))
+    F = np.ones(batch + (T,))
+    K = np.zeros(batch + (T, k))
+    for t in range(T):
+        x = X[:, t]
+        obs = mask[:, t]
+        out_a[..., t, :] = a
+        out_P[..., t, :, :] = P
+
+        Px = np.einsum('...ij,...j->...i', P, x)
+        F_t = np.einsum('...i,...i->...', x, Px) + 1.0
+        v_t = Y[:, t] - np.einsum('...i,...i->...', x, a)
+        K_t = Px / F_t[..., None]
+
+        upd = obs[..., None]
+        a = np.where(upd, a + K_t * v_t[..., None], a)
+        P = np.where(upd[..., None], P - K_t[..., :, None] * Px[..., None, :], P) + Q
+        v[..., t] = np.where(obs, v_t, 0.0)
+        F[..., t] = np.where(obs, F_t, 1.0)
+        K[..., t, :] = np.where(upd, K_t, 0.0)
+
+    used = mask & ~diffuse
+    n = used.sum(axis=1)
+    sigma2 = np.where(used, v ** 2 / F, 0.0).sum(axis=-1) / np.maximum(n, 1)
+    logdet = np.where(used, np.log(F), 0.0).sum(axis=-1)
+    loglik = -0.5 * (n * (np.log(2 * np.pi) + 1 + np.log(sigma2)) + logdet)
+    return {'a': out_a, 'P': out_P, 'v': v, 'F': F, 'K': K,
+            'loglik': loglik, 'sigma2': sigma2}
+
+
+def kalman_smoother(X, mask, filt):
+    """
+    Fixed-interval smoother (backward r / N recursion, no matrix inverses).
+
+    Returns smoothed states (..., T, k) and their covariances (..., T, k, k)
+    in sigma2 units.
+    """
+    a, P, v, F, K = filt['a'], filt['P'], filt['v'], filt['F'], filt['K']
+    D, T, k = X.shape
+    batch = v.shape[:-1]
+    r = np.zeros(batch + (k,))
+    N = np.zeros(batch + (k, k))
+    alpha = np.empty_like(a)
+    V = np.empty_like(P)
+    eye = np.eye(k)
+    for t in range(T - 1, -1, -1):
+        x = X[:, t]
+        obs = mask[:, t]
+        L = eye - K[..., t, :, None] * x[..., None, :]
+        r_new = x * (v[..., t] / F[..., t])[..., None] + np.einsum('...ji,...j->...i', L, r)
+        N_new = (x[..., :, None] * x[..., None, :] / F[..., t, None, None]
+                 + np.einsum('...ji,...jk,...kl->...il', L, N, L))
+        r = np.where(obs[..., None], r_new, r)
+        N = np.where(obs[..., None, None], N_new, N)
+
+        P_t = P[..., t, :, :]
+        alpha[..., t, :] = a[..., t, :] + np.einsum('...ij,...j->...i', P_t, r)
+        V[..., t, :, :] = P_t - np.einsum('...ij,...jk,...kl->...il', P_t, N, P_t)
+    return alpha, V
+
+
+def _search(Y, X, mask, diffuse, idx, grid, refine):
+    """Grid search (then a finer local grid) for the varying coefficients' q."""
+    D, T, k = X.shape
+    points = np.array(list(itertools.product(grid, repeat=len(idx))))
+    q = np.zeros((len(points), D, k))
+    q[:, :, idx] = points[:, None, :]
+    ll = kalman_filter(Y, X, mask, q, diffuse)['loglik']
+    best = q[np.argmax(ll, axis=0), np.arange(D)]
+
+    if refine:
+        steps = 10.0 ** np.linspace(-0.25, 0.25, 5)
+        offsets = np.array(list(itertools.product(steps, repeat=len(idx))))
+        q = np.repeat(best[None], len(offsets) + 1, axis=0)
+        q[1:, :, idx] = best[None, :, idx] * offsets[:, None, :]
+        ll = kalman_filter(Y, X, mask, q, diffuse)['loglik']
+        best = q[np.argmax(ll, axis=0), np.arange(D)]
+    return best
+
+
+@timed('kalman TVP', 'model')
+def fit_tvp(df, y='ln_arrivals', x=ADL_REGRESSORS, varying=TVP_VARYING, entity='Country',
+            time='Year', grid=Q_GRID, refine=True, level=0.95):
+    """
+    Estimate the TVP-ADL for every destination in df and smooth the paths.
+
+    Parameters
+    ----------
+    df : competitor_panel.csv-style frame, or thailand_timeseries.csv (no
+        Country column; treated as a single destination). The lagged
+        dependent variable is added if missing.
+    varying : regressors whose coefficients follow random walks
+    grid : coarse grid of q = Var(eta) / sigma2 values searched for each
+        varying coefficient
+    refine : search a finer grid around the coarse optimum
+
+    Returns (paths, params). `paths` is long: Country, Year, variable, coef,
+    std_error, lower, upper, with smoothed coefficients for every regressor
+    plus `lr_ln_rer` = ln_rer / (1 - rho) with delta-method bands when both
+    are in the model. `params` has one row per destination with sigma2, the
+    estimated q for each varying coefficient, the log-likelihood and nobs.
+    """
+    if 'ln_arrivals_lag1' in x and 'ln_arrivals_lag1' not in df.columns:
+        df = add_lags(df, entity=entity, time=time)
+    names, years, Y, X, mask, columns = stack_destinations(df, y, x, entity, time)
+    D, T, k = X.shape
+    idx = [columns.index(c) for c in varying]
+
+    diffuse = _diffuse_steps(X, mask)
+    q = _search(Y, X, mask, diffuse, idx, np.asarray(grid, dtype=float), refine)
+    filt = kalman_filter(Y, X, mask, q, diffuse)
+    alpha, V = kalman_smoother(X, mask, filt)
+    sigma2 = filt['sigma2']
+    cov = V * sigma2[:, None, None, None]
+
+    # Coefficients whose regressor never varies keep (most of) the diffuse prior
+    prior = _prior_variance(X, mask)[:, None, :]
+    ident = np.diagonal(V, axis1=2, axis2=3) < prior / 10
+    coef = np.where(ident, alpha, np.nan)
+    se = np.where(ident, np.sqrt(np.maximum(np.diagonal(cov, axis1=2, axis2=3), 0)), np.nan)
+    variables = list(columns)
+
+    if 'ln_arrivals_lag1' in columns and 'ln_rer' in columns:
+        i, j = columns.index('ln_arrivals_lag1'), columns.index('ln_rer')
+        rho, b = coef[..., i], coef[..., j]
+        g_rho, g_b = b / (1 - rho) ** 2, 1 / (1 - rho)
+        var = (g_rho ** 2 * cov[..., i, i] + g_b ** 2 * cov[..., j, j]
+               + 2 * g_rho * g_b * cov[..., i, j])
+        coef = np.concatenate([coef, (b / (1 - rho))[..., None]], axis=-1)
+        se = np.concatenate([se, np.sqrt(np.maximum(var, 0))[..., None]], axis=-1)
+        variables.append('lr_ln_rer')
+
+    crit = stats.norm.ppf(0.5 + level / 2)
+    m = len(variables)
+    keep = np.repeat(mask.ravel(), m)
+    paths = pd.DataFrame({
+        entity: np.repeat(np.asarray(names, dtype=object), T * m),
+        time: np.tile(np.repeat(years, m), D),
+        'variable': np.tile(variables, D * T),
+        'coef': coef.ravel(),
+        'std_error': se.ravel(),
+        'lower': (coef - crit * se).ravel(),
+        'upper': (coef + crit * se).ravel(),
+    })[keep].reset_index(drop=True)
+
+    params = pd.DataFrame({entity: names, 'sigma2': sigma2})
+    for c, i in zip(varying, idx):
+        params[f'q_{c}'] = q[:, i]
+    params['loglik'] = filt['loglik']
+    params['nobs'] = mask.sum(axis=1)
+    return paths, params
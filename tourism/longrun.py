@@ -0,0 +1,214 @@
+"""
+Inference for ADL(1,0) long-run multipliers.
+
+run_advanced_analysis.py reports the long-run price elasticity
+sr_price_elast / (1 - rho) as a point estimate only. This module fits the
+same ADL(1,0) for every destination at once and attaches uncertainty to
+every long-run multiplier b_j / (1 - rho):
+
+- delta method on the HAC (maxlags=1) covariance used by the script,
+- Fieller intervals, which stay valid when rho is close to 1. They widen
+  or become unbounded instead of pretending the ratio is normal,
+- a residual or moving-block bootstrap. Each replication rebuilds the
+  lagged dependent variable recursively, and all replications for all
+  destinations are refit with one batched solve.
+
+Usage:
+    from tourism.longrun import long_run_multipliers
+    from tourism.pipeline import load_thailand_timeseries
+    long_run_multipliers(load_thailand_timeseries(), method='block')
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import ADL_REGRESSORS, add_lags, stack_destinations
+
+LAG = 'ln_arrivals_lag1'
+
+
+def _solve(X, Y):
+    """Batched OLS: X (..., T, k), Y (..., T) -> b (..., k), (X'X)^-1."""
+    XtX_inv = np.linalg.inv(np.einsum('...ti,...tj->...ij', X, X))
+    b = np.einsum('...ij,...j->...i', XtX_inv, np.einsum('...ti,...t->...i', X, Y))
+    return b, XtX_inv
+
+
+def _hac_cov(X, u, XtX_inv, maxlags=1):
+    """
+    Newey-West covariance with Bartlett weights, matching statsmodels
+    OLS.fit(cov_type='HAC') (no small-sample correction). Zero-filled
+    missing years contribute zero scores.
+    """
+    scores = X * u[..., None]
+    S = np.einsum('...ti,...tj->...ij', scores, scores)
+    for lag in range(1, maxlags + 1):
+        w = 1 - lag / (maxlags + 1)
+        G = np.einsum('...ti,...tj->...ij', scores[..., lag:, :], scores[..., :-lag, :])
+        S = S + w * (G + np.swapaxes(G, -1, -2))
+    return np.einsum('...ij,...jk,...kl->...il', XtX_inv, S, XtX_inv)
+
+
+def fit_adl(df, y='ln_arrivals', x=ADL_REGRESSORS, entity='Country', time='Year',
+            cov_type='HAC', maxlags=1):
+    """
+    ADL(1,0) for every destination in one batched solve.
+
+    Returns a dict with names, years, columns, Y, X, mask, params (D, k),
+    resid (D, T) and cov (D, k, k). cov_type is 'HAC' (as in
+    run_advanced_analysis.py) or 'nonrobust'.
+    """
+    if LAG in x and LAG not in df.columns:
+        df = add_lags(df, entity=entity, time=time)
+    names, years, Y, X, mask, columns = stack_destinations(df, y, x, entity, time)
+    b, XtX_inv = _solve(X, Y)
+    resid = np.where(mask, Y - np.einsum('dti,di->dt', X, b), 0.0)
+
+    if cov_type == 'HAC':
+        cov = _hac_cov(X, resid, XtX_inv, maxlags)
+    elif cov_type == 'nonrobust':
+        dof = mask.sum(axis=1) - X.shape[-1]
+        cov = XtX_inv * ((resid ** 2).sum(axis=1) / dof)[:, None, None]
+    else:
+        raise ValueError(f"Unknown cov_type: {cov_type}")
+    return {'names': names, 'years': years, 'columns': columns, 'Y': Y, 'X': X,
+            'mask': mask, 'params': b, 'resid': resid, 'cov': cov}
+
+
+def _resample_residuals(resid, mask, n_boot, method, block, rng):
+    """Draw (B, D, T) residuals: iid ('residual') or moving blocks ('block')."""
+    D, T = resid.shape
+    out = np.zeros((n_boot, D, T))
+    for d in range(D):
+        pool = resid[d, mask[d]]
+        pool = pool - pool.mean()
+        rows = np.flatnonzero(mask[d])
+        n = len(pool)
+        if method == 'residual':
+            idx = rng.integers(0, n, size=(n_boot, n))
+        elif method == 'block':
+            # A destination with fewer than `block` residuals resamples them as one block
+            length = min(block, n)
+            n_blocks = -(-n // length)
+            starts = rng.integers(0, n - length + 1, size=(n_boot, n_blocks))
+            idx = (starts[..., None] + np.arange(length)).reshape(n_boot, -1)[:, :n]
+        else:
+            raise ValueError(f"Unknown bootstrap method: {method}")
+        out[:, d, rows] = pool[idx]
+    return out
+
+
+def bootstrap_adl(fit, n_boot=999, method='residual', block=3, seed=0):
+    """
+    Bootstrap replications of the ADL coefficients, shape (B, D, k).
+
+    Each replication regenerates ln_arrivals recursively from the fitted
+    model, starting from the observed first lag, so the lagged dependent
+    variable is rebuilt rather than held fixed. All B x D refits are solved
+    together.
+    """
+    rng = np.random.default_rng(seed)
+    X, mask, b = fit['X'], fit['mask'], fit['params']
+    D, T, k = X.shape
+    lag = fit['columns'].index(LAG)
+    u = _resample_residuals(fit['resid'], mask, n_boot, method, block, rng)
+
+    Xb = np.broadcast_to(X, (n_boot, D, T, k)).copy()
+    Yb = np.zeros((n_boot, D, T))
+    for t in range(T):
+        if t > 0:
+            # Chain the lag through consecutive observed years only
+            chained = mask[:, t] & mask[:, t - 1]
+            Xb[:, :, t, lag] = np.where(chained, Yb[:, :, t - 1], X[:, t, lag])
+        Yb[:, :, t] = np.where(mask[:, t],
+                               np.einsum('bdi,di->bd', Xb[:, :, t], b) + u[:, :, t], 0.0)
+    Xb *= mask[None, :, :, None]
+    return _solve(Xb, Yb)[0]
+
+
+def _ratio(params, rho_idx, idx):
+    return params[..., idx] / (1 - params[..., rho_idx, None])
+
+
+def _fieller(b, rho, var_b, var_rho, cov_br, z):
+    """
+    Fieller interval for theta = b / (1 - rho). Solves
+    (b - theta d)^2 <= z^2 Var(b - theta d) with d = 1 - rho. NaN bounds mean
+    the set is unbounded, because 1 - rho is not significantly different from zero.
+    """
+    d = 1 - rho
+    # Var(d) = var_rho, Cov(b, d) = -cov_br
+    A = d ** 2 - z ** 2 * var_rho
+    B = -2 * (b * d + z ** 2 * cov_br)
+    C = b ** 2 - z ** 2 * var_b
+    disc = B ** 2 - 4 * A * C
+    bounded = (A > 0) & (disc >= 0)
+    root = np.sqrt(np.where(bounded, disc, 0.0))
+    lower = np.where(bounded, (-B - root) / (2 * A), np.nan)
+    upper = np.where(bounded, (-B + root) / (2 * A), np.nan)
+    return lower, upper
+
+
+@timed('long-run inference', 'model')
+def long_run_multipliers(df, y='ln_arrivals', x=ADL_REGRESSORS, entity='Country', time='Year',
+                         level=0.95, n_boot=999, method='residual', block=3, seed=0,
+                         cov_type='HAC', maxlags=1):
+    """
+    Long-run multipliers b_j / (1 - rho) with delta-method, Fieller and
+    bootstrap intervals, for every regressor and destination in one call.
+
+    Parameters
+    ----------
+    df : thailand_timeseries.csv or competitor_panel.csv-style frame
+    n_boot : bootstrap replications (0 skips the bootstrap)
+    method : 'residual' (iid) or 'block' (moving blocks of `block` years)
+    cov_type, maxlags : covariance for the delta and Fieller intervals
+
+    Returns one row per destination and regressor with columns Country,
+    variable, short_run, rho, long_run, se_delta, lower_delta,
+    upper_delta, lower_fieller, upper_fieller, se_boot, lower_boot,
+    upper_boot and share_rho_ge_1 (bootstrap draws with rho >= 1, where
+    the multiplier has no long-run meaning).
+    """
+    fit = fit_adl(df, y, x, entity, time, cov_type=cov_type, maxlags=maxlags)
+    columns, b, cov = fit['columns'], fit['params'], fit['cov']
+    r = columns.index(LAG)
+    idx = [i for i, c in enumerate(columns) if c not in ('const', LAG)]
+    D, m = len(fit['names']), len(idx)
+    z = stats.norm.ppf(0.5 + level / 2)
+
+    rho = b[:, r, None]
+    sr = b[:, idx]
+    lr = _ratio(b, r, idx)
+    var_b = cov[:, idx, idx]
+    var_rho = cov[:, r, r][:, None]
+    cov_br = cov[:, idx, r]
+    # Gradient of b / (1 - rho): 1 / (1 - rho) for b, b / (1 - rho)^2 for rho
+    g_b, g_rho = 1 / (1 - rho), sr / (1 - rho) ** 2
+    se_delta = np.sqrt(g_b ** 2 * var_b + g_rho ** 2 * var_rho + 2 * g_b * g_rho * cov_br)
+    f_lo, f_hi = _fieller(sr, rho, var_b, var_rho, cov_br, z)
+
+    out = pd.DataFrame({
+        entity: np.repeat(np.asarray(fit['names'], dtype=object), m),
+        'variable': np.tile([columns[i] for i in idx], D),
+        'short_run': sr.ravel(),
+        'rho': np.repeat(rho.ravel(), m),
+        'long_run': lr.ravel(),
+        'se_delta': se_delta.ravel(),
+        'lower_delta': (lr - z * se_delta).ravel(),
+        'upper_delta': (lr + z * se_delta).ravel(),
+        'lower_fieller': f_lo.ravel(),
+        'upper_fieller': f_hi.ravel(),
+    })
+
+    if n_boot:
+        draws = bootstrap_adl(fit, n_boot, method, block, seed)
+        lr_boot = _ratio(draws, r, idx)
+        alpha = (1 - level) / 2
+        out['se_boot'] = lr_boot.std(axis=0, ddof=1).ravel()
+        out['lower_boot'] = np.quantile(lr_boot, alpha, axis=0).ravel()
+        out['upper_boot'] = np.quantile(lr_boot, 1 - alpha, axis=0).ravel()
+        out['share_rho_ge_1'] = np.repeat((draws[..., r] >= 1).mean(axis=0), m)
+    return out
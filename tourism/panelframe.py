@@ -0,0 +1,253 @@
+"""
+Compact, typed in-memory representation of the Country x Year panel.
+
+load_panel returns pandas defaults: a string Country column, int64 Year
+and one float64 block per column. The placebo scripts then copy that frame
+and round-trip it through reset_index / set_index once per country.
+PanelFrame stores the same data as:
+
+- entity and time as small integer codes (int16 where they fit), with the
+  labels kept once (entities in sorted order, years as a range),
+- every numeric column in one contiguous (columns x rows) array, so a
+  column is a contiguous 1-D view and dtype=np.float32 halves it again,
+- derived columns (assign) as separate arrays next to that block, so
+  adding features never copies the block. Dummies stay int8.
+
+Subsets (where / filter) share the block and only hold the selected row
+positions. A contiguous selection is kept as a slice, so its columns are
+zero-copy views. Otherwise only the columns actually read are gathered.
+index() builds the (Country, Year) MultiIndex straight from the codes,
+and design() returns a regressor frame that wraps a preallocated array.
+Loops such as the spatial placebo one overwrite a single column in place
+instead of copying and re-indexing the panel.
+
+Usage:
+    from tourism.panelframe import PanelFrame, add_features
+    pf = PanelFrame.from_frame(load_panel())
+    pf = add_features(pf.filter(PLACEBO_COUNTRIES, 2008, 2024, required=KEY_VARIABLES))
+    exog, X = pf.design(['ln_cpi', 'post_covid'], extra=['placebo'])
+    pf.nbytes / len(pf)                         # bytes per observation
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _small_int(n):
+    return np.int16 if n < np.iinfo(np.int16).max else np.int32
+
+
+def _as_rows(mask_or_index, n):
+    """Row selection as a slice when it is one contiguous run, else int positions."""
+    rows = np.asarray(mask_or_index)
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+    if len(rows) == 0:
+        return slice(0, 0)
+    if rows[-1] - rows[0] + 1 == len(rows) and (np.diff(rows) == 1).all():
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+    return rows.astype(np.intp)
+
+
+def _compose(outer, inner):
+    """Positions `inner` of a view whose positions are `outer`, in base coordinates."""
+    if outer is None:
+        return inner
+    if isinstance(outer, slice):
+        if isinstance(inner, slice):
+            return slice(outer.start + inner.start, outer.start + inner.stop)
+        return inner + outer.start
+    return outer[inner]
+
+
+class PanelFrame:
+    """Integer-coded entity/time plus one contiguous numeric block, with row views."""
+
+    def __init__(self, data, columns, entity_codes, time_codes, entities, years,
+                 rows=None, extra=None, entity='Country', time='Year'):
+        self._data = data
+        self._columns = {c: j for j, c in enumerate(columns)}
+        self._entity_codes = entity_codes
+        self._time_codes = time_codes
+        self.entities = entities
+        self.years = years
+        self._rows = rows
+        self._extra = dict(extra or {})
+        self.entity = entity
+        self.time = time
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, df, entity='Country', time='Year', columns=None, dtype=np.float64):
+        """
+        Build from a long frame (or one indexed by entity and time). Numeric
+        columns go into the shared block; other columns are dropped.
+        """
+        if entity not in df.columns and entity in (df.index.names or []):
+            df = df.reset_index()
+        codes, entities = pd.factorize(df[entity], sort=True)
+        year = df[time].to_numpy(dtype=np.int64)
+        first = int(year.min()) if len(year) else 0
+        years = np.arange(first, int(year.max()) + 1 if len(year) else first)
+        if columns is None:
+            columns = [c for c in df.columns if c not in (entity, time)
+                       and pd.api.types.is_numeric_dtype(df[c])]
+        data = np.empty((len(columns), len(df)), dtype=dtype)
+        for j, c in enumerate(columns):
+            data[j] = df[c].to_numpy(dtype=dtype, na_value=np.nan)
+        return cls(data, list(columns), codes.astype(_small_int(len(entities))),
+                   (year - first).astype(_small_int(len(years))),
+                   np.asarray(entities, dtype=object), years, entity=entity, time=time)
+
+    # ------------------------------------------------------------------ access
+    def __len__(self):
+        if self._rows is None:
+            return self._data.shape[1]
+        if isinstance(self._rows, slice):
+            return self._rows.stop - self._rows.start
+        return len(self._rows)
+
+    @property
+    def columns(self):
+        return list(self._columns) + list(self._extra)
+
+    def _take(self, values):
+        return values if self._rows is None else values[self._rows]
+
+    @property
+    def entity_codes(self):
+        return self._take(self._entity_codes)
+
+    @property
+    def time_codes(self):
+        return self._take(self._time_codes)
+
+    def __contains__(self, name):
+        return name in self._columns or name in self._extra or name in (self.entity, self.time)
+
+    def __getitem__(self, name):
+        """A column as an array: a view of the block where the rows allow it."""
+        if name in self._extra:
+            return self._extra[name]
+        if name in self._columns:
+            return self._take(self._data[self._columns[name]])
+        if name == self.entity:
+            return self.entities[self.entity_codes]
+        if name == self.time:
+            return self.years[self.time_codes]
+        raise KeyError(name)
+
+    @property
+    def nbytes(self):
+        """Bytes held for this view's rows: block share, codes and derived columns."""
+        n = len(self)
+        per_row = (self._data.dtype.itemsize * self._data.shape[0]
+                   + self._entity_codes.itemsize + self._time_codes.itemsize)
+        return n * per_row + sum(v.nbytes for v in self._extra.values())
+
+    # ------------------------------------------------------------- subsetting
+    def where(self, mask):
+        """Rows where `mask` is True, sharing the numeric block."""
+        inner = _as_rows(mask, len(self))
+        extra = {k: v[inner] for k, v in self._extra.items()}
+        return PanelFrame(self._data, list(self._columns), self._entity_codes, self._time_codes,
+                          self.entities, self.years, _compose(self._rows, inner), extra,
+                          self.entity, self.time)
+
+    def filter(self, countries=None, start_year=None, end_year=None, required=()):
+        """Country / year window and complete cases on `required`, as one mask on codes."""
+        mask = np.ones(len(self), dtype=bool)
+        if countries is not None:
+            wanted = pd.Index(self.entities).isin(list(countries))
+            mask &= wanted[self.entity_codes]
+        year = self.years[self.time_codes]
+        if start_year is not None:
+            mask &= year >= start_year
+        if end_year is not None:
+            mask &= year <= end_year
+        for c in required:
+            mask &= ~np.isnan(self[c])
+        return self.where(mask)
+
+    def assign(self, **columns):
+        """New view with extra columns; the shared block is not copied."""
+        out = PanelFrame(self._data, list(self._columns), self._entity_codes, self._time_codes,
+                         self.entities, self.years, self._rows, self._extra,
+                         self.entity, self.time)
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.shape != (len(self),):
+                raise ValueError(f"Column {name} has shape {values.shape}, expected ({len(self)},)")
+            out._extra[name] = values
+        out._index = self._index
+        return out
+
+    def group_mean(self, name):
+        """Per-row mean of `name` within each entity (NaNs ignored)."""
+        values = self[name]
+        codes = self.entity_codes
+        ok = ~np.isnan(values)
+        sums = np.bincount(codes[ok], weights=values[ok], minlength=len(self.entities))
+        counts = np.bincount(codes[ok], minlength=len(self.entities))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (sums / counts)[codes]
+
+    # ---------------------------------------------------------------- output
+    def index(self):
+        """(entity, time) MultiIndex built from the codes, cached per view."""
+        if self._index is None:
+            self._index = pd.MultiIndex(levels=[pd.Index(self.entities, name=self.entity),
+                                                pd.Index(self.years, name=self.time)],
+                                        codes=[self.entity_codes, self.time_codes],
+                                        names=[self.entity, self.time], verify_integrity=False)
+        return self._index
+
+    def to_frame(self, columns=None, index=True):
+        """DataFrame of `columns` (default all), indexed by (entity, time) or long."""
+        columns = self.columns if columns is None else list(columns)
+        data = {c: self[c] for c in columns}
+        if index:
+            return pd.DataFrame(data, index=self.index())
+        return pd.DataFrame({self.entity: self[self.entity], self.time: self[self.time], **data})
+
+    def design(self, columns, constant=True, extra=()):
+        """
+        float64 regressor frame for PanelOLS and the (rows x k) array it
+        wraps. Columns named in `extra` are left as zeros for the caller to
+        overwrite in place (e.g. a placebo interaction).
+        """
+        names = (['const'] if constant else []) + list(columns) + list(extra)
+        X = np.zeros((len(self), len(names)))
+        if constant:
+            X[:, 0] = 1.0
+        for j, c in enumerate(columns, start=int(constant)):
+            X[:, j] = self[c]
+        return pd.DataFrame(X, index=self.index(), columns=names, copy=False), X
+
+    def series(self, name):
+        """One column as a Series on the (entity, time) index, without copying."""
+        return pd.Series(self[name], index=self.index(), name=name, copy=False)
+
+
+def add_features(pf):
+    """
+    pipeline.engineer_features on a PanelFrame: logs, normalized RER, COVID
+    and Thailand dummies (int8) and the time trend, as new columns only.
+    """
+    year = pf[pf.time]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rer_normalized = pf['RER'] / pf.group_mean('RER')
+        features = {
+            'ln_arrivals': np.log(pf['arrivals_from_china']),
+            'ln_cpi': np.log(pf['CPI_destination']),
+            'ln_gdp_china': np.log(pf['gdp_china']),
+            'ln_exchange_rate': np.log(pf['exchange_rate']),
+            'RER_normalized': rer_normalized,
+            'ln_rer': np.log(rer_normalized),
+        }
+    covid = ((year >= 2020) & (year <= 2021)).astype(np.int8)
+    post = (year >= 2022).astype(np.int8)
+    thailand = (pf.entities == 'Thailand').astype(np.int8)[pf.entity_codes]
+    return pf.assign(**features, covid_dummy=covid, post_covid=post, is_thailand=thailand,
+                     thailand_post_covid=thailand * post,
+                     time_trend=(year - year.min()).astype(np.int16) if len(year) else year)
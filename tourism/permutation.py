@@ -0,0 +1,219 @@
+"""
+Exact permutation inference for small recovery cross-sections.
+
+recovery_rate_regression.py regresses the 2022-2024 recovery rate of 8
+countries on an is_thailand dummy (plus controls in Models 2 and 3) and
+reports t-distribution p-values. With 8 observations those rest entirely
+on normality. Here every model gets two finite-sample p-values:
+
+- randomization: the treatment dummy is moved to every possible set of
+  treated countries (C(n, m) assignments; 8 for one treated country) and
+  the t-statistic recomputed. The p-value is the share of assignments at
+  least as extreme as the observed one, so with one treated unit among 8
+  it can never be below 1/8,
+- permutation (Freedman-Lane): the residuals of the regression on the
+  controls alone are permuted over all n! orderings (40,320 for n = 8)
+  and added back to the fitted values.
+
+By Frisch-Waugh both reduce to products with the annihilator
+M = I - W W^+ of the controls W, computed once per model. For a stacked
+batch of assignments D (A x n) or permuted residuals R (P x n), the
+coefficients, residual sums of squares and t-statistics follow from a few
+matrix products, with no per-draw regression. Above `max_exact`
+assignments or permutations, random draws are used instead and the
+p-value is (1 + hits) / (1 + draws).
+
+Usage:
+    from tourism.permutation import exact_inference, recovery_cross_section
+    exact_inference(recovery_cross_section())
+"""
+
+import functools
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import RECOVERY_COUNTRIES, load_panel
+
+# Controls of Models 1-3 in recovery_rate_regression.py (a constant is always added)
+RECOVERY_MODELS = {
+    'Model 1 (Simple)': [],
+    'Model 2 (Full Controls)': ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate'],
+    'Model 3 (Size Control)': ['ln_baseline', 'peace_index', 'ln_cpi'],
+}
+
+
+def recovery_cross_section(df=None, countries=RECOVERY_COUNTRIES, baseline_year=2019,
+                           start_year=2022, end_year=2024, treated=('Thailand',)):
+    """
+    One row per country as built in recovery_rate_regression.py: recovery_rate,
+    is_thailand, end-year controls and their logs, ln_baseline.
+    """
+    from .recovery import recovery_metrics
+
+    raw = load_panel() if df is None else df
+    out = recovery_metrics(raw, baseline_year, [end_year], start_year, end_year,
+                           countries=countries, missing='drop')
+    controls = raw[raw['Year'] == end_year].set_index('Country')
+    out = out.join(controls[['peace_index', 'CPI_destination', 'gdp_china', 'exchange_rate']],
+                   on='Country')
+    out['is_thailand'] = out['Country'].isin(treated).astype(int)
+    out['ln_cpi'] = np.log(out['CPI_destination'])
+    out['ln_gdp_china'] = np.log(out['gdp_china'])
+    out['ln_exchange_rate'] = np.log(out['exchange_rate'].abs())
+    out['ln_baseline'] = np.log(out['baseline'])
+    return out
+
+
+def _annihilator(W, rtol=1e-10):
+    """M = I - Q Q' and the orthonormal basis Q of span(W), rank-revealing."""
+    U, s, _ = np.linalg.svd(W, full_matrices=False)
+    Q = U[:, s > rtol * s.max()] if s.size else U[:, :0]
+    return np.eye(len(W)) - Q @ Q.T, Q
+
+
+def _t_stats(num, den, ssr, dof):
+    """t = b / se with b = num / den and se^2 = ssr / dof / den."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ok = den > 1e-12
+        b = np.where(ok, num / np.where(ok, den, 1), np.nan)
+        se = np.sqrt(np.where(ok, ssr / dof / np.where(ok, den, 1), np.nan))
+        return b, b / se
+
+
+def _extreme(t, t_obs, alternative):
+    """Draws at least as extreme as t_obs (with a relative tolerance for ties)."""
+    tol = 1e-9 * max(abs(t_obs), 1.0)
+    if alternative == 'two-sided':
+        return np.abs(t) >= abs(t_obs) - tol
+    if alternative == 'less':
+        return t <= t_obs + tol
+    if alternative == 'greater':
+        return t >= t_obs - tol
+    raise ValueError(f"Unknown alternative: {alternative}")
+
+
+def _assignments(n, m, max_exact, n_draws, rng):
+    """(A, n) 0/1 treatment matrices: every C(n, m) subset, or random subsets."""
+    if math.comb(n, m) <= max_exact:
+        idx = np.array(list(itertools.combinations(range(n), m)), dtype=np.intp).reshape(-1, m)
+        exact = True
+    else:
+        idx = np.argsort(rng.random((n_draws, n)), axis=1)[:, :m]
+        exact = False
+    D = np.zeros((len(idx), n))
+    np.put_along_axis(D, idx, 1.0, axis=1)
+    return D, exact
+
+
+@functools.lru_cache(maxsize=4)
+def _permutation_table(n):
+    """All n! orderings as one read-only (n!, n) array, shared across models."""
+    table = np.array(list(itertools.permutations(range(n))), dtype=np.intp)
+    table.flags.writeable = False
+    return table
+
+
+def _permutations(n, max_exact, n_draws, chunk, rng):
+    """Chunks of (P, n) index permutations: all n! orderings, or random ones."""
+    if math.factorial(n) <= min(max_exact, chunk):
+        yield _permutation_table(n)
+    elif math.factorial(n) <= max_exact:
+        it = itertools.permutations(range(n))
+        while True:
+            block = np.array(list(itertools.islice(it, chunk)), dtype=np.intp)
+            if not len(block):
+                return
+            yield block
+    else:
+        done = 0
+        while done < n_draws:
+            size = min(chunk, n_draws - done)
+            yield np.argsort(rng.random((size, n)), axis=1)
+            done += size
+
+
+def permutation_test(y, d, W, alternative='two-sided', max_exact=1_000_000, n_draws=99_999,
+                     chunk=200_000, seed=0):
+    """
+    Randomization and Freedman-Lane p-values for the coefficient on d in
+    y = W g + b d + u.
+
+    Parameters
+    ----------
+    y : (n,) outcome
+    d : (n,) 0/1 treatment indicator
+    W : (n, p) controls including the constant (rank deficiency is allowed)
+    alternative : 'two-sided', 'less' or 'greater' (direction of the t-statistic)
+    max_exact : enumerate assignments / permutations up to this many,
+        otherwise draw `n_draws` at random
+
+    Returns a dict with coef, t, dof, p_asymptotic and, for each
+    procedure, the p-value, number of draws and whether it was exact.
+    """
+    y, d, W = np.asarray(y, float), np.asarray(d, float), np.asarray(W, float)
+    n = len(y)
+    rng = np.random.default_rng(seed)
+    M, Q = _annihilator(W)
+    dof = n - Q.shape[1] - 1
+    if dof <= 0:
+        raise ValueError("No residual degrees of freedom left for the treatment coefficient")
+    r = M @ y
+    yMy = r @ r
+
+    e = M @ d
+    num, den = e @ y, e @ d
+    coef, t_obs = _t_stats(num, den, yMy - num ** 2 / den, dof)
+    if alternative == 'two-sided':
+        p_asym = 2 * stats.t.sf(abs(t_obs), dof)
+    else:
+        p_asym = stats.t.cdf(t_obs, dof) if alternative == 'less' else stats.t.sf(t_obs, dof)
+    out = {'coef': float(coef), 't': float(t_obs), 'dof': dof, 'p_asymptotic': float(p_asym)}
+
+    # Every assignment with the same number of treated units: E = D M
+    D, exact = _assignments(n, int(d.sum()), max_exact, n_draws, rng)
+    E = D @ M
+    num_a, den_a = E @ y, (E * D).sum(axis=1)
+    _, t_a = _t_stats(num_a, den_a, yMy - num_a ** 2 / np.where(den_a > 1e-12, den_a, 1), dof)
+    hits = int(_extreme(t_a, t_obs, alternative).sum())
+    out.update({'p_randomization': hits / len(D) if exact else (hits + 1) / (len(D) + 1),
+                'n_assignments': len(D), 'randomization_exact': exact})
+
+    # Freedman-Lane: permute the controls-only residuals r. Since M W = 0, only
+    # M (P r) matters: num = (P r)' e and y*' M y* = |r|^2 - |Q' P r|^2
+    hits = draws = 0
+    exact = math.factorial(n) <= max_exact
+    for perm in _permutations(n, max_exact, n_draws, chunk, rng):
+        R = r[perm]
+        num_p = R @ e
+        ssr = yMy - ((R @ Q) ** 2).sum(axis=1) - num_p ** 2 / den
+        _, t_p = _t_stats(num_p, np.full(len(R), den), ssr, dof)
+        hits += int(_extreme(t_p, t_obs, alternative).sum())
+        draws += len(R)
+    out.update({'p_permutation': hits / draws if exact else (hits + 1) / (draws + 1),
+                'n_permutations': draws, 'permutation_exact': exact})
+    return out
+
+
+@timed('exact permutation inference', 'diagnostic')
+def exact_inference(cross, models=RECOVERY_MODELS, y='recovery_rate', treatment='is_thailand',
+                    alternative='two-sided', max_exact=1_000_000, n_draws=99_999, seed=0):
+    """
+    permutation_test for every model in `models` (name -> list of controls).
+
+    Returns one row per model with model, n, coef, t, dof, p_asymptotic,
+    p_randomization, n_assignments, randomization_exact, p_permutation,
+    n_permutations and permutation_exact.
+    """
+    rows = []
+    for name, controls in models.items():
+        data = cross.dropna(subset=[y, treatment] + list(controls))
+        W = np.column_stack([np.ones(len(data))] + [data[c].values for c in controls])
+        res = permutation_test(data[y].values, data[treatment].values, W, alternative,
+                               max_exact, n_draws, seed=seed)
+        rows.append({'model': name, 'n': len(data), **res})
+    return pd.DataFrame(rows)
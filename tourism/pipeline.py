@@ -0,0 +1,477 @@
+"""
+Pipeline stages for the gravity panel analysis.
+
+Each function mirrors one stage of final_regressions/running_panel_data_regression.py
+and the diagnostic scripts next to it:
+
+1. load_panel          - read Primary_Dataset_For_Panel_FINAL.csv
+2. filter_panel        - country / year window + dropna on key variables
+3. engineer_features   - logs, normalized RER, COVID dummies, Thailand interaction
+4. fit_model           - one PanelOLS specification (Models A-G)
+5. run_placebo         - Model C re-estimated with each country as "treated"
+6. heteroskedasticity_tests - Modified Wald + Wooldridge tests on FE residuals
+7. compute_vif         - variance inflation factors for a model's regressors
+8. recovery_rates      - recovery of Chinese arrivals relative to 2019 (tourism.recovery)
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from .instrument import stage, timed
+
+# ==========================================
+# PATHS AND SAMPLE DEFINITIONS
+# ==========================================
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'final_regressions')
+DATA_PATH = os.path.join(DATA_DIR, 'Primary_Dataset_For_Panel_FINAL.csv')
+NEW_MODELS_DIR = os.path.join(DATA_DIR, 'new_models_data')
+THAILAND_TS_PATH = os.path.join(NEW_MODELS_DIR, 'thailand_timeseries.csv')
+COMPETITOR_PANEL_PATH = os.path.join(NEW_MODELS_DIR, 'competitor_panel.csv')
+
+# Derived artifacts (model caches); override with TOURISM_CACHE_DIR
+CACHE_DIR = os.environ.get('TOURISM_CACHE_DIR', os.path.join(REPO_DIR, '.tourism_cache'))
+
+# Model 1 sample (running_panel_data_regression.py)
+MODEL1_COUNTRIES = ['Australia', 'Japan', 'Malaysia', 'Maldives',
+                    'Singapore', 'Thailand', 'Viet Nam']
+
+# Placebo / diagnostics sample (placebo_regressions.py, test_*.py)
+PLACEBO_COUNTRIES = ['Australia', 'Cambodia', 'Indonesia', 'Japan',
+                     'Malaysia', 'Maldives', 'Singapore', 'Thailand', 'Viet Nam']
+
+# Comparative elasticity sample (run_advanced_analysis.py)
+COMPETITORS = ['Thailand', 'Viet Nam', 'Malaysia', 'Indonesia']
+
+# Thailand time-series regressors (run_new_models.py Model 1)
+TS_REGRESSORS = ['ln_gdp_china', 'ln_rer', 'covid_dummy']
+
+# ADL(1,0) habit-persistence regressors (run_advanced_analysis.py)
+ADL_REGRESSORS = ['ln_arrivals_lag1', 'ln_gdp_china', 'ln_rer', 'covid_dummy']
+
+# Recovery sample (recovery_rate_regression.py)
+RECOVERY_COUNTRIES = ['Australia', 'Cambodia', 'Indonesia', 'Japan',
+                      'Malaysia', 'Singapore', 'Thailand', 'Viet Nam']
+
+KEY_VARIABLES = ['arrivals_from_china', 'peace_index', 'CPI_destination',
+                 'gdp_china', 'exchange_rate', 'RER']
+
+# ==========================================
+# MODEL SPECIFICATIONS (Models A-G)
+# ==========================================
+MODEL_SPECS = {
+    'A': {
+        'name': 'Entity FE + COVID Dummy (Nominal ER)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate', 'covid_dummy'],
+        'constant': True,
+        'time_effects': False,
+    },
+    'B': {
+        'name': 'Entity FE + Time FE (Nominal ER)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_exchange_rate'],
+        'constant': False,
+        'time_effects': True,
+    },
+    'C': {
+        'name': 'Thailand Asymmetry (Nominal ER)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate',
+                 'covid_dummy', 'post_covid', 'thailand_post_covid'],
+        'constant': True,
+        'time_effects': False,
+    },
+    'D': {
+        'name': 'Entity FE + COVID Dummy (RER)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_rer', 'covid_dummy'],
+        'constant': True,
+        'time_effects': False,
+    },
+    'E': {
+        'name': 'Entity FE + Time FE (RER)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_rer'],
+        'constant': False,
+        'time_effects': True,
+    },
+    'F': {
+        'name': 'Thailand Asymmetry (RER)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_rer',
+                 'covid_dummy', 'post_covid', 'thailand_post_covid'],
+        'constant': True,
+        'time_effects': False,
+    },
+    'G': {
+        'name': 'Nominal vs Real Exchange Rate (Entity FE + COVID)',
+        'exog': ['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate',
+                 'ln_rer', 'covid_dummy'],
+        'constant': True,
+        'time_effects': False,
+    },
+}
+
+# Models used by test_heteroskedasticity_autocorrelation.py / test_multicollinearity.py
+DIAGNOSTIC_MODELS = ['A', 'C', 'D', 'F']
+
+
+# ==========================================
+# 1-3. LOAD, FILTER, FEATURE ENGINEERING
+# ==========================================
+def file_digest(path):
+    """SHA-256 of a file's contents, used to key caches of derived results."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+@timed('load', 'io')
+def load_panel(path=DATA_PATH):
+    """Load the primary Country x Year panel."""
+    return pd.read_csv(path)
+
+
+@timed('load', 'io')
+def load_thailand_timeseries(path=THAILAND_TS_PATH):
+    """Thailand 2000-2024 series used by run_new_models.py / run_advanced_analysis.py."""
+    return pd.read_csv(path)
+
+
+@timed('load', 'io')
+def load_competitor_panel(path=COMPETITOR_PANEL_PATH):
+    """Thailand / Viet Nam / Malaysia / Indonesia panel (2008-2024)."""
+    return pd.read_csv(path)
+
+
+@timed('filter')
+def filter_panel(df, countries=MODEL1_COUNTRIES, start_year=2008, end_year=2024,
+                 required=KEY_VARIABLES):
+    """Restrict to the estimation sample and drop rows missing key variables."""
+    df = df[(df['Country'].isin(countries)) &
+            (df['Year'] >= start_year) &
+            (df['Year'] <= end_year)]
+    return df.dropna(subset=list(required))
+
+
+@timed('feature engineering')
+def engineer_features(df):
+    """Add the log, RER, COVID and Thailand-interaction columns used by Models A-G."""
+    df = df.copy()
+
+    # Log transformations (elasticity interpretation)
+    df['ln_arrivals'] = np.log(df['arrivals_from_china'])
+    df['ln_cpi'] = np.log(df['CPI_destination'])
+    df['ln_gdp_china'] = np.log(df['gdp_china'])
+    df['ln_exchange_rate'] = np.log(df['exchange_rate'])
+
+    # RER normalized within each country so log(1) = 0 at the country mean
+    df['RER_normalized'] = df['RER'] / df.groupby('Country')['RER'].transform('mean')
+    df['ln_rer'] = np.log(df['RER_normalized'])
+
+    # COVID period and recovery dummies
+    df['covid_dummy'] = ((df['Year'] >= 2020) & (df['Year'] <= 2021)).astype(int)
+    df['post_covid'] = (df['Year'] >= 2022).astype(int)
+
+    # Thailand asymmetry interaction
+    df['is_thailand'] = (df['Country'] == 'Thailand').astype(int)
+    df['thailand_post_covid'] = df['is_thailand'] * df['post_covid']
+
+    df['time_trend'] = df['Year'] - df['Year'].min()
+    return df
+
+
+def prepare_panel(df=None, countries=MODEL1_COUNTRIES, start_year=2008, end_year=2024):
+    """Run load -> filter -> feature engineering and set the (Country, Year) index."""
+    if df is None:
+        df = load_panel()
+    df = filter_panel(df, countries, start_year, end_year)
+    df = engineer_features(df)
+    return df.set_index(['Country', 'Year'])
+
+
+def add_lags(df, columns=('ln_arrivals',), lags=(1,), entity='Country', time='Year'):
+    """
+    Add `<column>_lag<k>` columns by matching on Year - k within each
+    destination, so gaps in the years give NaN rather than a wrong lag.
+    Works on frames without an entity column (thailand_timeseries.csv).
+    """
+    keys = [entity, time] if entity in df.columns else [time]
+    out = df
+    for k in lags:
+        shifted = df[keys + list(columns)].copy()
+        shifted[time] = shifted[time] + k
+        shifted = shifted.rename(columns={c: f'{c}_lag{k}' for c in columns})
+        out = out.merge(shifted, on=keys, how='left')
+    return out
+
+
+def panel_grid(df, columns, entity='Country', time='Year', dropna=True):
+    """
+    Columns as (N, T) arrays on the full destination x year grid, NaN where
+    unobserved. Returns (names, years, {column: array}). dropna keeps only
+    rows where every column is observed.
+    """
+    if entity not in df.columns:
+        df = df.reset_index()
+    if dropna:
+        df = df.dropna(subset=list(columns))
+    codes, names = pd.factorize(df[entity], sort=True)
+    year = df[time].to_numpy(dtype=np.int64)
+    years = np.arange(year.min(), year.max() + 1)
+    grid = {}
+    for c in columns:
+        a = np.full((len(names), len(years)), np.nan)
+        a[codes, year - years[0]] = df[c].to_numpy(dtype=float, na_value=np.nan)
+        grid[c] = a
+    return list(names), years, grid
+
+
+def stack_destinations(df, y='ln_arrivals', x=TS_REGRESSORS, entity='Country', time='Year',
+                       constant=True):
+    """
+    Reshape a long panel into per-destination design arrays for batched
+    time-series estimators.
+
+    Returns (names, years, Y, X, mask, columns) with Y of shape (D, T),
+    X of shape (D, T, k) and mask marking observed rows. Missing
+    destination-years are zero-filled in Y and X, so rank-one updates with
+    them are exact no-ops. A frame without an entity column is treated as a
+    single destination named 'Thailand'.
+    """
+    if entity not in df.columns:
+        df = df.assign(**{entity: 'Thailand'})
+    df = df.dropna(subset=[y] + list(x))
+
+    names = list(pd.unique(df[entity]))
+    years = np.sort(df[time].unique())
+    d_idx = pd.Categorical(df[entity], categories=names).codes
+    t_idx = np.searchsorted(years, df[time].values)
+
+    columns = (['const'] if constant else []) + list(x)
+    D, T, k = len(names), len(years), len(columns)
+    Y = np.zeros((D, T))
+    X = np.zeros((D, T, k))
+    mask = np.zeros((D, T), dtype=bool)
+
+    Y[d_idx, t_idx] = df[y].values
+    if constant:
+        X[d_idx, t_idx, 0] = 1.0
+    X[d_idx, t_idx, int(constant):] = df[list(x)].values
+    mask[d_idx, t_idx] = True
+    return names, years, Y, X, mask, columns
+
+
+# ==========================================
+# 4. PANEL REGRESSIONS
+# ==========================================
+def design_matrix(df, spec):
+    """Exogenous regressors for a model spec (with a constant where the spec has one)."""
+    exog = df[spec['exog']]
+    if spec['constant']:
+        import statsmodels.api as sm
+        exog = sm.add_constant(exog)
+    return exog
+
+
+def fit_model(df, model='A', cov_type='clustered'):
+    """Fit one PanelOLS specification on an indexed panel."""
+    from linearmodels.panel import PanelOLS
+
+    spec = MODEL_SPECS[model] if isinstance(model, str) else model
+    label = f'Model {model}' if isinstance(model, str) else spec.get('name', 'custom')
+    with stage(f'fit {label}', 'model', nobs=len(df)):
+        exog = design_matrix(df, spec)
+        mod = PanelOLS(df['ln_arrivals'], exog, entity_effects=True,
+                       time_effects=spec['time_effects'])
+        if cov_type == 'clustered':
+            return mod.fit(cov_type='clustered', cluster_entity=True)
+        return mod.fit(cov_type=cov_type)
+
+
+def fit_all_models(df, models=None):
+    """Fit every model in MODEL_SPECS; failed fits are returned as None."""
+    results = {}
+    for model in (models or MODEL_SPECS):
+        try:
+            results[model] = fit_model(df, model)
+        except Exception as e:
+            print(f"MODEL {model} FAILED: {str(e)}")
+            results[model] = None
+    return results
+
+
+# ==========================================
+# 5. SPATIAL PLACEBO LOOP
+# ==========================================
+def placebo_fits(df, countries=PLACEBO_COUNTRIES):
+    """
+    Model C with each country's post-COVID interaction in place of
+    Thailand's. Yields (country, term, fit) per country, where fit() runs
+    the PanelOLS (entity effects, clustered by destination) and returns its
+    results. The design array is shared, so call fit() before advancing.
+    """
+    from linearmodels.panel import PanelOLS
+
+    from .panelframe import PanelFrame
+
+    # One design array for every country: only the placebo interaction column
+    # is overwritten per iteration, instead of copying and re-indexing the panel
+    pf = PanelFrame.from_frame(df)
+    exog, X = pf.design(['peace_index', 'ln_cpi', 'ln_gdp_china', 'ln_exchange_rate',
+                         'covid_dummy', 'post_covid'], extra=['placebo'])
+    y = pf.series('ln_arrivals')
+    post = pf['post_covid']
+    codes = {name: k for k, name in enumerate(pf.entities)}
+
+    def fit():
+        mod = PanelOLS(y, exog, entity_effects=True, time_effects=False)
+        return mod.fit(cov_type='clustered', cluster_entity=True)
+
+    for country in countries:
+        term = f'{country}_post_covid'
+        X[:, -1] = (pf.entity_codes == codes.get(country, -1)) * post
+        exog.columns = list(exog.columns[:-1]) + [term]
+        yield country, term, fit
+
+
+@timed('placebo loop', 'model')
+def run_placebo(df, countries=PLACEBO_COUNTRIES):
+    """
+    Re-estimate Model C once per country with that country's post-COVID
+    interaction in place of Thailand's (placebo_regressions.py).
+    """
+    placebo_results = []
+    for country, term, fit in placebo_fits(df, countries):
+        try:
+            with stage(f'placebo {country}', 'model'):
+                res = fit()
+            placebo_results.append({
+                'country': country,
+                'coefficient': res.params[term],
+                'std_error': res.std_errors[term],
+                't_stat': res.tstats[term],
+                'p_value': res.pvalues[term],
+                'is_thailand': country == 'Thailand',
+            })
+        except Exception:
+            placebo_results.append({
+                'country': country,
+                'coefficient': np.nan,
+                'std_error': np.nan,
+                't_stat': np.nan,
+                'p_value': np.nan,
+                'is_thailand': country == 'Thailand',
+            })
+
+    return pd.DataFrame(placebo_results)
+
+
+# ==========================================
+# 6. HETEROSKEDASTICITY AND AUTOCORRELATION
+# ==========================================
+def groupwise_wald_test(residuals):
+    """
+    Modified Wald test for groupwise heteroskedasticity.
+
+    W = sum_i n_i * (ln(s^2) - ln(s_i^2))^2 ~ chi2(N - 1)
+    """
+    from scipy import stats
+
+    by_country = residuals.groupby(level=0)
+    variances = by_country.var(ddof=1)
+    counts = by_country.size()
+    pooled_var = np.var(residuals.values, ddof=1)
+
+    valid = variances > 0
+    wald_stat = float((counts[valid] * (np.log(pooled_var) - np.log(variances[valid])) ** 2).sum())
+    df_wald = len(variances) - 1
+    p_value = 1 - stats.chi2.cdf(wald_stat, df_wald)
+    return {'statistic': wald_stat, 'df': df_wald, 'p_value': p_value,
+            'variances': variances}
+
+
+def wooldridge_test(residuals):
+    """
+    Wooldridge test for first-order autocorrelation: regress the differenced
+    residual on its lag and test H0: beta = -0.5.
+    """
+    from scipy import stats
+
+    resid = residuals.sort_index()
+    lagged = resid.groupby(level=0).shift(1)
+    delta = resid - lagged
+    mask = lagged.notna()
+
+    # Countries with fewer than 3 observations are skipped, as in the script
+    counts = resid.groupby(level=0).transform('size')
+    mask &= counts > 2
+    if mask.sum() < 3:
+        return {'slope': np.nan, 'f_stat': np.nan, 'df': 0, 'p_value': np.nan}
+
+    fit = stats.linregress(lagged[mask].values, delta[mask].values)
+    t_stat = (fit.slope + 0.5) / fit.stderr
+    df_wool = int(mask.sum()) - 2
+    f_stat = t_stat ** 2
+    p_value = 1 - stats.f.cdf(f_stat, 1, df_wool)
+    return {'slope': fit.slope, 'f_stat': f_stat, 'df': df_wool, 'p_value': p_value}
+
+
+@timed('heteroskedasticity/autocorrelation tests', 'diagnostic')
+def heteroskedasticity_tests(df, models=DIAGNOSTIC_MODELS):
+    """Fit each diagnostic model (entity FE, no constant) and run both tests."""
+    from linearmodels.panel import PanelOLS
+
+    rows = []
+    for model in models:
+        spec = MODEL_SPECS[model]
+        res = PanelOLS(df['ln_arrivals'], df[spec['exog']], entity_effects=True).fit(
+            cov_type='clustered', cluster_entity=True)
+        wald = groupwise_wald_test(res.resids)
+        wool = wooldridge_test(res.resids)
+        rows.append({
+            'Model': f'Model {model}',
+            'Wald_Statistic': wald['statistic'],
+            'Wald_DF': wald['df'],
+            'Wald_PValue': wald['p_value'],
+            'Wooldridge_F': wool['f_stat'],
+            'Wooldridge_PValue': wool['p_value'],
+        })
+    return pd.DataFrame(rows)
+
+
+# ==========================================
+# 7. MULTICOLLINEARITY
+# ==========================================
+@timed('VIF', 'diagnostic')
+def compute_vif(df, variables):
+    """Calculate VIF for a set of variables (constant added, not reported)."""
+    import statsmodels.api as sm
+    from statsmodels.stats.outliers_influence import variance_inflation_factor
+
+    X_with_const = sm.add_constant(df[variables])
+    values = X_with_const.values
+    vif_data = pd.DataFrame({
+        'Variable': variables,
+        'VIF': [variance_inflation_factor(values, i + 1) for i in range(len(variables))],
+    })
+    return vif_data.sort_values('VIF', ascending=False)
+
+
+# ==========================================
+# 8. RECOVERY RATES
+# ==========================================
+@timed('recovery rates', 'diagnostic')
+def recovery_rates(df, countries=RECOVERY_COUNTRIES, baseline_year=2019,
+                   start_year=2022, end_year=2024):
+    """
+    Recovery of Chinese arrivals (recovery_rate_regression.py): percentage
+    points of the baseline-year level regained between start_year and end_year.
+    Countries missing any of the three years are dropped. See
+    tourism.recovery for the full set of metrics.
+    """
+    from .recovery import recovery_metrics
+
+    out = recovery_metrics(df, baseline_year, [end_year], start_year, end_year,
+                           countries=countries, missing='drop')
+    return out[['Country', 'recovery_rate', f'pct_{end_year}_vs_{baseline_year}']]
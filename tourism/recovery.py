@@ -0,0 +1,179 @@
+"""
+Recovery metrics for Chinese arrivals relative to a pre-COVID baseline.
+
+recovery_rate_regression.py, scripts/check_recovery_rates.py and the
+scorecard in run_new_models.py each looped over countries. They filtered
+the frame once per year and took `.values[0]`, which raises or silently
+skips when a year is missing, and they hard-coded 2019, 2022 and 2024.
+Here the panel is pivoted once to a (countries x years) array and every
+metric is an array operation over all countries:
+
+- pct_<year>_vs_<baseline>: arrivals in a target year as % of the baseline,
+- recovery_rate: percentage points of the baseline regained between
+  start_year and end_year, (end - start) / baseline * 100,
+- trough_year / trough_pct: the lowest point after the baseline,
+- recovery_year / years_to_recovery: the first year after the trough in
+  which arrivals are back to `threshold` % of the baseline, and the years
+  that took from the baseline (NaN if not recovered yet).
+
+Missing years are NaN in the pivot. `missing` chooses what happens next:
+'keep' leaves the affected metrics NaN, 'drop' removes countries without
+the baseline, start or end year (the old scripts' behaviour), and
+'interpolate' fills interior gaps linearly within each country before any
+metric is computed. It never extrapolates past the last observed year.
+
+Usage:
+    from tourism.recovery import recovery_grid, recovery_metrics
+    from tourism.pipeline import load_panel
+    recovery_metrics(load_panel(), baseline_year=2019, target_years=[2022, 2023, 2024])
+    recovery_grid(load_panel(), baseline_years=[2018, 2019])   # every baseline x year
+"""
+
+import numpy as np
+import pandas as pd
+
+from .instrument import timed
+
+VALUE = 'arrivals_from_china'
+
+
+def pivot_years(df, value=VALUE, countries=None, entity='Country', time='Year'):
+    """
+    (countries x years) frame of `value` over the full year range, so that
+    missing years are NaN columns or cells rather than absent rows. Raises
+    on duplicate country-years.
+    """
+    wide = df.pivot(index=entity, columns=time, values=value)
+    years = np.arange(int(wide.columns.min()), int(wide.columns.max()) + 1)
+    wide = wide.reindex(columns=years)
+    if countries is not None:
+        wide = wide.reindex(list(countries))
+    return wide.astype(float)
+
+
+def _columns(wide, years):
+    """Column positions of `years` in the pivot (-1 where a year is outside it)."""
+    pos = np.searchsorted(wide.columns.values, years)
+    pos = np.minimum(pos, wide.shape[1] - 1)
+    return np.where(wide.columns.values[pos] == years, pos, -1)
+
+
+def _take(A, cols):
+    """A[:, cols] with NaN columns for cols == -1."""
+    out = A[:, np.maximum(cols, 0)]
+    out[:, cols < 0] = np.nan
+    return out
+
+
+def _time_to_recovery(post, post_years, threshold):
+    """
+    Trough year and % of baseline, and the first later year at or above
+    `threshold`, for a (countries x post-baseline years) % array.
+    """
+    D = len(post)
+    if post.shape[1] == 0:
+        return np.full(D, np.nan), np.full(D, np.nan), np.full(D, np.nan)
+    observed = ~np.isnan(post).all(axis=1)
+    trough = np.argmin(np.where(np.isnan(post), np.inf, post), axis=1)
+    later = np.arange(post.shape[1])[None, :] > trough[:, None]
+    back = later & (np.nan_to_num(post, nan=-np.inf) >= threshold)
+    first = np.argmax(back, axis=1)
+    trough_pct = np.take_along_axis(post, trough[:, None], axis=1)[:, 0]
+    return (np.where(observed, post_years[trough], np.nan),
+            np.where(observed, trough_pct, np.nan),
+            np.where(back.any(axis=1), post_years[first], np.nan))
+
+
+@timed('recovery metrics', 'diagnostic')
+def recovery_metrics(df, baseline_year=2019, target_years=(2022, 2023, 2024), start_year=2022,
+                     end_year=2024, countries=None, value=VALUE, threshold=100.0,
+                     missing='keep', entity='Country', time='Year'):
+    """
+    Recovery ratios, percentage-point gains and time-to-recovery for every
+    country in one pass.
+
+    Parameters
+    ----------
+    df : long panel with entity, time and `value` columns
+    baseline_year : pre-shock reference year (100%)
+    target_years : years reported as % of the baseline (pct_<year>_vs_<baseline>)
+    start_year, end_year : window for recovery_rate; None skips it
+    countries : rows to report, in order (default: every country in df)
+    threshold : % of the baseline that counts as recovered
+    missing : 'keep', 'drop' or 'interpolate' (see module docstring)
+
+    Returns one row per country with columns Country, baseline,
+    arrivals_<year> and pct_<year>_vs_<baseline> for each target year,
+    recovery_rate, trough_year, trough_pct, recovery_year,
+    years_to_recovery and missing_years (gaps after the baseline in the
+    raw data).
+    """
+    if missing not in ('keep', 'drop', 'interpolate'):
+        raise ValueError(f"Unknown missing-year handling: {missing}")
+    wide = pivot_years(df, value, countries, entity, time)
+    years = wide.columns.values
+    after = years > baseline_year
+    gaps = wide.loc[:, after].isna().sum(axis=1).values.astype(int)
+    if missing == 'interpolate':
+        wide = wide.interpolate(axis=1, limit_area='inside')
+    A = wide.values
+
+    target_years = np.asarray(list(target_years), dtype=int)
+    base = _take(A, _columns(wide, np.array([baseline_year])))
+    levels = _take(A, _columns(wide, target_years))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_all = A / base * 100
+        pct = levels / base * 100
+
+    out = pd.DataFrame({entity: wide.index.values, 'baseline': base[:, 0]})
+    for j, year in enumerate(target_years):
+        out[f'arrivals_{year}'] = levels[:, j]
+        out[f'pct_{year}_vs_{baseline_year}'] = pct[:, j]
+    if start_year is not None and end_year is not None:
+        ends = _take(pct_all, _columns(wide, np.array([start_year, end_year])))
+        out['recovery_rate'] = ends[:, 1] - ends[:, 0]
+
+    out['trough_year'], out['trough_pct'], out['recovery_year'] = _time_to_recovery(
+        pct_all[:, after], years[after], threshold)
+    out['years_to_recovery'] = out['recovery_year'] - baseline_year
+    out['missing_years'] = gaps
+
+    if missing == 'drop':
+        required = ['baseline'] + [f'arrivals_{y}' for y in target_years]
+        if 'recovery_rate' in out:
+            required.append('recovery_rate')
+        out = out[out[required].notna().all(axis=1)]
+    return out.reset_index(drop=True)
+
+
+@timed('recovery grid', 'diagnostic')
+def recovery_grid(df, baseline_years=(2018, 2019), target_years=None, countries=None,
+                  value=VALUE, missing='keep', entity='Country', time='Year'):
+    """
+    Target level as % of baseline level for every country, baseline year and
+    target year, from one broadcast division. target_years defaults to every
+    year after the earliest baseline. missing is handled as in
+    recovery_metrics ('drop' removes the NaN cells). Returns a long
+    DataFrame with Country, baseline_year, year and pct.
+    """
+    if missing not in ('keep', 'drop', 'interpolate'):
+        raise ValueError(f"Unknown missing-year handling: {missing}")
+    wide = pivot_years(df, value, countries, entity, time)
+    if missing == 'interpolate':
+        wide = wide.interpolate(axis=1, limit_area='inside')
+    if target_years is None:
+        target_years = wide.columns.values[wide.columns.values > min(baseline_years)]
+    base = _take(wide.values, _columns(wide, np.asarray(baseline_years)))
+    level = _take(wide.values, _columns(wide, np.asarray(target_years)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = level[:, None, :] / base[:, :, None] * 100
+    D, B, T = pct.shape
+    out = pd.DataFrame({
+        entity: np.repeat(wide.index.values, B * T),
+        'baseline_year': np.tile(np.repeat(baseline_years, T), D),
+        'year': np.tile(target_years, D * B),
+        'pct': pct.ravel(),
+    })
+    if missing == 'drop':
+        out = out[out['pct'].notna()].reset_index(drop=True)
+    return out
@@ -0,0 +1,184 @@
+"""
+Rolling and expanding-window elasticities by recursive least squares.
+
+run_advanced_analysis.py estimates a single ln_rer elasticity over the whole
+sample. This module traces how the Model 1 coefficients (const, ln_gdp_china,
+ln_rer, covid_dummy) move over time for every destination at once:
+
+- all destinations are stacked into (D, T, k) arrays and updated together,
+- each step adds the newest year with a Sherman-Morrison rank-one update of
+  P = (X'X)^-1 and, for rolling windows, removes the oldest year with the
+  matching rank-one downdate, so no window is refit from scratch,
+- the residual sum of squares is carried along the recursion, giving
+  classical OLS standard errors and confidence bands for each window.
+
+Continuous regressors are centred on each destination's mean before the
+recursion (and the intercept mapped back afterwards) to keep P well
+conditioned. A tiny ridge term on regressors with no variation in the window
+(covid_dummy before 2020) keeps X'X invertible without touching the other
+coefficients, and the state is re-solved exactly whenever a regressor enters
+or leaves identification. Coefficients that are not identified in a window
+are reported as NaN.
+
+Usage:
+    from tourism.rolling import rolling_elasticities
+    paths = rolling_elasticities(panel_df, window=8)
+    paths[paths['variable'] == 'ln_rer']
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import TS_REGRESSORS, stack_destinations
+
+RIDGE = 1e-8
+
+
+def _rank_one(P, b, J, x, y, sign):
+    """
+    Add (sign=+1) or remove (sign=-1) one observation per destination.
+
+    P: (D, k, k), b: (D, k), J: (D,), x: (D, k), y: (D,). Rows with x = 0 and
+    y = 0 leave the state unchanged.
+    """
+    Px = np.einsum('dij,dj->di', P, x)
+    denom = 1.0 + sign * np.einsum('di,di->d', x, Px)
+    e = y - np.einsum('di,di->d', x, b)
+    gain = Px / denom[:, None]
+    b = b + sign * gain * e[:, None]
+    J = J + sign * e ** 2 / denom
+    P = P - sign * np.einsum('di,dj->dij', gain, Px)
+    return P, b, J
+
+
+def _initial_state(X, Y, lam):
+    """Exact solution on a block of rows; lam (D, k) is a per-column ridge."""
+    XtX = np.einsum('dti,dtj->dij', X, X) + lam[:, :, None] * np.eye(X.shape[-1])
+    P = np.linalg.inv(XtX)
+    b = np.einsum('dij,dj->di', P, np.einsum('dti,dt->di', X, Y))
+    resid = Y - np.einsum('dti,di->dt', X, b)
+    J = (resid ** 2).sum(axis=1) + (lam * b ** 2).sum(axis=1)
+    return P, b, J
+
+
+def _identified(X, mask, lo, hi, columns):
+    """Which regressors vary inside rows [lo, hi) of each destination."""
+    Xw = X[:, lo:hi]
+    n = mask[:, lo:hi].sum(axis=1)[:, None]
+    mean = Xw.sum(axis=1) / np.maximum(n, 1)
+    var = (Xw ** 2).sum(axis=1) / np.maximum(n, 1) - mean ** 2
+    ok = var > 1e-12
+    if 'const' in columns:
+        ok[:, columns.index('const')] = True
+    return ok
+
+
+@timed('rolling RLS', 'model')
+def recursive_paths(Y, X, mask, columns, window=None, min_obs=None, refresh_every=None):
+    """
+    Core recursion on stacked arrays.
+
+    window=None gives expanding windows starting at the first year; otherwise
+    windows of `window` consecutive years. Returns (ends, starts, b, J, P, n)
+    where the arrays are indexed by output step along the first axis.
+    """
+    D, T, k = X.shape
+    min_obs = min_obs or k + 2
+    first = window if window else min_obs
+    if first > T:
+        raise ValueError(f"Window of {first} years is longer than the {T}-year sample")
+
+    ident = _identified(X, mask, 0, first, columns)
+    lam = RIDGE * ~ident
+    P, b, J = _initial_state(X[:, :first], Y[:, :first], lam)
+
+    ends, starts, out_b, out_J, out_P = [first - 1], [0], [b], [J], [P]
+    for t in range(first, T):
+        P, b, J = _rank_one(P, b, J, X[:, t], Y[:, t], +1)
+        lo = 0
+        if window:
+            lo = t - window + 1
+            P, b, J = _rank_one(P, b, J, X[:, lo - 1], Y[:, lo - 1], -1)
+        # Re-anchor on the exact solution when a regressor enters or leaves
+        # identification (the ridge direction would otherwise lose precision),
+        # and optionally every refresh_every steps to stop round-off drift
+        now = _identified(X, mask, lo, t + 1, columns)
+        if (now != ident).any() or (refresh_every and (t - first + 1) % refresh_every == 0):
+            ident = now
+            lam = RIDGE * ~ident
+            P, b, J = _initial_state(X[:, lo:t + 1], Y[:, lo:t + 1], lam)
+        ends.append(t)
+        starts.append(lo)
+        out_b.append(b)
+        out_J.append(J)
+        out_P.append(P)
+
+    n = np.array([mask[:, s:e + 1].sum(axis=1) for s, e in zip(starts, ends)])
+    return (np.array(ends), np.array(starts), np.stack(out_b), np.stack(out_J),
+            np.stack(out_P), n)
+
+
+def rolling_elasticities(df, y='ln_arrivals', x=TS_REGRESSORS, entity='Country', time='Year',
+                         window=10, level=0.95, min_obs=None, refresh_every=None):
+    """
+    Coefficient paths with confidence bands for every destination in one pass.
+
+    Parameters
+    ----------
+    df : competitor_panel.csv-style frame, or thailand_timeseries.csv (no
+        Country column; treated as a single destination)
+    window : years per rolling window, or None for expanding windows
+    level : confidence level of the bands (t distribution, n - k df)
+    min_obs : first expanding window size (default k + 2)
+    refresh_every : optionally re-solve exactly every N steps
+
+    Returns a long DataFrame with one row per destination, window and
+    coefficient: Country, Year (window end), window_start, nobs, variable,
+    coef, std_error, lower, upper.
+    """
+    names, years, Y, X, mask, columns = stack_destinations(df, y, x, entity, time)
+
+    # Centre continuous regressors (not dummies) on each destination's mean
+    binary = np.all((X == 0) | (X == 1), axis=(0, 1))
+    shift = np.where(binary, 0.0, X.sum(axis=1) / mask.sum(axis=1)[:, None])
+    Xc = np.where(mask[..., None], X - shift[:, None, :], 0.0)
+
+    ends, starts, B, J, P, n = recursive_paths(Y, Xc, mask, columns, window, min_obs,
+                                               refresh_every)
+
+    # Map the centred intercept back: b_orig = A b, Cov_orig = A Cov A'
+    S, D, k = B.shape
+    A = np.broadcast_to(np.eye(k), (D, k, k)).copy()
+    A[:, 0, :] -= shift
+    B = np.einsum('dij,sdj->sdi', A, B)
+    P = np.einsum('dij,sdjk,dlk->sdil', A, P, A)
+
+    ident = np.stack([_identified(X, mask, s, e + 1, columns) for s, e in zip(starts, ends)])
+    k_eff = ident.sum(axis=2)
+    dof = np.maximum(n - k_eff, 1)
+    sigma2 = np.maximum(J, 0) / dof
+    se = np.sqrt(np.maximum(sigma2[..., None] * np.diagonal(P, axis1=2, axis2=3), 0))
+    crit = stats.t.ppf(0.5 + level / 2, dof)[..., None]
+
+    B = np.where(ident, B, np.nan)
+    se = np.where(ident & (n - k_eff > 0)[..., None], se, np.nan)
+
+    return pd.DataFrame({
+        entity: np.tile(np.repeat(np.asarray(names, dtype=object), k), S),
+        time: np.repeat(years[ends], D * k),
+        'window_start': np.repeat(years[starts], D * k),
+        'nobs': np.repeat(n.ravel(), k),
+        'variable': np.tile(columns, S * D),
+        'coef': B.ravel(),
+        'std_error': se.ravel(),
+        'lower': (B - crit * se).ravel(),
+        'upper': (B + crit * se).ravel(),
+    })
+
+
+def expanding_elasticities(df, **kwargs):
+    """Expanding-window paths (window grows from min_obs to the full sample)."""
+    kwargs['window'] = None
+    return rolling_elasticities(df, **kwargs)
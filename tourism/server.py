@@ -0,0 +1,416 @@
+"""
+Local JSON service for the dashboard.
+
+The React dashboard in src/ fetches Primary_Dataset_For_Panel_FINAL.csv
+whole and hard-codes model numbers. This module serves the same results as
+small JSON endpoints using only the standard library HTTP server (the
+analysis itself still uses the pipeline's pandas/linearmodels stack):
+
+    GET /api/health
+    GET /api/panel?countries=Thailand,Japan&start=2008&end=2024&columns=Year,arrivals_from_china
+    GET /api/models                     specifications A-G
+    GET /api/models/F?sample=placebo    coefficient table for one model
+    GET /api/placebo                    spatial placebo table (Model C)
+    GET /api/recovery?baseline=2019&targets=2023,2024   recovery metrics
+    GET /api/recovery?baselines=2018,2019               % of each baseline, every year
+    GET /api/whatif?exchange_rate=-0.1&peace_index.Thailand=0.2
+    GET /api/forecast?model=F&paths=100000&rer_change.Thailand=-0.1
+
+Responses are JSON held in an in-memory LRU cache. The cache key is the
+path plus sorted query, with the data file's size and mtime included so
+that edits to the CSV invalidate old entries. Every response carries an
+ETag (If-None-Match gives 304 Not Modified) and is gzip-compressed when
+the client accepts it.
+
+    python -m tourism serve --port 8000
+    python -m tourism loadtest http://127.0.0.1:8000/api/panel --requests 2000
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from .pipeline import DATA_PATH, MODEL_SPECS
+
+CACHE_ENTRIES = 256
+MIN_GZIP_BYTES = 512
+MAX_PATHS = 1_000_000
+
+
+class NotFound(Exception):
+    """No endpoint for the requested path."""
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache of encoded responses."""
+
+    def __init__(self, maxsize=CACHE_ENTRIES):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ==========================================
+# ENDPOINTS
+# ==========================================
+def _split(value):
+    return [v for v in value.split(',') if v] if value else None
+
+
+def _records(df):
+    """DataFrame -> JSON text (NaN -> null) without a round trip through Python objects."""
+    return df.to_json(orient='records')
+
+
+def _sample(params):
+    from . import pipeline
+
+    name = {'model1': 'MODEL1_COUNTRIES', 'placebo': 'PLACEBO_COUNTRIES',
+            'recovery': 'RECOVERY_COUNTRIES'}[params.get('sample', 'model1')]
+    return _split(params.get('countries')) or getattr(pipeline, name)
+
+
+def api_health(app, params):
+    return {'status': 'ok', 'data': app.data_path, 'cache_entries': len(app.cache),
+            'cache_hits': app.cache.hits, 'cache_misses': app.cache.misses}
+
+
+def api_panel(app, params):
+    df = app.raw_panel()
+    countries = _split(params.get('countries'))
+    if countries:
+        df = df[df['Country'].isin(countries)]
+    if 'start' in params:
+        df = df[df['Year'] >= int(params['start'])]
+    if 'end' in params:
+        df = df[df['Year'] <= int(params['end'])]
+    columns = _split(params.get('columns'))
+    if columns:
+        df = df[[c for c in ['Country'] + columns if c in df.columns]]
+    return _records(df)
+
+
+def api_models(app, params):
+    return {model: {'name': spec['name'], 'exog': spec['exog'],
+                    'time_effects': spec['time_effects']}
+            for model, spec in MODEL_SPECS.items()}
+
+
+def api_model(app, params, model):
+    import pandas as pd
+    from . import pipeline
+
+    if model not in MODEL_SPECS:
+        raise KeyError(f"Unknown model: {model}")
+    panel = pipeline.prepare_panel(app.raw_panel(), countries=_sample(params),
+                                   start_year=int(params.get('start', 2008)),
+                                   end_year=int(params.get('end', 2024)))
+    res = pipeline.fit_model(panel, model, cov_type=params.get('cov_type', 'clustered'))
+    table = pd.DataFrame({'variable': res.params.index, 'coef': res.params.values,
+                          'std_error': res.std_errors.values, 'pvalue': res.pvalues.values})
+    return ('{"model": %s, "name": %s, "nobs": %d, "rsquared_within": %s, "coefficients": %s}'
+            % (json.dumps(model), json.dumps(MODEL_SPECS[model]['name']), res.nobs,
+               json.dumps(float(res.rsquared_within)), _records(table)))
+
+
+def api_placebo(app, params):
+    from . import pipeline
+
+    countries = _split(params.get('countries')) or pipeline.PLACEBO_COUNTRIES
+    panel = pipeline.prepare_panel(app.raw_panel(), countries=countries)
+    return _records(pipeline.run_placebo(panel, countries=countries))
+
+
+def api_recovery(app, params):
+    from . import pipeline
+    from .recovery import recovery_grid, recovery_metrics
+
+    countries = _split(params.get('countries')) or pipeline.RECOVERY_COUNTRIES
+    if 'baselines' in params:
+        targets = params.get('targets')
+        return _records(recovery_grid(app.raw_panel(),
+                                      [int(y) for y in _split(params['baselines'])],
+                                      [int(y) for y in _split(targets)] if targets else None,
+                                      countries=countries, missing=params.get('missing', 'keep')))
+    kwargs = {name: int(params[key]) for key, name in [('baseline', 'baseline_year'),
+                                                       ('start', 'start_year'),
+                                                       ('end', 'end_year')] if key in params}
+    if 'targets' in params:
+        kwargs['target_years'] = [int(y) for y in _split(params['targets'])]
+    return _records(recovery_metrics(app.raw_panel(), countries=countries,
+                                     missing=params.get('missing', 'keep'), **kwargs))
+
+
+def _shock_params(params, names):
+    """exchange_rate=-0.1 and peace_index.Thailand=0.2 style query keys."""
+    shocks = {}
+    for key, value in params.items():
+        name, _, country = key.partition('.')
+        if name not in names:
+            continue
+        if country:
+            shocks.setdefault(name, {})[country] = float(value)
+        else:
+            shocks[name] = float(value)
+    return shocks
+
+
+def api_whatif(app, params):
+    from .whatif import SHOCKS
+
+    result = app.whatif_engine().query(_shock_params(params, SHOCKS),
+                              models=_split(params.get('models')),
+                              countries=_split(params.get('countries')))
+    return _records(result)
+
+
+def _n_paths(value):
+    """Simulated paths from the query, bounded so one request cannot exhaust memory."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise ValueError(f"paths must be an integer, got {value!r}") from None
+    if not 1 <= n <= MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {MAX_PATHS}, got {n}")
+    return n
+
+
+def api_forecast(app, params):
+    from .forecast import forecast_arrivals, model_snapshot
+
+    snapshot = model_snapshot(app.raw_panel(), model=params.get('model', 'F'),
+                              countries=_sample(params))
+    shocks = _shock_params(params, ['rer_change', 'peace_change'])
+    fan = forecast_arrivals(snapshot, n_paths=_n_paths(params.get('paths', '100000')),
+                            seed=int(params.get('seed', 0)),
+                            gdp_growth=float(params.get('gdp_growth', 0.045)), **shocks)
+    return _records(fan)
+
+
+ROUTES = {
+    '/api/health': api_health,
+    '/api/panel': api_panel,
+    '/api/models': api_models,
+    '/api/placebo': api_placebo,
+    '/api/recovery': api_recovery,
+    '/api/whatif': api_whatif,
+    '/api/forecast': api_forecast,
+}
+UNCACHED = {'/api/health'}
+
+
+# ==========================================
+# APPLICATION AND HANDLER
+# ==========================================
+class ResultsApp:
+    """Routes, data location and the response cache shared by all request threads."""
+
+    def __init__(self, data_path=DATA_PATH, cache_entries=CACHE_ENTRIES):
+        self.data_path = data_path
+        self.cache = LRUCache(cache_entries)
+        self.whatif = None
+        self._whatif_stamp = None
+        self._panel = None
+        self._panel_stamp = None
+        self._lock = threading.Lock()
+
+    def data_stamp(self):
+        st = os.stat(self.data_path)
+        return f'{st.st_size}-{st.st_mtime_ns}'
+
+    def raw_panel(self):
+        """The panel CSV, re-read only when the file changes."""
+        from .pipeline import load_panel
+
+        stamp = self.data_stamp()
+        with self._lock:
+            if self._panel is None or stamp != self._panel_stamp:
+                self._panel, self._panel_stamp = load_panel(self.data_path), stamp
+            return self._panel
+
+    def whatif_engine(self):
+        """The what-if engine (tourism.whatif), reloaded only when the file changes."""
+        from .whatif import WhatIf
+
+        stamp = self.data_stamp()
+        with self._lock:
+            if self.whatif is None or stamp != self._whatif_stamp:
+                self.whatif, self._whatif_stamp = WhatIf.load(data_path=self.data_path), stamp
+            return self.whatif
+
+    def resolve(self, path, params):
+        if path in ROUTES:
+            return ROUTES[path](self, params)
+        if path.startswith('/api/models/'):
+            return api_model(self, params, path.rsplit('/', 1)[1])
+        raise NotFound(path)
+
+    def respond(self, path, params):
+        """(body, etag) for a request, from the cache when possible."""
+        key = (path, tuple(sorted(params.items())), self.data_stamp())
+        entry = None if path in UNCACHED else self.cache.get(key)
+        if entry is None:
+            payload = self.resolve(path, params)
+            body = (payload if isinstance(payload, str) else json.dumps(payload)).encode()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            gz = gzip.compress(body, compresslevel=6) if len(body) >= MIN_GZIP_BYTES else None
+            entry = (body, gz, etag)
+            if path not in UNCACHED:
+                self.cache.put(key, entry)
+        return entry
+
+
+class ResultsHandler(BaseHTTPRequestHandler):
+    app = None
+    quiet = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        try:
+            body, gz, etag = self.app.respond(url.path.rstrip('/') or '/', params)
+        except NotFound:
+            return self._error(404, f'No endpoint {url.path}')
+        except (KeyError, ValueError) as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            return self._error(500, f'{type(e).__name__}: {e}')
+
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self._common_headers()
+            self.end_headers()
+            return
+        use_gzip = gz is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        data = gz if use_gzip else body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self._common_headers()
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _common_headers(self):
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+
+    def _error(self, status, message):
+        data = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self._common_headers()
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8000, data_path=DATA_PATH, cache_entries=CACHE_ENTRIES,
+                quiet=False):
+    """Build (but do not start) a threaded server bound to host:port."""
+    handler = type('Handler', (ResultsHandler,),
+                   {'app': ResultsApp(data_path, cache_entries), 'quiet': quiet})
+    server_class = type('Server', (ThreadingHTTPServer,), {'request_queue_size': 128})
+    return server_class((host, port), handler)
+
+
+def serve(host='127.0.0.1', port=8000, data_path=DATA_PATH, cache_entries=CACHE_ENTRIES,
+          quiet=False):
+    server = make_server(host, port, data_path, cache_entries, quiet)
+    print(f"Serving results on http://{host}:{server.server_address[1]}/api/health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ==========================================
+# LOAD TEST
+# ==========================================
+def load_test(url, requests=1000, concurrency=8, gzip_ok=True, etag=False):
+    """
+    Hit `url` from `concurrency` threads and report latency percentiles (ms)
+    and throughput. With etag=True each request revalidates with the ETag
+    from a first request (measuring the 304 path).
+    """
+    import urllib.request
+
+    headers = {'Accept-Encoding': 'gzip'} if gzip_ok else {}
+    if etag:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as r:
+            headers['If-None-Match'] = r.headers['ETag']
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as r:
+                    r.read()
+                    status = r.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            dt = (time.perf_counter() - t0) * 1000
+            with lock:
+                latencies.append(dt)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    return {'requests': len(latencies), 'seconds': elapsed,
+            'requests_per_second': len(latencies) / elapsed,
+            'p50_ms': pct(50), 'p90_ms': pct(90), 'p99_ms': pct(99), 'max_ms': latencies[-1],
+            'status_counts': statuses}
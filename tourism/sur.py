@@ -0,0 +1,185 @@
+"""
+Seemingly unrelated regressions for per-destination elasticities.
+
+run_advanced_analysis.py fits one HAC OLS per competitor
+(Thailand, Viet Nam, Malaysia, Indonesia), so the elasticities can't be
+compared formally. Here all destinations form one system
+
+    y_d = X_d b_d + u_d,    Cov(u_dt, u_et) = sigma_de,
+
+estimated by feasible GLS with a shared cross-equation covariance. The
+stacked (D*T x D*k) design and the (D*T x D*T) Sigma (x) I matrix are never
+built. GLS needs only the D x D x k x k cross-moment tensor X_d'X_e and
+the vectors X_d'y_e, so the cost grows with D^2 k^2 T rather than (D T)^2.
+
+With more destinations than years the residual covariance is singular. It is
+shrunk towards its diagonal with the Schafer-Strimmer intensity, which is
+also available (shrinkage='auto') for smaller systems.
+
+Usage:
+    from tourism.sur import fit_sur, equality_tests
+    from tourism.pipeline import load_competitor_panel
+    res = fit_sur(load_competitor_panel())
+    equality_tests(res, 'ln_rer', reference='Thailand')
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import TS_REGRESSORS, stack_destinations
+
+
+def _shrinkage_intensity(U):
+    """Schafer-Strimmer intensity for shrinking a covariance towards its diagonal."""
+    T = U.shape[0]
+    W = U[:, :, None] * U[:, None, :]
+    S = W.mean(axis=0) * T / (T - 1)
+    var_S = ((W - W.mean(axis=0)) ** 2).sum(axis=0) * T / (T - 1) ** 3
+    off = ~np.eye(U.shape[1], dtype=bool)
+    denom = (S[off] ** 2).sum()
+    if denom == 0:
+        return 0.0
+    return float(np.clip(var_S[off].sum() / denom, 0.0, 1.0))
+
+
+def _residual_cov(U, shrinkage):
+    """Cross-equation covariance (T divisor) with optional shrinkage."""
+    T, D = U.shape
+    sigma = U.T @ U / T
+    if shrinkage == 'auto':
+        shrinkage = _shrinkage_intensity(U)
+    elif shrinkage is None:
+        shrinkage = _shrinkage_intensity(U) if D >= T else 0.0
+    sigma = (1 - shrinkage) * sigma + shrinkage * np.diag(np.diag(sigma))
+    return sigma, shrinkage
+
+
+def _gls(X, Y, sigma_inv, C):
+    """
+    Block GLS. X (D, T, k), Y (D, T), C = X_d'X_e (D, D, k, k).
+    Returns b (D, k) and (X' Omega^-1 X)^-1 as a (D*k, D*k) array.
+    """
+    D, T, k = X.shape
+    A = np.einsum('de,dekl->dkel', sigma_inv, C).reshape(D * k, D * k)
+    XtY = np.einsum('dtk,et->dek', X, Y)
+    rhs = np.einsum('de,dek->dk', sigma_inv, XtY).ravel()
+    A_inv = np.linalg.inv(A)
+    return (A_inv @ rhs).reshape(D, k), A_inv
+
+
+@timed('SUR', 'model')
+def fit_sur(df, y='ln_arrivals', x=TS_REGRESSORS, entity='Country', time='Year',
+            cov_type='unadjusted', maxlags=1, iterate=False, tol=1e-8, max_iter=100,
+            shrinkage=None):
+    """
+    Feasible GLS estimate of the per-destination system.
+
+    Parameters
+    ----------
+    df : competitor_panel.csv-style long frame. Only years observed for
+        every destination are used (SUR needs a common time index).
+    cov_type : 'unadjusted' (classical GLS) or 'HAC' (Newey-West on the
+        stacked GLS scores with `maxlags` Bartlett lags)
+    iterate : iterate FGLS until the coefficients converge (ML under normality)
+    shrinkage : None (only when destinations >= years), 'auto', or a
+        fixed intensity in [0, 1]
+
+    Returns a dict with names, years, columns, params (D, k), cov
+    (D*k, D*k), sigma (D, D), shrinkage, resid (T, D), the OLS params and
+    a long `table` DataFrame (Country, variable, coef, std_error, z,
+    pvalue, lower, upper).
+    """
+    names, years, Y, X, mask, columns = stack_destinations(df, y, x, entity, time)
+    common = mask.all(axis=0)
+    if common.sum() < len(columns) + 1:
+        raise ValueError("Too few years observed for every destination to fit a SUR system")
+    Y, X, years = Y[:, common], X[:, common], years[common]
+    D, T, k = X.shape
+
+    C = np.einsum('dtk,etl->dekl', X, X)
+    b_ols = np.linalg.solve(C[np.arange(D), np.arange(D)],
+                            np.einsum('dtk,dt->dk', X, Y)[..., None])[..., 0]
+    b = b_ols
+    for _ in range(max_iter if iterate else 1):
+        U = (Y - np.einsum('dtk,dk->dt', X, b)).T
+        sigma, lam = _residual_cov(U, shrinkage)
+        sigma_inv = np.linalg.inv(sigma)
+        b_new, A_inv = _gls(X, Y, sigma_inv, C)
+        converged = np.max(np.abs(b_new - b)) < tol
+        b = b_new
+        if converged:
+            break
+
+    U = (Y - np.einsum('dtk,dk->dt', X, b)).T
+    if cov_type == 'unadjusted':
+        cov = A_inv
+    elif cov_type == 'HAC':
+        # Scores g_t = X_t' Sigma^-1 u_t, one k-block per equation
+        G = (X * (U @ sigma_inv).T[:, :, None]).transpose(1, 0, 2).reshape(T, D * k)
+        S = G.T @ G
+        for lag in range(1, maxlags + 1):
+            w = 1 - lag / (maxlags + 1)
+            gamma = G[lag:].T @ G[:-lag]
+            S += w * (gamma + gamma.T)
+        cov = A_inv @ S @ A_inv
+    else:
+        raise ValueError(f"Unknown cov_type: {cov_type}")
+
+    se = np.sqrt(np.diag(cov)).reshape(D, k)
+    z = b / se
+    crit = stats.norm.ppf(0.975)
+    table = pd.DataFrame({
+        entity: np.repeat(np.asarray(names, dtype=object), k),
+        'variable': np.tile(columns, D),
+        'coef': b.ravel(),
+        'std_error': se.ravel(),
+        'z': z.ravel(),
+        'pvalue': (2 * stats.norm.sf(np.abs(z))).ravel(),
+        'lower': (b - crit * se).ravel(),
+        'upper': (b + crit * se).ravel(),
+    })
+    return {'names': names, 'years': years, 'columns': columns, 'params': b,
+            'cov': cov, 'sigma': sigma, 'shrinkage': lam, 'resid': U,
+            'params_ols': b_ols, 'table': table}
+
+
+def wald_test(params, cov, R, r=None):
+    """Chi-squared Wald test of R params = r. Returns (statistic, df, pvalue)."""
+    params = np.ravel(params)
+    R = np.atleast_2d(R)
+    r = np.zeros(len(R)) if r is None else np.asarray(r, dtype=float)
+    diff = R @ params - r
+    stat = float(diff @ np.linalg.solve(R @ cov @ R.T, diff))
+    return stat, len(R), float(stats.chi2.sf(stat, len(R)))
+
+
+def equality_tests(res, variable='ln_rer', reference='Thailand'):
+    """
+    Cross-equation equality tests for one coefficient: the joint test that
+    it is equal in every destination, then `reference` against each other
+    destination. Returns a DataFrame with test, difference, statistic, df
+    and pvalue.
+    """
+    names, k = res['names'], len(res['columns'])
+    j = res['columns'].index(variable)
+    pos = {name: d * k + j for d, name in enumerate(names)}
+    b = res['params'].ravel()
+
+    def contrast(a, c):
+        row = np.zeros(len(b))
+        row[pos[a]], row[pos[c]] = 1.0, -1.0
+        return row
+
+    rows = []
+    others = [n for n in names if n != reference]
+    R = np.array([contrast(reference, n) for n in others])
+    stat, df, p = wald_test(b, res['cov'], R)
+    rows.append({'test': f'{variable} equal across all destinations', 'difference': np.nan,
+                 'statistic': stat, 'df': df, 'pvalue': p})
+    for name in others:
+        stat, df, p = wald_test(b, res['cov'], contrast(reference, name))
+        rows.append({'test': f'{reference} = {name}', 'difference': b[pos[reference]] - b[pos[name]],
+                     'statistic': stat, 'df': df, 'pvalue': p})
+    return pd.DataFrame(rows)
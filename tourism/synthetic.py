@@ -0,0 +1,300 @@
+"""
+Synthetic gravity panels with known ground truth.
+
+Generates Country x Year (optionally Country x Origin x Year) panels with the
+same schema as Primary_Dataset_For_Panel_FINAL.csv:
+
+    Country, Year, arrivals_from_china, peace_index, CPI_destination,
+    gdp_china, exchange_rate, CPI_china, RER
+
+Log arrivals follow the Model C gravity equation
+
+    ln_arrivals = intercept + alpha_i + gamma_t
+                  + b1*peace_index + b2*ln_cpi + b3*ln_gdp_china + b4*ln_exchange_rate
+                  + covid*covid_dummy + post*post_covid
+                  + treatment_effect * treated_i * 1{Year >= treatment_year}
+                  + u_it,     u_it = rho*u_i,t-1 + sigma_i*e_it
+
+so estimators can be checked against the planted coefficients. Panels are
+built in chunks of whole countries (every AR(1) path is completed inside its
+chunk), so iter_panel_chunks / write_panel_csv can produce tens of millions
+of rows without holding the panel in memory.
+
+Usage:
+    from tourism.synthetic import generate_panel, write_panel_csv
+    df = generate_panel(n_countries=130, seed=1)
+    write_panel_csv('big_panel.csv', n_countries=500_000, chunk_rows=2_000_000)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Country names from the real panel; synthetic countries are appended after these
+REAL_COUNTRIES = ['Australia', 'Cambodia', 'Indonesia', 'Japan', 'Korea, Republic of',
+                  'Malaysia', 'Maldives', 'Philippines', 'Singapore', 'Thailand',
+                  'United Kingdom', 'United States of America', 'Viet Nam']
+
+# Model C point estimates (regression_results_model1.txt) used as default truth
+DEFAULT_BETA = {
+    'peace_index': 0.74,
+    'ln_cpi': 2.37,
+    'ln_gdp_china': 1.16,
+    'ln_exchange_rate': 0.92,
+}
+DEFAULT_INTERCEPT = -6.87
+DEFAULT_COVID_EFFECT = -3.57
+DEFAULT_POST_COVID_EFFECT = -1.81
+
+# Missingness seen in data_info.txt. Shares are fractions of countries;
+# year ranges are gap lengths drawn uniformly (inclusive).
+OBSERVED_MISSINGNESS = {
+    # Global Peace Index starts in 2008; Maldives (1 of 13) has none at all
+    'peace_index': {'before_year': 2008, 'all_missing_share': 1 / 13},
+    # Exchange rates start in 2000 for every country
+    'exchange_rate': {'before_year': 2000},
+    # CPI: 5 of 13 countries start late (6-16 years), Cambodia lacks the last year
+    'CPI_destination': {'leading_share': 5 / 13, 'leading_years': (6, 16),
+                        'trailing_share': 1 / 13, 'trailing_years': (1, 1)},
+    # Arrivals: Indonesia/Malaysia start late, Korea/Philippines/UK end early
+    'arrivals_from_china': {'leading_share': 2 / 13, 'leading_years': (4, 13),
+                            'trailing_share': 3 / 13, 'trailing_years': (1, 3)},
+}
+
+COLUMNS = ['Country', 'Year', 'arrivals_from_china', 'peace_index', 'CPI_destination',
+           'gdp_china', 'exchange_rate', 'CPI_china', 'RER']
+
+
+def country_names(n_countries):
+    """The 13 real destinations first, then 'Country 00014', 'Country 00015', ..."""
+    names = REAL_COUNTRIES[:n_countries]
+    names += [f'Country {i:05d}' for i in range(len(names) + 1, n_countries + 1)]
+    return names
+
+
+def origin_names(n_origins):
+    return ['China'] + [f'Origin {i:03d}' for i in range(2, n_origins + 1)]
+
+
+# ==========================================
+# COMMON (YEAR-LEVEL) SERIES
+# ==========================================
+def _common_series(years, n_origins, time_fe_sd, origin_fe_sd, rng):
+    """Origin GDP paths, China CPI, time and origin effects shared by every destination."""
+    n_years = len(years)
+
+    # Origin GDP: China starts near its 1995 level and grows ~10%/yr
+    start = np.log(np.r_[612.7, rng.uniform(200, 3000, size=n_origins - 1)])
+    growth = rng.normal(0.09, 0.03, size=(n_years, n_origins))
+    growth[0] = 0.0
+    ln_gdp = start + np.cumsum(growth, axis=0)
+
+    # China CPI (2010 = 100), ~2.5% inflation
+    ln_cpi_china = np.cumsum(rng.normal(0.025, 0.01, size=n_years))
+    base = np.flatnonzero(years == 2010)
+    ln_cpi_china += np.log(100) - ln_cpi_china[base[0] if len(base) else 0]
+
+    gamma = rng.normal(0, time_fe_sd, size=n_years) if time_fe_sd > 0 else np.zeros(n_years)
+    origin_fe = rng.normal(0, origin_fe_sd, size=n_origins) if n_origins > 1 else np.zeros(1)
+    return np.exp(ln_gdp), np.exp(ln_cpi_china), gamma, origin_fe
+
+
+def ground_truth(n_countries=13, start_year=1995, end_year=2024, n_origins=1,
+                 beta=None, intercept=DEFAULT_INTERCEPT, covid_effect=DEFAULT_COVID_EFFECT,
+                 post_covid_effect=DEFAULT_POST_COVID_EFFECT, treatment_effect=0.0,
+                 treated=('Thailand',), treatment_year=2022, rho=0.5,
+                 origin_fe_sd=0.5, time_fe_sd=0.0, seed=0, **_):
+    """Parameters planted in a panel generated with the same arguments."""
+    years = np.arange(start_year, end_year + 1)
+    _, _, gamma, origin_fe = _common_series(years, n_origins, time_fe_sd, origin_fe_sd,
+                                            np.random.default_rng([seed, 0]))
+    return {
+        'beta': dict(beta or DEFAULT_BETA),
+        'intercept': intercept,
+        'covid_effect': covid_effect,
+        'post_covid_effect': post_covid_effect,
+        'treatment_effect': treatment_effect,
+        'treated': [c for c in treated if c in set(country_names(n_countries))],
+        'treatment_year': treatment_year,
+        'rho': rho,
+        'time_effects': pd.Series(gamma, index=years, name='gamma'),
+        'origin_effects': pd.Series(origin_fe, index=origin_names(n_origins), name='origin_fe'),
+    }
+
+
+# ==========================================
+# CHUNK GENERATION
+# ==========================================
+def _gap_mask(n_units, n_years, share, gap_years, leading, rng):
+    """Boolean (n_units, n_years) mask with a leading or trailing gap for `share` of units."""
+    mask = np.zeros((n_units, n_years), dtype=bool)
+    hit = rng.random(n_units) < share
+    lengths = rng.integers(gap_years[0], gap_years[1] + 1, size=n_units)
+    t = np.arange(n_years)
+    if leading:
+        mask[hit] = t[None, :] < lengths[hit, None]
+    else:
+        mask[hit] = t[None, :] >= (n_years - lengths[hit, None])
+    return mask
+
+
+def _missing_mask(rule, years, n_units, rng):
+    n_years = len(years)
+    mask = np.zeros((n_units, n_years), dtype=bool)
+    if 'before_year' in rule:
+        mask |= years[None, :] < rule['before_year']
+    if rule.get('all_missing_share'):
+        mask |= (rng.random(n_units) < rule['all_missing_share'])[:, None]
+    if rule.get('leading_share'):
+        mask |= _gap_mask(n_units, n_years, rule['leading_share'], rule['leading_years'], True, rng)
+    if rule.get('trailing_share'):
+        mask |= _gap_mask(n_units, n_years, rule['trailing_share'], rule['trailing_years'], False, rng)
+    return mask
+
+
+def _generate_chunk(names, years, origins, common, params, rng):
+    n_c, n_o, n_t = len(names), len(origins), len(years)
+    gdp_origin, cpi_china, gamma, origin_fe = common
+    beta = params['beta']
+
+    # Destination-level covariates, shape (n_c, n_t)
+    ln_cpi_dest = (np.log(100)
+                   + rng.normal(0.03, 0.02, size=(n_c, 1)) * (years - 2010)[None, :]
+                   + np.cumsum(rng.normal(0, 0.01, size=(n_c, n_t)), axis=1))
+    ln_er = (rng.uniform(np.log(1e-4), np.log(5.0), size=(n_c, 1))
+             + np.cumsum(rng.normal(0, 0.05, size=(n_c, n_t)), axis=1))
+    peace = np.clip(rng.uniform(1.1, 2.5, size=(n_c, 1))
+                    + np.cumsum(rng.normal(0, 0.03, size=(n_c, n_t)), axis=1), 1.0, 4.0)
+
+    # Unit-level (destination x origin) effects and error scale
+    n_u = n_c * n_o
+    alpha = rng.normal(0, params['entity_fe_sd'], size=n_u)
+    origin_fe = np.tile(origin_fe, n_c)
+    sigma = params['sigma'] * np.exp(params['het_sd'] * rng.standard_normal(n_u))
+
+    # AR(1) errors with a stationary start
+    rho = params['rho']
+    u = np.empty((n_u, n_t))
+    u[:, 0] = rng.standard_normal(n_u) * sigma / np.sqrt(max(1 - rho ** 2, 1e-8))
+    shocks = rng.standard_normal((n_u, n_t)) * sigma[:, None]
+    for t in range(1, n_t):
+        u[:, t] = rho * u[:, t - 1] + shocks[:, t]
+
+    # Broadcast destination covariates to (destination, origin) units
+    def rep(a):
+        return np.repeat(a, n_o, axis=0)
+
+    ln_gdp = np.log(np.tile(gdp_origin.T, (n_c, 1)))
+    covid = ((years >= 2020) & (years <= 2021)).astype(float)
+    post = (years >= 2022).astype(float)
+    treated = np.isin(names, params['treated']).astype(float)
+    after = (years >= params['treatment_year']).astype(float)
+
+    ln_arrivals = (params['intercept'] + (alpha + origin_fe)[:, None] + gamma[None, :]
+                   + beta['peace_index'] * rep(peace)
+                   + beta['ln_cpi'] * rep(ln_cpi_dest)
+                   + beta['ln_gdp_china'] * ln_gdp
+                   + beta['ln_exchange_rate'] * rep(ln_er)
+                   + params['covid_effect'] * covid[None, :]
+                   + params['post_covid_effect'] * post[None, :]
+                   + params['treatment_effect'] * rep(treated[:, None]) * after[None, :]
+                   + u)
+
+    out = {
+        'Country': np.repeat(np.asarray(names, dtype=object), n_o * n_t),
+        'Year': np.tile(years, n_u),
+        'arrivals_from_china': np.exp(ln_arrivals).ravel(),
+        'peace_index': rep(peace).ravel(),
+        'CPI_destination': np.exp(rep(ln_cpi_dest)).ravel(),
+        'gdp_china': np.exp(ln_gdp).ravel(),
+        'exchange_rate': np.exp(rep(ln_er)).ravel(),
+        'CPI_china': np.tile(cpi_china, n_u),
+    }
+
+    # Missingness is drawn per destination and shared across its origins
+    missingness = params['missingness']
+    if missingness:
+        for col, rule in missingness.items():
+            mask = rep(_missing_mask(rule, years, n_c, rng)).ravel()
+            out[col] = np.where(mask, np.nan, out[col])
+
+    # RER computed after masking so the identity holds wherever RER is observed
+    out['RER'] = out['exchange_rate'] * out['CPI_destination'] / out['CPI_china']
+
+    chunk = pd.DataFrame(out)
+    if n_o > 1:
+        chunk.insert(1, 'Origin', np.tile(np.repeat(np.asarray(origins, dtype=object), n_t), n_c))
+        chunk = chunk[['Country', 'Origin'] + COLUMNS[1:]]
+    else:
+        chunk = chunk[COLUMNS]
+
+    if params['include_truth']:
+        chunk['true_entity_effect'] = np.repeat(alpha + origin_fe, n_t)
+        chunk['true_sigma'] = np.repeat(sigma, n_t)
+        chunk['true_error'] = u.ravel()
+    return chunk
+
+
+def iter_panel_chunks(n_countries=13, start_year=1995, end_year=2024, n_origins=1,
+                      beta=None, intercept=DEFAULT_INTERCEPT,
+                      covid_effect=DEFAULT_COVID_EFFECT,
+                      post_covid_effect=DEFAULT_POST_COVID_EFFECT,
+                      treatment_effect=0.0, treated=('Thailand',), treatment_year=2022,
+                      entity_fe_sd=1.5, origin_fe_sd=0.5, time_fe_sd=0.0,
+                      rho=0.5, sigma=0.3, het_sd=0.0,
+                      missingness='observed', include_truth=False,
+                      chunk_rows=1_000_000, seed=0):
+    """
+    Yield the panel as DataFrames of whole countries, each about chunk_rows rows.
+
+    Parameters
+    ----------
+    n_countries, start_year, end_year, n_origins : panel dimensions
+    beta : dict of slope coefficients (defaults to DEFAULT_BETA)
+    treatment_effect, treated, treatment_year : planted effect on log arrivals
+        for the treated countries from treatment_year on
+    entity_fe_sd, origin_fe_sd, time_fe_sd : standard deviations of the fixed effects
+    rho : AR(1) coefficient of the error
+    sigma, het_sd : error scale; sigma_i = sigma * exp(het_sd * z_i) gives
+        groupwise heteroskedasticity when het_sd > 0
+    missingness : 'observed' (data_info.txt patterns), None, or a dict of rules
+        in the format of OBSERVED_MISSINGNESS
+    include_truth : add true_entity_effect, true_sigma and true_error columns
+    seed : output is reproducible for a given seed and chunk_rows
+    """
+    years = np.arange(start_year, end_year + 1)
+    origins = origin_names(n_origins)
+    if missingness == 'observed':
+        missingness = OBSERVED_MISSINGNESS
+
+    params = {
+        'beta': dict(beta or DEFAULT_BETA), 'intercept': intercept,
+        'covid_effect': covid_effect, 'post_covid_effect': post_covid_effect,
+        'treatment_effect': treatment_effect, 'treated': list(treated),
+        'treatment_year': treatment_year, 'entity_fe_sd': entity_fe_sd,
+        'rho': rho, 'sigma': sigma, 'het_sd': het_sd,
+        'missingness': missingness, 'include_truth': include_truth,
+    }
+    common = _common_series(years, n_origins, time_fe_sd, origin_fe_sd,
+                            np.random.default_rng([seed, 0]))
+
+    per_country = n_origins * len(years)
+    countries_per_chunk = max(1, chunk_rows // per_country)
+    names = country_names(n_countries)
+    for chunk_index, lo in enumerate(range(0, n_countries, countries_per_chunk)):
+        rng = np.random.default_rng([seed, 1, chunk_index])
+        yield _generate_chunk(names[lo:lo + countries_per_chunk], years, origins,
+                              common, params, rng)
+
+
+def generate_panel(**kwargs):
+    """Generate the whole panel in memory (see iter_panel_chunks for arguments)."""
+    return pd.concat(list(iter_panel_chunks(**kwargs)), ignore_index=True)
+
+
+def write_panel_csv(path, **kwargs):
+    """Stream the panel to a CSV file chunk by chunk; returns the number of rows written."""
+    n_rows = 0
+    for i, chunk in enumerate(iter_panel_chunks(**kwargs)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        n_rows += len(chunk)
+    return n_rows
@@ -0,0 +1,480 @@
+"""
+Panel unit-root and cointegration tests.
+
+ln_arrivals, ln_gdp_china, ln_cpi and ln_rer all trend, and Models A-G are
+PanelOLS regressions in levels with no stationarity check. This module
+runs:
+
+- unit-root tests in every destination: IPS (Im-Pesaran-Shin W-tbar),
+  Levin-Lin-Chu t* and Fisher-ADF (Maddala-Wu P and Choi Z). A variable
+  that is one series shared by every destination (ln_gdp_china) is
+  tested with a single time-series ADF instead,
+- no-cointegration tests between ln_arrivals and its regressors:
+  Pedroni's seven residual-based statistics and Westerlund's four
+  error-correction tests.
+
+Every per-destination regression is batched. The panel is held as
+(..., N, T) arrays, so the ADF regressions for all variables and
+destinations are one stack of normal equations per lag order. Higher lags
+are zeroed columns, solved through a batched pseudo-inverse. The lag
+order is chosen per series by AIC or BIC on a common sample, over all
+orders at once.
+
+IPS, LLC, Pedroni and Westerlund are standardized with finite-sample
+moments from a simulation under the null (independent random walks). The
+simulation uses the panel's own N, T, gaps and selected lag orders. The
+published tables were obtained the same way, but only for balanced panels
+on a grid of T. The simulation runs through the same batched code, and the
+share of null draws at least as extreme is reported too (pvalue_sim).
+Fisher-ADF combines MacKinnon's asymptotic ADF p-values.
+
+Usage:
+    from tourism.unitroot import panel_stationarity
+    from tourism.pipeline import PLACEBO_COUNTRIES, prepare_panel
+    res = panel_stationarity(prepare_panel(countries=PLACEBO_COUNTRIES))
+    res['adf'], res['unit_root'], res['cointegration']
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .instrument import timed
+from .pipeline import panel_grid
+
+UNIT_ROOT_VARIABLES = ['ln_arrivals', 'ln_gdp_china', 'ln_cpi', 'ln_rer']
+COINTEGRATION_REGRESSORS = ['ln_gdp_china', 'ln_cpi', 'ln_rer']
+
+
+# ==========================================
+# BATCHED REGRESSIONS
+# ==========================================
+def _lag(a, k, axis=-1):
+    """`a` shifted k periods along `axis`, NaN-padded."""
+    a = np.moveaxis(a, axis, -1)
+    out = np.full_like(a, np.nan)
+    out[..., k:] = a[..., :a.shape[-1] - k]
+    return np.moveaxis(out, -1, axis)
+
+
+def _diff(a, axis=-1):
+    return a - _lag(a, 1, axis)
+
+
+def _deterministics(T, trend):
+    """(T, kd) constant / linear trend columns for trend 'n', 'c' or 'ct'."""
+    columns = {'n': [], 'c': [np.ones(T)], 'ct': [np.ones(T), np.arange(T) / T]}[trend]
+    return np.column_stack(columns) if columns else np.empty((T, 0))
+
+
+def _default_lags(T):
+    """Schwert's short rule, int(4 (T / 100)^(1/4))."""
+    return int(4 * (T / 100) ** 0.25)
+
+
+def _long_run_var(u, bandwidth):
+    """Bartlett-kernel long-run variance along the last axis, skipping NaNs."""
+    ok = np.isfinite(u)
+    u = np.where(ok, u, 0.0)
+    omega = (u ** 2).sum(-1)
+    for j in range(1, min(bandwidth, u.shape[-1] - 1) + 1):
+        omega = omega + 2 * (1 - j / (bandwidth + 1)) * (u[..., j:] * u[..., :-j]).sum(-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return omega / ok.sum(-1)
+
+
+def _ols(y, X, rows, k):
+    """
+    Batched OLS over the leading axes. y (..., T), X (..., T, K), rows
+    (..., T) marks the observations used and k is the number of regressors
+    in use. Zeroed columns drop out through the pseudo-inverse.
+    """
+    y = np.where(rows, y, 0.0)
+    X = np.where(rows[..., None], X, 0.0)
+    XtX_inv = np.linalg.pinv(np.einsum('...tk,...tl->...kl', X, X), hermitian=True)
+    b = np.einsum('...kl,...l->...k', XtX_inv, np.einsum('...tk,...t->...k', X, y))
+    e = y - np.einsum('...tk,...k->...t', X, b)
+    nobs = rows.sum(-1)
+    rss = (e ** 2).sum(-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma2 = np.where(nobs > k, rss / (nobs - k), np.nan)
+    se = np.sqrt(np.diagonal(XtX_inv, axis1=-2, axis2=-1) * sigma2[..., None])
+    return {'b': b, 'se': se, 'resid': np.where(rows, e, np.nan), 'rss': rss,
+            'nobs': nobs, 'sigma2': sigma2, 'rows': rows}
+
+
+def _lag_fit(y, X, col_lag, lags=None, max_lags=0, criterion='aic', rows=None):
+    """
+    OLS of y on X for every series, with columns whose col_lag exceeds the
+    series' lag order zeroed out. Without `lags` the order is chosen per
+    series by `criterion` on the sample common to all orders up to
+    max_lags. Returns the _ols dict at the chosen orders plus 'lags'.
+    """
+    col_lag = np.asarray(col_lag)
+    ok = np.isfinite(y) if rows is None else rows & np.isfinite(y)
+    finite = np.isfinite(X)
+    avail = [ok & finite[..., col_lag <= p].all(-1) for p in range(max_lags + 1)]
+    if lags is None:
+        ic = []
+        for p in range(max_lags + 1):
+            k = int((col_lag <= p).sum())
+            f = _ols(y, np.where(col_lag <= p, X, 0.0), avail[-1], k)
+            n = f['nobs']
+            penalty = 2.0 if criterion == 'aic' else np.log(np.maximum(n, 1))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ic.append(np.where(n > k, np.log(f['rss'] / n) + penalty * k / n, np.inf))
+        lags = np.argmin(np.nan_to_num(ic, nan=np.inf), axis=0)
+    lags = np.broadcast_to(lags, y.shape[:-1])
+
+    out = None
+    for p in np.unique(lags):
+        f = _ols(y, np.where(col_lag <= p, X, 0.0), avail[p], int((col_lag <= p).sum()))
+        if out is None:
+            out = {key: np.zeros_like(v) for key, v in f.items()}
+        sel = lags == p
+        for key, v in f.items():
+            out[key][sel] = v[sel]
+    out['lags'] = lags
+    return out
+
+
+def _adf_design(Y, trend, max_lags):
+    """Delta y, the ADF regressors (deterministics, y_t-1, lagged differences) and their lag orders."""
+    dY = _diff(Y)
+    D = _deterministics(Y.shape[-1], trend)
+    D = np.broadcast_to(D, Y.shape + D.shape[-1:])
+    X = np.concatenate([D, _lag(Y, 1)[..., None]]
+                       + [_lag(dY, j)[..., None] for j in range(1, max_lags + 1)], axis=-1)
+    col_lag = [0] * (D.shape[-1] + 1) + list(range(1, max_lags + 1))
+    return dY, X, col_lag, D.shape[-1]
+
+
+def adf(Y, trend='c', lags=None, max_lags=None, criterion='aic'):
+    """
+    Augmented Dickey-Fuller regressions for every series along the leading
+    axes of Y (..., T) at once; NaNs mark missing years.
+
+    Parameters
+    ----------
+    trend : 'n', 'c' (constant) or 'ct' (constant and linear trend)
+    lags : fixed lag order(s), broadcast over the series; None selects
+        them by `criterion` ('aic' or 'bic') up to max_lags
+    max_lags : default int(4 (T / 100)^(1/4))
+
+    Returns a dict of arrays over the leading axes: statistic, coef, se,
+    lags, nobs, sigma2, rss and the regression rows.
+    """
+    Y = np.asarray(Y, dtype=float)
+    if max_lags is None:
+        max_lags = _default_lags(Y.shape[-1]) if lags is None else int(np.max(lags))
+    dY, X, col_lag, kd = _adf_design(Y, trend, max_lags)
+    f = _lag_fit(dY, X, col_lag, lags, max_lags, criterion)
+    b, se = f['b'][..., kd], f['se'][..., kd]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        statistic = b / se
+    return {'statistic': statistic, 'coef': b, 'se': se, 'lags': f['lags'], 'nobs': f['nobs'],
+            'sigma2': f['sigma2'], 'rss': f['rss'], 'rows': f['rows'], 'max_lags': max_lags}
+
+
+def _null_walks(shape, complete, rng, axis=-1):
+    """Independent Gaussian random walks, NaN where the data are incomplete."""
+    W = rng.standard_normal(shape).cumsum(axis=axis)
+    return np.where(complete, W, np.nan)
+
+
+def _year_only(a, rtol=1e-10):
+    """True when an (N, T) grid holds one value per year shared by every destination."""
+    if a.shape[0] < 2 or not np.isfinite(a).any():
+        return False
+    spread = np.nan_to_num(np.fmax.reduce(a, axis=0) - np.fmin.reduce(a, axis=0))
+    return spread.max() <= rtol * max(np.nanmax(np.abs(a)), 1.0)
+
+
+def _standardize(stat, sims, upper=False):
+    """z from the simulated null moments, its normal p-value and the simulated one."""
+    mu, sd = np.nanmean(sims, axis=0), np.nanstd(sims, axis=0)
+    z = (stat - mu) / sd
+    if upper:
+        return z, stats.norm.sf(z), np.mean(sims >= stat, axis=0)
+    return z, stats.norm.cdf(z), np.mean(sims <= stat, axis=0)
+
+
+# ==========================================
+# PANEL UNIT-ROOT TESTS
+# ==========================================
+def _llc_pieces(Y, trend, res):
+    """
+    Per-series sums for Levin-Lin-Chu: Delta y and y_t-1 net of the
+    deterministics and lagged differences, scaled by the ADF standard
+    error, and the long-run / short-run standard deviation ratio s_i.
+    """
+    dY, X, col_lag, kd = _adf_design(Y, trend, res['max_lags'])
+    X[..., kd] = 0.0
+    e = _lag_fit(dY, X, col_lag, res['lags'], res['max_lags'], rows=res['rows'])['resid']
+    v = _lag_fit(_lag(Y, 1), X, col_lag, res['lags'], res['max_lags'], rows=res['rows'])['resid']
+    sigma = np.sqrt(res['sigma2'])[..., None]
+    e, v = e / sigma, v / sigma
+    with np.errstate(invalid='ignore'):
+        dY = dY - np.nanmean(np.where(res['rows'], dY, np.nan), axis=-1, keepdims=True)
+    s = np.sqrt(_long_run_var(np.where(res['rows'], dY, np.nan),
+                              int(3.21 * Y.shape[-1] ** (1 / 3)))) / sigma[..., 0]
+    return np.nansum(v * e, -1), np.nansum(v * v, -1), np.nansum(e * e, -1), s
+
+
+def _llc_stat(pieces, nobs, valid):
+    """Pooled t_delta and its mean adjustment N T~ S_N sigma^-2 STD(delta) over the last axis."""
+    ve, vv, ee, s = (np.where(valid, p, 0.0) for p in pieces)
+    VE, VV, EE, NT = ve.sum(-1), vv.sum(-1), ee.sum(-1), np.where(valid, nobs, 0).sum(-1)
+    delta = VE / VV
+    sigma2 = (EE - 2 * delta * VE + delta ** 2 * VV) / NT
+    std = np.sqrt(sigma2 / VV)
+    S_N = s.sum(-1) / valid.sum(-1)
+    return delta / std, NT * S_N / sigma2 * std
+
+
+@timed('panel unit-root tests', 'diagnostic')
+def unit_root_tests(df, variables=UNIT_ROOT_VARIABLES, trend='c', max_lags=None,
+                    criterion='aic', n_sims=1000, seed=0, entity='Country', time='Year'):
+    """
+    IPS, LLC and Fisher-ADF tests for every variable, from one batched set
+    of per-destination ADF regressions.
+
+    A variable that only varies over years (ln_gdp_china: one series
+    repeated in every destination) has N identical ADF regressions, and
+    pooling them would inflate the panel statistics by about sqrt(N). It
+    gets a single time-series ADF instead (test 'ADF (common series)',
+    entity '(common)').
+
+    Returns (adf, panel): adf has one row per variable and destination
+    (variable, entity, lags, nobs, statistic, pvalue). panel has one row per
+    variable and test (variable, test, statistic, z, pvalue, pvalue_sim).
+    """
+    from statsmodels.tsa.adfvalues import mackinnonp
+
+    names, years, grid = panel_grid(df, variables, entity, time, dropna=False)
+    common = [v for v in variables if _year_only(grid[v])]
+    panel = [v for v in variables if v not in common]
+    rng = np.random.default_rng(seed)
+    tables, rows = [], []
+
+    if common:
+        C = np.stack([np.fmax.reduce(grid[v], axis=0) for v in common])
+        res = adf(C, trend, max_lags=max_lags, criterion=criterion)
+        sims = adf(_null_walks((n_sims,) + C.shape, np.isfinite(C), rng), trend,
+                   lags=res['lags'], max_lags=res['max_lags'])
+        pvalues = [mackinnonp(t, trend) if np.isfinite(t) else np.nan for t in res['statistic']]
+        tables.append(pd.DataFrame({'variable': common, entity: '(common)', 'lags': res['lags'],
+                                    'nobs': res['nobs'], 'statistic': res['statistic'],
+                                    'pvalue': pvalues}))
+        rows += [{'variable': name, 'test': 'ADF (common series)', 'statistic': t, 'z': np.nan,
+                  'pvalue': p, 'pvalue_sim': np.mean(sims['statistic'][:, c] <= t)}
+                 for c, (name, t, p) in enumerate(zip(common, res['statistic'], pvalues))]
+    requested = list(variables)
+    if not panel:
+        return _in_order(tables, rows, requested)
+
+    variables = panel
+    Y = np.stack([grid[v] for v in variables])
+    res = adf(Y, trend, max_lags=max_lags, criterion=criterion)
+    valid = np.isfinite(res['statistic'])
+    pieces = _llc_pieces(Y, trend, res)
+
+    Y0 = _null_walks((n_sims,) + Y.shape, np.isfinite(Y), rng)
+    sims = adf(Y0, trend, lags=res['lags'], max_lags=res['max_lags'])
+    sim_pieces = _llc_pieces(Y0, trend, sims)
+
+    pvalues = np.full(res['statistic'].shape, np.nan)
+    pvalues[valid] = [mackinnonp(t, trend) for t in res['statistic'][valid]]
+    V, N = valid.shape
+    tables.append(pd.DataFrame({
+        'variable': np.repeat(variables, N),
+        entity: np.tile(np.asarray(names, dtype=object), V),
+        'lags': res['lags'].ravel(),
+        'nobs': res['nobs'].ravel(),
+        'statistic': res['statistic'].ravel(),
+        'pvalue': pvalues.ravel(),
+    }))
+
+    # IPS: t-bar against the simulated moments of each destination's t given its T and lags
+    n_valid = valid.sum(-1)
+    tbar = np.where(valid, res['statistic'], 0.0).sum(-1) / n_valid
+    t_sims = np.where(valid, sims['statistic'], np.nan)
+    mean_t = np.where(valid, np.nanmean(t_sims, axis=0), 0.0).sum(-1) / n_valid
+    var_t = np.where(valid, np.nanvar(t_sims, axis=0), 0.0).sum(-1) / n_valid
+    W = np.sqrt(n_valid) * (tbar - mean_t) / np.sqrt(var_t)
+    tbar_sims = np.nanmean(t_sims, axis=-1)
+
+    # LLC: mu* and sigma* calibrated so that t* is standard normal under the null
+    t_delta, adj = _llc_stat(pieces, res['nobs'], valid)
+    ts, adjs = _llc_stat(sim_pieces, sims['nobs'], valid)
+    mu_star = ts.mean(0) / adjs.mean(0)
+    sigma_star = (ts - adjs * mu_star).std(0)
+    t_star = (t_delta - adj * mu_star) / sigma_star
+    t_star_sims = (ts - adjs * mu_star) / sigma_star
+
+    # Fisher-ADF: Maddala-Wu P and Choi's inverse-normal Z
+    p = np.clip(np.where(valid, pvalues, 0.5), 1e-16, 1 - 1e-16)
+    P = np.where(valid, -2 * np.log(p), 0.0).sum(-1)
+    Z = np.where(valid, stats.norm.ppf(p), 0.0).sum(-1) / np.sqrt(n_valid)
+
+    for v, name in enumerate(variables):
+        rows += [
+            {'variable': name, 'test': 'IPS W-tbar', 'statistic': tbar[v], 'z': W[v],
+             'pvalue': stats.norm.cdf(W[v]), 'pvalue_sim': np.mean(tbar_sims[:, v] <= tbar[v])},
+            {'variable': name, 'test': 'LLC t*', 'statistic': t_delta[v], 'z': t_star[v],
+             'pvalue': stats.norm.cdf(t_star[v]),
+             'pvalue_sim': np.mean(t_star_sims[:, v] <= t_star[v])},
+            {'variable': name, 'test': 'Fisher-ADF P', 'statistic': P[v], 'z': np.nan,
+             'pvalue': stats.chi2.sf(P[v], 2 * n_valid[v]), 'pvalue_sim': np.nan},
+            {'variable': name, 'test': 'Fisher-ADF Z', 'statistic': Z[v], 'z': Z[v],
+             'pvalue': stats.norm.cdf(Z[v]), 'pvalue_sim': np.nan},
+        ]
+    return _in_order(tables, rows, requested)
+
+
+def _in_order(tables, rows, variables):
+    """The ADF and panel tables with variables in the requested order."""
+    order = {v: i for i, v in enumerate(variables)}
+    table = pd.concat(tables, ignore_index=True)
+    table = table.iloc[np.argsort(table['variable'].map(order), kind='stable')]
+    panel = pd.DataFrame(rows)
+    panel = panel.iloc[np.argsort(panel['variable'].map(order), kind='stable')]
+    return table.reset_index(drop=True), panel.reset_index(drop=True)
+
+
+# ==========================================
+# PANEL COINTEGRATION TESTS
+# ==========================================
+def _pedroni_stats(y, X, trend, lags, max_lags):
+    """
+    Pedroni's panel (within) and group (between) statistics over the last
+    destination axis. y (..., N, T), X (..., N, T, m).
+    """
+    T, m = y.shape[-1], X.shape[-1]
+    complete = np.isfinite(y) & np.isfinite(X).all(-1)
+    D = _deterministics(T, trend)
+    D = np.broadcast_to(D, y.shape + D.shape[-1:])
+    e = _ols(y, np.concatenate([D, X], axis=-1), complete, D.shape[-1] + m)['resid']
+
+    # Long-run variance of Delta y net of Delta x
+    dy, dX = _diff(y), _diff(X, axis=-2)
+    dD = np.ones(y.shape + (1,)) if trend == 'ct' else np.empty(y.shape + (0,))
+    rows = np.isfinite(dy) & np.isfinite(dX).all(-1)
+    bandwidth = int(4 * (T / 100) ** (2 / 9))
+    L11 = _long_run_var(_ols(dy, np.concatenate([dD, dX], axis=-1), rows, dD.shape[-1] + m)['resid'],
+                        bandwidth)
+
+    # Phillips-Perron pieces from the residual AR(1)
+    e_lag = _lag(e, 1)
+    r = np.isfinite(e) & np.isfinite(e_lag)
+    e0, el0 = np.where(r, e, 0.0), np.where(r, e_lag, 0.0)
+    A = (el0 ** 2).sum(-1)
+    u = np.where(r, e - (el0 * e0).sum(-1, keepdims=True) / A[..., None] * e_lag, np.nan)
+    sigma2 = _long_run_var(u, bandwidth)
+    lam = (sigma2 - np.nanmean(u ** 2, axis=-1)) / 2
+    B = (el0 * (e0 - el0)).sum(-1) - r.sum(-1) * lam
+
+    # ADF pieces: sum v^2 and sum v Delta e with the lagged differences partialled out
+    a = adf(e, 'n', lags=lags, max_lags=max_lags)
+    vv = a['sigma2'] / a['se'] ** 2
+    vd = a['coef'] * vv
+    s2 = a['rss'] / a['nobs']
+
+    w = 1 / L11
+    return {
+        'panel v': 1 / (w * A).sum(-1),
+        'panel rho': (w * B).sum(-1) / (w * A).sum(-1),
+        'panel PP': (w * B).sum(-1) / np.sqrt((w * sigma2).mean(-1) * (w * A).sum(-1)),
+        'panel ADF': (w * vd).sum(-1) / np.sqrt(s2.mean(-1) * (w * vv).sum(-1)),
+        'group rho': (B / A).sum(-1),
+        'group PP': (B / np.sqrt(sigma2 * A)).sum(-1),
+        'group ADF': (vd / np.sqrt(s2 * vv)).sum(-1),
+    }, a['lags']
+
+
+def _westerlund_stats(y, X, trend, lags, max_lags, criterion):
+    """
+    Westerlund's error-correction tests over the last destination axis:
+    Delta y_t on the deterministics, y_t-1, x_t-1, lags of Delta y and
+    current and lagged Delta x, per destination.
+    """
+    T, m = y.shape[-1], X.shape[-1]
+    dy, dX = _diff(y), _diff(X, axis=-2)
+    D = _deterministics(T, trend)
+    kd = D.shape[-1]
+    design = np.concatenate(
+        [np.broadcast_to(D, y.shape + (kd,)), _lag(y, 1)[..., None], _lag(X, 1, axis=-2)]
+        + [_lag(dy, j)[..., None] for j in range(1, max_lags + 1)]
+        + [_lag(dX, j, axis=-2) for j in range(max_lags + 1)], axis=-1)
+    col_lag = [0] * (kd + 1 + m) + list(range(1, max_lags + 1)) \
+        + [j for j in range(max_lags + 1) for _ in range(m)]
+    f = _lag_fit(dy, design, col_lag, lags, max_lags, criterion)
+    alpha, se = f['b'][..., kd], f['se'][..., kd]
+
+    bandwidth = int(4 * (T / 100) ** (2 / 9))
+    alpha_1 = np.sqrt(_long_run_var(f['resid'], bandwidth)
+                      / _long_run_var(np.where(f['rows'], dy, np.nan), bandwidth))
+    design[..., kd] = 0.0
+    y_til = _lag_fit(_lag(y, 1), design, col_lag, f['lags'], max_lags, rows=f['rows'])['resid']
+    dy_til = _lag_fit(dy, design, col_lag, f['lags'], max_lags, rows=f['rows'])['resid']
+    yy = np.nansum(y_til ** 2, -1).sum(-1)
+    alpha_pooled = (np.nansum(y_til * dy_til, -1) / alpha_1).sum(-1) / yy
+    S_N = (np.sqrt(f['sigma2']) / alpha_1).mean(-1)
+    return {
+        'Gt': (alpha / se).mean(-1),
+        'Ga': (f['nobs'] * alpha / alpha_1).mean(-1),
+        'Pt': alpha_pooled / (S_N / np.sqrt(yy)),
+        'Pa': f['nobs'].mean(-1) * alpha_pooled,
+    }, f['lags']
+
+
+@timed('panel cointegration tests', 'diagnostic')
+def cointegration_tests(df, y='ln_arrivals', x=COINTEGRATION_REGRESSORS, trend='c',
+                        max_lags=None, criterion='aic', n_sims=1000, seed=0,
+                        entity='Country', time='Year'):
+    """
+    Pedroni and Westerlund tests of no cointegration between y and x.
+
+    Returns a DataFrame with variable (the equation), test, statistic, z,
+    pvalue and pvalue_sim. Pedroni's panel v rejects in the upper tail,
+    every other statistic in the lower tail.
+    """
+    x = list(x)
+    names, years, grid = panel_grid(df, [y] + x, entity, time)
+    Y = grid[y]
+    X = np.stack([grid[c] for c in x], axis=-1)
+    if max_lags is None:
+        max_lags = _default_lags(len(years))
+    pedroni, ped_lags = _pedroni_stats(Y, X, trend, None, max_lags)
+    westerlund, west_lags = _westerlund_stats(Y, X, trend, None, max_lags, criterion)
+
+    rng = np.random.default_rng(seed)
+    complete = np.isfinite(Y)
+    Y0 = _null_walks((n_sims,) + Y.shape, complete, rng)
+    X0 = _null_walks((n_sims,) + X.shape, complete[..., None], rng, axis=-2)
+    ped_sims, _ = _pedroni_stats(Y0, X0, trend, ped_lags, max_lags)
+    west_sims, _ = _westerlund_stats(Y0, X0, trend, west_lags, max_lags, criterion)
+
+    equation = f"{y} ~ {' + '.join(x)}"
+    rows = []
+    for family, observed, simulated in (('Pedroni', pedroni, ped_sims),
+                                        ('Westerlund', westerlund, west_sims)):
+        for name, stat in observed.items():
+            z, p, p_sim = _standardize(stat, simulated[name], upper=name == 'panel v')
+            rows.append({'variable': equation, 'test': f'{family} {name}', 'statistic': stat,
+                         'z': z, 'pvalue': p, 'pvalue_sim': p_sim})
+    return pd.DataFrame(rows)
+
+
+def panel_stationarity(df, variables=UNIT_ROOT_VARIABLES, y='ln_arrivals',
+                       x=COINTEGRATION_REGRESSORS, trend='c', max_lags=None, criterion='aic',
+                       n_sims=1000, seed=0):
+    """
+    The full battery in one call: {'adf': per-destination ADF table,
+    'unit_root': IPS / LLC / Fisher-ADF per variable, 'cointegration':
+    Pedroni / Westerlund for y on x}.
+    """
+    adf_table, unit_root = unit_root_tests(df, variables, trend, max_lags, criterion,
+                                           n_sims, seed)
+    coint = cointegration_tests(df, y, x, trend, max_lags, criterion, n_sims, seed)
+    return {'adf': adf_table, 'unit_root': unit_root, 'cointegration': coint}
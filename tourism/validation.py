@@ -0,0 +1,309 @@
+"""
+Declarative, incremental validation of the Country x Year panel.
+
+add_real_exchange_rate.py prints ad-hoc negativity checks and
+running_panel_data_regression.py looks for infinities in one model's
+regressors at fit time. Here the rules live in one schema (PANEL_SCHEMA,
+a dict in the style of MODEL_SPECS) and are checked as column operations:
+
+    type       non-numeric cells in numeric columns, non-strings in Country
+    missing    nulls in non-nullable columns
+    range      values outside [min, max]
+    log        values <= 0 in columns that are logged (-inf / NaN after log)
+    finite     +/-inf in any numeric column (e.g. ln_* columns after logs)
+    identity   cross-column identities, e.g. RER = exchange_rate *
+               CPI_destination / CPI_china, to a relative tolerance
+    duplicate  repeated (Country, Year) keys
+    order      years not strictly increasing within a country, in row order
+    gap        missing years inside a country's span (warning only)
+
+PanelValidator keeps a snapshot of the last validated frame: a 64-bit
+fingerprint per row and the violations found. On the next call only rows
+whose fingerprint is new are checked row by row. Order and gap checks are
+rerun only for countries with added, changed or removed rows. Duplicate
+keys are always recomputed, which is one hash over the key columns.
+Violations of unchanged rows are carried over, so every report is complete.
+
+Usage:
+    from tourism.validation import PanelValidator, validate_panel
+    validate_panel(load_panel())                  # one-off, full check
+    v = PanelValidator()
+    v.validate(df)                                # full the first time
+    v.validate(df_with_new_year)                  # only the new rows
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .instrument import timed
+from .pipeline import CACHE_DIR
+
+PANEL_SCHEMA = {
+    'entity': 'Country',
+    'time': 'Year',
+    'columns': {
+        'Country': {'dtype': 'string', 'nullable': False},
+        'Year': {'dtype': 'integer', 'nullable': False, 'min': 1900, 'max': 2100},
+        'arrivals_from_china': {'dtype': 'numeric', 'min': 0, 'log': True},
+        'peace_index': {'dtype': 'numeric', 'min': 1, 'max': 5},
+        'CPI_destination': {'dtype': 'numeric', 'min': 0, 'log': True},
+        'gdp_china': {'dtype': 'numeric', 'min': 0, 'log': True},
+        'exchange_rate': {'dtype': 'numeric', 'min': 0, 'log': True},
+        'CPI_china': {'dtype': 'numeric', 'min': 0, 'log': True},
+        'RER': {'dtype': 'numeric', 'min': 0, 'log': True},
+    },
+    'identities': [
+        {'name': 'RER = exchange_rate * CPI_destination / CPI_china',
+         'lhs': 'RER', 'rhs': 'exchange_rate * CPI_destination / CPI_china', 'rtol': 1e-6},
+    ],
+}
+
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'panel_validation.npz')
+VIOLATION_COLUMNS = ['check', 'column', 'Country', 'Year', 'value', 'message', 'severity',
+                     'row_hash']
+
+
+def _no_violations():
+    out = pd.DataFrame({c: pd.Series(dtype=object) for c in VIOLATION_COLUMNS})
+    return out.astype({'row_hash': np.uint64})
+
+
+def row_fingerprints(df, entity='Country', codes=None):
+    """
+    64-bit hash of every row's values (column order independent) mixed
+    with the row's position among its country's rows, so duplicated or
+    reordered rows count as changed. `codes` are integer country codes
+    (pd.factorize) if already at hand.
+    """
+    if codes is None:
+        codes = pd.factorize(df[entity])[0]
+    values = pd.util.hash_pandas_object(df[sorted(df.columns)], index=False).values
+    position = pd.Series(codes).groupby(codes, sort=False).cumcount().values.astype(np.uint64)
+    return values ^ (position * np.uint64(0x9E3779B97F4A7C15))
+
+
+def _violations(sub, mask, check, column, message, entity, time, severity='error'):
+    """Violation rows for sub[mask] (sub carries a row_hash column)."""
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return _no_violations()
+    hit = sub[mask]
+    return pd.DataFrame({
+        'check': check, 'column': column,
+        'Country': hit[entity].values if entity in hit else None,
+        'Year': hit[time].values if time in hit else None,
+        'value': hit[column].astype(object).values if column in hit else None,
+        'message': message, 'severity': severity,
+        'row_hash': hit['row_hash'].values.astype(np.uint64),
+    })
+
+
+def _row_checks(sub, schema):
+    """Type, missing, range, log, finite and identity checks on the given rows."""
+    entity, time = schema['entity'], schema['time']
+    out = []
+    numeric = {}
+    for col, spec in schema['columns'].items():
+        if col not in sub:
+            continue
+        s = sub[col]
+        if spec.get('dtype') == 'string':
+            bad = s.notna() & s.str.len().isna() if s.dtype == object else pd.Series(False,
+                                                                                      s.index)
+            out.append(_violations(sub, bad, 'type', col, 'not a string', entity, time))
+            values = s
+        else:
+            values = pd.to_numeric(s, errors='coerce')
+            out.append(_violations(sub, s.notna() & values.isna(), 'type', col,
+                                   'not numeric', entity, time))
+            if spec.get('dtype') == 'integer':
+                out.append(_violations(sub, values.notna() & (values % 1 != 0), 'type', col,
+                                       'not an integer', entity, time))
+            numeric[col] = values
+        if not spec.get('nullable', True):
+            out.append(_violations(sub, s.isna(), 'missing', col, 'missing value',
+                                   entity, time))
+        if 'min' in spec:
+            out.append(_violations(sub, values < spec['min'], 'range', col,
+                                   f"below {spec['min']}", entity, time))
+        if 'max' in spec:
+            out.append(_violations(sub, values > spec['max'], 'range', col,
+                                   f"above {spec['max']}", entity, time))
+        if spec.get('log'):
+            out.append(_violations(sub, values <= 0, 'log', col,
+                                   'not positive, log is undefined', entity, time))
+
+    # Infinities in any numeric column, declared or not (ln_* after feature engineering)
+    for col in sub.columns:
+        if col != 'row_hash' and pd.api.types.is_float_dtype(sub[col]):
+            out.append(_violations(sub, np.isinf(sub[col].values), 'finite', col,
+                                   'infinite value', entity, time))
+
+    for ident in schema.get('identities', []):
+        if ident['lhs'] not in sub:
+            continue
+        frame = sub.assign(**numeric)
+        try:
+            rhs = frame.eval(ident['rhs'])
+        except (NameError, KeyError, pd.errors.UndefinedVariableError):
+            continue
+        lhs = frame[ident['lhs']]
+        bad = (lhs - rhs).abs() > ident.get('rtol', 1e-6) * rhs.abs() + ident.get('atol', 0.0)
+        out.append(_violations(sub, bad, 'identity', ident['lhs'], ident['name'],
+                               entity, time))
+    return out
+
+
+def _country_checks(df, codes, labels, affected, first, schema):
+    """
+    Order and gap checks for the rows of the `affected` country codes.
+    `first` marks the first occurrence of each (Country, Year) key, so the
+    number of distinct years per country is a bincount rather than a groupby.
+    """
+    entity, time = schema['entity'], schema['time']
+    rows = np.flatnonzero(affected[codes])
+    if not len(rows):
+        return []
+    c = codes[rows]
+    order = np.argsort(c, kind='stable')
+    c = c[order]
+    years = pd.to_numeric(df[time], errors='coerce').values[rows][order]
+    same = c[1:] == c[:-1]
+    bad = np.zeros(len(df), dtype=bool)
+    bad[rows[order[1:]]] = same & ~(years[1:] > years[:-1])
+    out = [_violations(df, bad, 'order', time, 'year not after the previous row',
+                       entity, time)]
+
+    # Span versus distinct years per country, from segment reductions
+    starts = np.flatnonzero(np.r_[True, ~same])
+    valid = ~np.isnan(years)
+    lo = np.fmin.reduceat(np.where(valid, years, np.inf), starts)
+    hi = np.fmax.reduceat(np.where(valid, years, -np.inf), starts)
+    distinct = np.add.reduceat((first[rows][order] & valid).astype(np.int64), starts)
+    gaps = np.flatnonzero(np.isfinite(lo) & (hi - lo + 1 > distinct))
+    if len(gaps):
+        found = []
+        for g in gaps:
+            seg = slice(starts[g], starts[g + 1] if g + 1 < len(starts) else len(c))
+            present = set(years[seg][valid[seg]].astype(int))
+            missing = sorted(set(range(int(lo[g]), int(hi[g]) + 1)) - present)
+            found.append({'check': 'gap', 'column': time, 'Country': labels[c[seg.start]],
+                          'Year': None, 'value': missing,
+                          'message': f'{len(missing)} missing years', 'severity': 'warning',
+                          'row_hash': 0})
+        out.append(pd.DataFrame(found).astype({'row_hash': np.uint64}))
+    return out
+
+
+class PanelValidator:
+    """Schema checks that only revisit rows changed since the last snapshot."""
+
+    def __init__(self, schema=PANEL_SCHEMA):
+        self.schema = schema
+        self.fingerprints = np.array([], dtype=np.uint64)
+        self.countries = np.array([], dtype=object)
+        self.violations = _no_violations()
+        self.last_checked = 0
+
+    @timed('panel validation', 'io')
+    def validate(self, df, full=False):
+        """
+        Validate `df` and make it the new snapshot. Returns every violation
+        (carried over and new) as a DataFrame with check, column, Country,
+        Year, value, message, severity and row_hash. `full` ignores the
+        snapshot.
+        """
+        entity, time = self.schema['entity'], self.schema['time']
+        if full:
+            self.__init__(self.schema)
+        codes, labels = pd.factorize(df[entity])
+        fp = row_fingerprints(df, entity, codes)
+        # Hash-table membership, linear in the number of rows
+        snapshot = pd.Index(self.fingerprints)
+        changed = snapshot.get_indexer_for(fp) < 0 if len(snapshot) else np.ones(len(fp), bool)
+        removed = pd.Index(fp).get_indexer_for(self.fingerprints) < 0
+
+        work = df.assign(row_hash=fp)
+        new = _row_checks(work[changed], self.schema)
+
+        # Countries whose rows were added, changed or removed
+        gone = set(self.countries[removed])
+        affected = np.zeros(len(labels), dtype=bool)
+        affected[np.unique(codes[changed])] = True
+        if gone:
+            affected |= np.asarray(pd.Index(labels).isin(gone))
+        # (Country, Year) keys as integers: one factorize gives both the
+        # duplicate mask and the first occurrence of every key
+        years = pd.to_numeric(work[time], errors='coerce')
+        key = codes.astype(np.int64) * (1 << 32) + years.fillna(-1).values.astype(np.int64)
+        kcodes = pd.factorize(key)[0]
+        first = np.zeros(len(work), dtype=bool)
+        first[np.unique(kcodes, return_index=True)[1]] = True
+        new += _country_checks(work, codes, np.asarray(labels, dtype=object), affected, first,
+                               self.schema)
+
+        dup = np.bincount(kcodes)[kcodes] > 1
+        dups = _violations(work, dup, 'duplicate', time, 'duplicate (Country, Year)',
+                           entity, time)
+
+        # Carry over row-level violations of unchanged rows and country-level
+        # violations of unaffected countries; duplicates are always recomputed
+        old = self.violations
+        refreshed = gone | set(labels[affected])
+        keep_rows = old['row_hash'].isin(fp[~changed]) & ~old['check'].isin(['duplicate',
+                                                                              'order', 'gap'])
+        keep_countries = old['check'].isin(['order', 'gap']) & ~old['Country'].isin(refreshed)
+        parts = [old[keep_rows | keep_countries]] + [p for p in new + [dups] if len(p)]
+        result = pd.concat(parts, ignore_index=True)
+
+        self.fingerprints = fp
+        self.countries = np.asarray(labels, dtype=object)[codes]
+        self.violations = result.reset_index(drop=True)
+        self.last_checked = int(changed.sum())
+        return self.violations
+
+    def errors(self):
+        """Violations with severity 'error' (gaps are warnings)."""
+        return self.violations[self.violations['severity'] == 'error']
+
+    def save(self, path=SNAPSHOT_PATH):
+        """Write the snapshot (fingerprints, countries, violations) to an .npz file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        records = self.violations.drop(columns='row_hash')
+        np.savez(path, fingerprints=self.fingerprints,
+                 countries=self.countries.astype(str),
+                 violations=records.to_json(orient='records', default_handler=str),
+                 violation_rows=self.violations['row_hash'].values.astype(np.uint64),
+                 schema=json.dumps(self.schema))
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH, schema=PANEL_SCHEMA):
+        """Restore a snapshot; a missing file or a changed schema gives an empty one."""
+        v = cls(schema)
+        if os.path.exists(path):
+            with np.load(path) as f:
+                if json.loads(str(f['schema'])) == json.loads(json.dumps(schema)):
+                    v.fingerprints = f['fingerprints']
+                    v.countries = f['countries'].astype(object)
+                    records = pd.DataFrame(json.loads(str(f['violations'])),
+                                           columns=VIOLATION_COLUMNS[:-1])
+                    v.violations = pd.concat([_no_violations(), records.assign(
+                        row_hash=f['violation_rows'])], ignore_index=True)
+        return v
+
+
+def validate_panel(df, schema=PANEL_SCHEMA, raise_on_error=False):
+    """
+    Full validation of `df`. Returns the violations DataFrame; with
+    raise_on_error, raises ValueError summarising any errors instead.
+    """
+    v = PanelValidator(schema)
+    out = v.validate(df)
+    errors = v.errors()
+    if raise_on_error and len(errors):
+        summary = errors.groupby(['check', 'column']).size().to_string()
+        raise ValueError(f"Panel failed validation ({len(errors)} errors):\n{summary}")
+    return out
@@ -0,0 +1,186 @@
+"""
+What-if queries over cached model coefficients.
+
+Questions like "what if the baht appreciates 10%, or Thailand's
+peace_index improves by 0.2?" used to mean editing a script and refitting.
+build_cache fits the entity-FE Models (A, C, D, F, G) once and writes to
+one .npz file:
+- the coefficient vectors and covariances,
+- each destination's baseline design (last sample year),
+- the fitted baseline ln_arrivals.
+WhatIf.load reads it back and answers queries with a couple of small
+matrix products and no refitting; WhatIf.predict is plain numpy for
+callers that need the lowest latency (tens of microseconds per query).
+
+Shocks are given in the units of the raw data and mapped onto the model
+regressors with RER = exchange_rate * CPI_destination / CPI_china:
+
+    gdp_china        proportional  -> ln_gdp_china
+    exchange_rate    proportional  -> ln_exchange_rate and ln_rer
+    CPI_destination  proportional  -> ln_cpi and ln_rer
+    RER              proportional  -> ln_rer (e.g. via CPI_china)
+    peace_index      level change  -> peace_index
+
+A shock value is a number (every destination) or a dict keyed by country.
+The cache is tied to the SHA-256 of the panel CSV and rebuilt when the
+data change.
+
+Usage:
+    from tourism.whatif import WhatIf
+    engine = WhatIf.load()
+    engine.query({'exchange_rate': -0.10, 'peace_index': {'Thailand': 0.2}})
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .pipeline import (CACHE_DIR, DATA_PATH, MODEL1_COUNTRIES, file_digest, load_panel,
+                       prepare_panel)
+
+CACHE_PATH = os.path.join(CACHE_DIR, 'whatif_models.npz')
+WHATIF_MODELS = ['A', 'C', 'D', 'F', 'G']
+SHOCKS = ['gdp_china', 'exchange_rate', 'CPI_destination', 'RER', 'peace_index']
+LOG_SHOCKS = {'gdp_china', 'exchange_rate', 'CPI_destination', 'RER'}
+
+# Regressor changes implied by a unit shock (log change or level change)
+SHOCK_MAP = {
+    'gdp_china': {'ln_gdp_china': 1.0},
+    'exchange_rate': {'ln_exchange_rate': 1.0, 'ln_rer': 1.0},
+    'CPI_destination': {'ln_cpi': 1.0, 'ln_rer': 1.0},
+    'RER': {'ln_rer': 1.0},
+    'peace_index': {'peace_index': 1.0},
+}
+
+
+def build_cache(path=CACHE_PATH, data_path=DATA_PATH, models=WHATIF_MODELS,
+                countries=MODEL1_COUNTRIES, start_year=2008, end_year=2024):
+    """Fit the models once and write coefficients and baselines to `path`."""
+    from .forecast import model_snapshot
+
+    raw = load_panel(data_path)
+    snaps = [model_snapshot(raw, m, countries, start_year, end_year) for m in models]
+    names = snaps[0]['names']
+    variables = sorted({v for s in snaps for v in s['exog']})
+    m, D, k = len(models), len(names), len(variables)
+
+    panel = prepare_panel(raw, countries=names, start_year=start_year, end_year=end_year)
+    last = panel.reset_index().sort_values('Year').groupby('Country').last().loc[names]
+
+    B = np.zeros((m, k))
+    V = np.zeros((m, k, k))
+    base = np.zeros((m, D))
+    for i, s in enumerate(snaps):
+        cols = [variables.index(v) for v in s['exog']]
+        B[i, cols] = s['params']
+        V[i][np.ix_(cols, cols)] = s['cov']
+        x0 = last[s['exog']].values
+        base[i] = s['y_bar'] + (x0 - s['x_bar']) @ s['params']
+
+    M = np.zeros((len(SHOCKS), k))
+    for j, shock in enumerate(SHOCKS):
+        for v, w in SHOCK_MAP[shock].items():
+            if v in variables:
+                M[j, variables.index(v)] = w
+
+    meta = {'models': list(models), 'countries': names, 'variables': variables,
+            'base_years': [int(y) for y in last['Year']],
+            'data_digest': file_digest(data_path), 'data_path': os.path.abspath(data_path)}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, params=B, cov=V, baseline=base, shock_map=M, meta=json.dumps(meta))
+    return path
+
+
+class WhatIf:
+    """Loaded coefficient cache; every query is a few small array products."""
+
+    def __init__(self, params, cov, baseline, shock_map, meta):
+        self.params, self.cov, self.baseline, self.shock_map = params, cov, baseline, shock_map
+        self.meta = meta
+        self.models = meta['models']
+        self.countries = meta['countries']
+        self.variables = meta['variables']
+        self._country_idx = {c: i for i, c in enumerate(self.countries)}
+
+    @classmethod
+    def load(cls, path=CACHE_PATH, data_path=DATA_PATH, rebuild=False):
+        """Load the cache, building it first if missing or stale."""
+        stale = rebuild or not os.path.exists(path)
+        if not stale:
+            with np.load(path) as f:
+                meta = json.loads(str(f['meta']))
+            stale = meta['data_digest'] != file_digest(data_path)
+        if stale:
+            build_cache(path, data_path)
+        with np.load(path) as f:
+            return cls(f['params'], f['cov'], f['baseline'], f['shock_map'],
+                       json.loads(str(f['meta'])))
+
+    def shock_matrix(self, shocks):
+        """(D, len(SHOCKS)) array of log / level changes from a shock dict."""
+        S = np.zeros((len(self.countries), len(SHOCKS)))
+        for name, value in shocks.items():
+            j = SHOCKS.index(name)
+            if isinstance(value, dict):
+                for country, v in value.items():
+                    S[self._country_idx[country], j] = v
+            else:
+                S[:, j] = value
+        log_cols = [SHOCKS.index(s) for s in LOG_SHOCKS]
+        S[:, log_cols] = np.log1p(S[:, log_cols])
+        return S
+
+    def predict(self, S):
+        """
+        Fast path. S is a (D, len(SHOCKS)) shock matrix (see shock_matrix).
+        Returns (baseline ln_arrivals, change in ln_arrivals, its standard
+        error), each of shape (models, D).
+        """
+        delta = S @ self.shock_map
+        change = self.params @ delta.T
+        se = np.sqrt(np.einsum('dk,mkl,dl->md', delta, self.cov, delta))
+        return self.baseline, change, se
+
+    def query(self, shocks, models=None, countries=None, level=0.95):
+        """
+        Predicted arrivals under a shock dict for every model and destination.
+
+        Returns a DataFrame with model, Country, baseline_arrivals,
+        predicted_arrivals, pct_change and its confidence band (from the
+        coefficient covariance).
+        """
+        base, change, se = self.predict(self.shock_matrix(shocks))
+        z = stats.norm.ppf(0.5 + level / 2)
+        m, D = base.shape
+        out = pd.DataFrame({
+            'model': np.repeat(self.models, D),
+            'Country': np.tile(self.countries, m),
+            'baseline_arrivals': np.exp(base).ravel(),
+            'predicted_arrivals': np.exp(base + change).ravel(),
+            'pct_change': np.expm1(change).ravel() * 100,
+            'pct_lower': np.expm1(change - z * se).ravel() * 100,
+            'pct_upper': np.expm1(change + z * se).ravel() * 100,
+        })
+        if models:
+            out = out[out['model'].isin(models)]
+        if countries:
+            out = out[out['Country'].isin(countries)]
+        return out.reset_index(drop=True)
+
+    def elasticities(self):
+        """
+        Arrival responses to each raw-data shock, per model. Entries are
+        elasticities for proportional shocks (gdp_china, exchange_rate,
+        CPI_destination, RER) and semi-elasticities for peace_index.
+        """
+        E = self.params @ self.shock_map.T
+        se = np.sqrt(np.einsum('jk,mkl,jl->mj', self.shock_map, self.cov, self.shock_map))
+        return pd.DataFrame({
+            'model': np.repeat(self.models, len(SHOCKS)),
+            'shock': np.tile(SHOCKS, len(self.models)),
+            'elasticity': E.ravel(),
+            'std_error': se.ravel(),
+        })
@@ -1,77 +1,61 @@
-import pandas as pd
 import glob
 import os
-
-print("Starting data cleaning and combination process...")
-
-# Get all the xlsx files in the web_scraping directory
-file_pattern = "web_scraping/us_news_countries_data_*.xlsx"
-files = glob.glob(file_pattern)
-
-print(f"Found {len(files)} files to process\n")
-
-# Initialize the combined dataframe with None
-combined_df = None
-
-# Process each file
-for file_path in sorted(files):
-    # Extract the category name from the filename
-    filename = os.path.basename(file_path)
-    # Remove 'us_news_countries_data_' prefix and '.xlsx' suffix
-    category = filename.replace('us_news_countries_data_', '').replace('.xlsx', '')
-    
-    print(f"Processing: {filename}")
-    print(f"  Category: {category}")
-    
-    # Read the Excel file
-    df = pd.read_excel(file_path)
-    
-    # Keep only Country and Rank_Number columns
-    if 'Country' in df.columns and 'Rank_Number' in df.columns:
-        df_subset = df[['Country', 'Rank_Number']].copy()
-        
-        # Remove rows where Country is blank/null
-        df_subset = df_subset[df_subset['Country'].notna() & (df_subset['Country'] != '')]
-        
-        # Rename Rank_Number to include the category
-        new_column_name = f'Rank_Number_{category}'
-        df_subset.rename(columns={'Rank_Number': new_column_name}, inplace=True)
-        
-        print(f"  Found {len(df_subset)} countries")
-        print(f"  Column renamed to: {new_column_name}")
-        
-        # Merge with combined dataframe
-        if combined_df is None:
-            combined_df = df_subset
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tourism.compile import multiway_join, read_files
+
+# The guard is needed because the files are parsed in worker processes
+if __name__ == '__main__':
+    print("Starting data cleaning and combination process...")
+
+    # Get all the xlsx files in the web_scraping directory
+    file_pattern = "web_scraping/us_news_countries_data_*.xlsx"
+    files = sorted(glob.glob(file_pattern))
+
+    print(f"Found {len(files)} files to process\n")
+
+    # Read every file in parallel; the label is the category name
+    # (filename without the 'us_news_countries_data_' prefix and '.xlsx' suffix)
+    categories = [os.path.basename(f).replace('us_news_countries_data_', '').replace('.xlsx', '')
+                  for f in files]
+    frames = read_files(files, labels=categories)
+
+    # Keep only Country and Rank_Number columns, renamed to include the category
+    sources = {}
+    for category, df in frames.items():
+        print(f"Processing: us_news_countries_data_{category}.xlsx")
+        print(f"  Category: {category}")
+        if 'Country' in df.columns and 'Rank_Number' in df.columns:
+            new_column_name = f'Rank_Number_{category}'
+            sources[category] = df[['Country', 'Rank_Number']].rename(
+                columns={'Rank_Number': new_column_name})
+            print(f"  Found {sources[category]['Country'].notna().sum()} countries")
+            print(f"  Column renamed to: {new_column_name}\n")
         else:
-            combined_df = pd.merge(combined_df, df_subset, on='Country', how='outer')
-        
-        print(f"  Combined dataframe now has {len(combined_df)} rows\n")
-    else:
-        print(f"  WARNING: Missing required columns in {filename}\n")
-
-# Remove any rows where Country is blank
-combined_df = combined_df[combined_df['Country'].notna() & (combined_df['Country'] != '')]
+            print(f"  WARNING: Missing required columns in us_news_countries_data_{category}.xlsx\n")
 
-# Sort by Country name
-combined_df = combined_df.sort_values('Country').reset_index(drop=True)
+    # Join all categories on the canonical country key in one pass (blank
+    # countries are dropped, rows sorted by Country name)
+    combined_df, provenance = multiway_join(sources, key='Country', how='outer')
+    print(provenance[['column', 'rows', 'non_null', 'dropped_duplicates']].to_string(index=False))
 
-# Save to Excel
-output_file = 'web_scraping/us_news_countries_combined.xlsx'
-print(f"Saving combined data to: {output_file}")
-combined_df.to_excel(output_file, index=False, engine='openpyxl')
+    # Save to Excel
+    output_file = 'web_scraping/us_news_countries_combined.xlsx'
+    print(f"Saving combined data to: {output_file}")
+    combined_df.to_excel(output_file, index=False, engine='openpyxl')
 
-print(f"\n✓ Successfully combined {len(files)} files")
-print(f"✓ Total countries: {len(combined_df)}")
-print(f"✓ Total columns: {len(combined_df.columns)}")
-print(f"✓ Output saved to: {output_file}")
+    print(f"\n✓ Successfully combined {len(files)} files")
+    print(f"✓ Total countries: {len(combined_df)}")
+    print(f"✓ Total columns: {len(combined_df.columns)}")
+    print(f"✓ Output saved to: {output_file}")
 
-print("\nColumn names:")
-for col in combined_df.columns:
-    print(f"  - {col}")
+    print("\nColumn names:")
+    for col in combined_df.columns:
+        print(f"  - {col}")
 
-print("\nFirst few rows:")
-print(combined_df.head(10))
+    print("\nFirst few rows:")
+    print(combined_df.head(10))
 
-print("\nData summary:")
-print(combined_df.info())
+    print("\nData summary:")
+    print(combined_df.info())